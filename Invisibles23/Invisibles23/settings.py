@@ -26,6 +26,9 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # Domain (no www or https:// at the beginning)
 DOMAIN = "www.lesinvisibles.ch"
 
+# Contact address given in the error messages of the registration forms
+DEV_EMAIL = env("DEV_EMAIL", default=env("OWNER_EMAIL", default=""))
+
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/4.1/howto/deployment/checklist/
 
@@ -109,6 +112,19 @@ DATABASES = {
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/4.1/topics/cache/
+# The web and webhook workers share locks, circuit breakers and invalidations through the cache :
+# production needs a shared backend (e.g. CACHE_URL=redis://...), the local memory is refused by
+# `manage.py check --deploy` (see proxy/checks.py)
+
+CACHES = {
+    "default": env.cache("CACHE_URL", default="locmemcache://"),
+}
+# Seconds the content pages (home, about, thematic pages ...) are cached, they are invalidated as soon
+# as the admin changes their models (see website/utils/page_cache.py), 0 disables the cache
+PAGE_CACHE_TTL = env.int("PAGE_CACHE_TTL", default=86400)
+
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
 
@@ -191,3 +207,85 @@ CORS_ALLOWED_ORIGINS = [
     "http://localhost:8000",
     f"https://{DOMAIN}",
 ]
+
+# ====== OUTBOUND HTTP ====== #
+
+# Shared session of the proxy views (see proxy/utils/http.py), timeouts in seconds
+HTTP_CONNECT_TIMEOUT = env.float("HTTP_CONNECT_TIMEOUT", default=3.05)
+HTTP_READ_TIMEOUT = env.float("HTTP_READ_TIMEOUT", default=10)
+HTTP_MAX_RETRIES = env.int("HTTP_MAX_RETRIES", default=2)
+# Retries wait backoff * 2^(retry - 1) seconds
+HTTP_RETRY_BACKOFF = env.float("HTTP_RETRY_BACKOFF", default=0.3)
+# Number of hosts with a connection pool, and connections kept alive per host
+HTTP_POOL_CONNECTIONS = env.int("HTTP_POOL_CONNECTIONS", default=10)
+HTTP_POOL_MAXSIZE = env.int("HTTP_POOL_MAXSIZE", default=10)
+# Max concurrent connections of the async client (async proxy views waiting on upstreams)
+HTTP_ASYNC_MAX_CONNECTIONS = env.int("HTTP_ASYNC_MAX_CONNECTIONS", default=200)
+# Route the proxy endpoints to their async views, to enable when served by an ASGI server (make run-asgi)
+PROXY_ASYNC_VIEWS = env.bool("PROXY_ASYNC_VIEWS", default=False)
+# Route the event registration and membership forms to their async views (ASGI), same default as the proxy
+CHECKOUT_ASYNC_VIEWS = env.bool("CHECKOUT_ASYNC_VIEWS", default=PROXY_ASYNC_VIEWS)
+
+# ====== CIRCUIT BREAKER ====== #
+
+# Consecutive failures of an upstream (Stripe, Mailchimp, Ausha, reCAPTCHA) before its calls fail fast
+CIRCUIT_BREAKER_FAILURE_THRESHOLD = env.int("CIRCUIT_BREAKER_FAILURE_THRESHOLD", default=5)
+# Seconds the calls fail fast before a single probe call is sent to the upstream
+CIRCUIT_BREAKER_RESET_TIMEOUT = env.int("CIRCUIT_BREAKER_RESET_TIMEOUT", default=30)
+
+# ====== AUSHA PROXY ====== #
+
+# Ausha show of the association podcasts (see sync_ausha_episodes command)
+AUSHA_SHOW_ID = env.int("AUSHA_SHOW_ID", default=44497)
+
+# Seconds the podcasts payload is fresh, then served stale while refreshed in background
+AUSHA_CACHE_TTL = env.int("AUSHA_CACHE_TTL", default=900)
+AUSHA_CACHE_STALE_TTL = env.int("AUSHA_CACHE_STALE_TTL", default=86400)
+AUSHA_API_TIMEOUT = env.float("AUSHA_API_TIMEOUT", default=10)
+# Seconds the synchronised episodes rendered in the pages are cached (cleared by sync_ausha_episodes)
+PODCAST_EPISODES_CACHE_TTL = env.int("PODCAST_EPISODES_CACHE_TTL", default=3600)
+# Seconds browsers and CDNs can cache the GET responses of the Ausha proxy
+AUSHA_HTTP_MAX_AGE = env.int("AUSHA_HTTP_MAX_AGE", default=300)
+# Max seconds a request waits for another worker already fetching the same show, and lifetime of the
+# lock of the fetching worker. Derived from the Ausha timeout and HTTP retries if not set
+# (see max_request_duration in proxy/utils/http.py)
+AUSHA_CACHE_LOCK_TIMEOUT = env.float("AUSHA_CACHE_LOCK_TIMEOUT", default=None)
+
+# ====== STRIPE ====== #
+
+# The Stripe SDK is configured once at startup (see proxy/utils/stripe_client.py)
+STRIPE_API_TOKEN = env("STRIPE_API_TOKEN", default="")
+# Secret of the webhook endpoint (/api/proxy/stripe-webhook/), its events must include checkout.session.completed,
+# checkout.session.expired, invoice.paid, customer.subscription.updated, customer.subscription.deleted,
+# price.* and product.* (the status of the members and the catalog of the prices depend on them)
+STRIPE_WEBHOOK_SECRET = env("STRIPE_WEBHOOK_SECRET", default="")
+# Seconds to wait for a Stripe response (the connect timeout is HTTP_CONNECT_TIMEOUT)
+STRIPE_READ_TIMEOUT = env.float("STRIPE_READ_TIMEOUT", default=20)
+# Retries of the network errors, 409 and 5xx responses (POST requests are sent with an idempotency key)
+STRIPE_MAX_NETWORK_RETRIES = env.int("STRIPE_MAX_NETWORK_RETRIES", default=2)
+# Seconds a price of the catalog (StripePrice) is cached, deleted by the price.* and product.* webhooks
+STRIPE_PRICE_CACHE_TTL = env.int("STRIPE_PRICE_CACHE_TTL", default=86400)
+# Threads of a process sending the independent Stripe calls of the checkout views concurrently
+STRIPE_CONCURRENT_CALLS = env.int("STRIPE_CONCURRENT_CALLS", default=8)
+# Seconds a seat of an event is held during the checkout, the lifetime of the Stripe checkout session
+# (Stripe accepts 30 minutes to 24 hours, the minimum is padded by a minute, see checkout_session_lifetime)
+SEAT_HOLD_TTL = env.int("SEAT_HOLD_TTL", default=1800)
+# Seconds between two releases of the expired seat holds by the webhook worker
+SEAT_HOLD_SWEEP_INTERVAL = env.int("SEAT_HOLD_SWEEP_INTERVAL", default=300)
+
+# ====== STRIPE WEBHOOK ====== #
+
+# Events are stored by the webhook and processed by the process_webhook_events command (worker)
+WEBHOOK_MAX_ATTEMPTS = env.int("WEBHOOK_MAX_ATTEMPTS", default=5)
+# Seconds before retrying a failed event, doubled after each attempt
+WEBHOOK_RETRY_BACKOFF = env.int("WEBHOOK_RETRY_BACKOFF", default=60)
+# Seconds after which an event claimed by a worker that stopped is processed again
+WEBHOOK_PROCESSING_TIMEOUT = env.int("WEBHOOK_PROCESSING_TIMEOUT", default=600)
+# Days processed events are kept to ignore the retries of Stripe (it retries for up to 3 days)
+WEBHOOK_RETENTION_DAYS = env.int("WEBHOOK_RETENTION_DAYS", default=30)
+# Seconds the worker waits when the inbox is empty
+WEBHOOK_POLL_INTERVAL = env.float("WEBHOOK_POLL_INTERVAL", default=2)
+# Seconds between two publications of the handler timings of a process in the cache (see proxy/utils/metrics.py)
+WEBHOOK_TIMINGS_PUBLISH_INTERVAL = env.int("WEBHOOK_TIMINGS_PUBLISH_INTERVAL", default=10)
+# Seconds the timings of a stopped process are kept
+WEBHOOK_TIMINGS_TTL = env.int("WEBHOOK_TIMINGS_TTL", default=7 * 86400)
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class ProxyConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "proxy"
+
+    def ready(self):
+        from . import checks  # noqa: F401 (registers the system checks)
+        from .utils.stripe_client import configure_stripe
+
+        # A single Stripe configuration for the process, shared by all the requests
+        configure_stripe()
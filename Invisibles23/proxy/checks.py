@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+LOCAL_CACHE_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    The web workers and the webhook worker share state through the default cache (single-flight
+    locks, circuit breakers, invalidation of the pages, prices and podcasts), a cache local to each
+    process is refused at deploy time (`manage.py check --deploy`, see railway.json).
+    """
+    backend = settings.CACHES["default"]["BACKEND"]
+    if backend not in LOCAL_CACHE_BACKENDS:
+        return []
+    return [
+        Error(
+            f"The default cache ({backend}) is not shared between processes.",
+            hint="Set CACHE_URL to a shared cache, e.g. CACHE_URL=redis://host:6379/0",
+            id="proxy.E001",
+        )
+    ]
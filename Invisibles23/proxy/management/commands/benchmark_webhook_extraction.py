@@ -0,0 +1,111 @@
+import copy
+import time
+from django.core.management.base import BaseCommand
+from proxy.test_data.test_objects import MOCK_MEMBERSHIP_EVENT
+from proxy.utils.helpers import find_key_in_dict
+from proxy.utils.stripe_payload import extract_event_data
+
+
+class Command(BaseCommand):
+    """
+    Measure the cost per payload of the extraction of the Stripe webhook data (invoice.paid), with
+    the extraction spec and with the previous recursive scans (find_key_in_dict).
+
+    The mock invoice is enlarged with line items and expanded objects (like an invoice retrieved with
+    expand=["customer", "subscription"]) placed before the searched keys, the worst case of the scans.
+
+    Usage
+    -----
+        `python manage.py benchmark_webhook_extraction`
+        `python manage.py benchmark_webhook_extraction --lines 500 --expanded 20 --iterations 2000`
+    """
+
+    help = "Benchmark the extraction of the Stripe webhook data on large invoice objects"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--lines", type=int, default=100, help="Number of invoice line items (default: 100)"
+        )
+        parser.add_argument(
+            "--expanded",
+            type=int,
+            default=10,
+            help="Number of expanded objects added to the invoice (default: 10)",
+        )
+        parser.add_argument(
+            "--iterations", type=int, default=1000, help="Number of payloads extracted (default: 1000)"
+        )
+
+    def handle(self, *args, **options):
+        invoice = build_large_invoice(options["lines"], options["expanded"])
+        iterations = options["iterations"]
+
+        spec = self._measure(lambda: extract_event_data("invoice.paid", invoice), iterations)
+        scans = self._measure(lambda: extract_with_scans(invoice), iterations)
+
+        self.stdout.write(
+            f"Invoice with {options['lines']} line(s) and {options['expanded']} expanded object(s), "
+            f"{iterations} iterations"
+        )
+        self.stdout.write(f"  find_key_in_dict scans: {scans:.1f} µs per payload")
+        self.stdout.write(f"  extraction spec:        {spec:.1f} µs per payload")
+        self.stdout.write(self.style.SUCCESS(f"Speedup: x{scans / spec:.1f}"))
+
+    def _measure(self, extract, iterations) -> float:
+        """
+        Return the mean duration of an extraction in microseconds.
+        """
+        start = time.perf_counter()
+        for _ in range(iterations):
+            extract()
+        return (time.perf_counter() - start) / iterations * 1e6
+
+
+def build_large_invoice(lines, expanded) -> dict:
+    """
+    Build an invoice.paid data object from the mock event, with extra line items and expanded objects.
+    """
+    invoice = copy.deepcopy(MOCK_MEMBERSHIP_EVENT["data"]["object"])
+    line_item = invoice["lines"]["data"][0]
+    invoice["lines"]["data"] += [copy.deepcopy(line_item) for _ in range(lines - 1)]
+
+    expanded_objects = {
+        f"expanded_{i}": {
+            "object": "subscription",
+            "automatic_tax": {"enabled": False, "liability": None},
+            "billing_thresholds": None,
+            "invoice_settings": {"account_tax_ids": None, "issuer": {"type": "self"}},
+            "payment_settings": {
+                "payment_method_options": {
+                    "card": {
+                        "mandate_options": {},
+                        "network": None,
+                        "request_three_d_secure": "automatic",
+                    },
+                    "sepa_debit": {},
+                },
+                "save_default_payment_method": "off",
+            },
+            "pending_invoice_item_interval": {"interval": "month", "interval_count": 1},
+            "trial_settings": {"end_behavior": {"missing_payment_method": "create_invoice"}},
+            "items": {"object": "list", "data": [copy.deepcopy(line_item)]},
+        }
+        for i in range(expanded)
+    }
+    return {**expanded_objects, **invoice}
+
+
+def extract_with_scans(invoice) -> dict:
+    """
+    Previous extraction of the webhook (a recursive scan per field).
+    """
+    return {
+        "customer_id": find_key_in_dict(invoice, "customer"),
+        "customer_name": find_key_in_dict(invoice, "customer_name"),
+        "customer_email": find_key_in_dict(invoice, "customer_email"),
+        "customer_country_code": find_key_in_dict(invoice, "country"),
+        "customer_invoice_url": find_key_in_dict(invoice, "hosted_invoice_url"),
+        "customer_subscription_plan": invoice["lines"]["data"][0]["description"],
+        "plan_lookup_key": invoice["lines"]["data"][0]["price"]["lookup_key"],
+        "metadata": find_key_in_dict(invoice["lines"]["data"][0], "metadata"),
+    }
@@ -0,0 +1,77 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from proxy.utils.metrics import publish_stage_timings
+from proxy.utils.webhooks import (
+    process_pending_webhook_events,
+    purge_processed_webhook_events,
+)
+from website.utils.seat_holds import release_expired_seat_holds
+
+PURGE_INTERVAL = 3600  # Seconds between two purges of the processed events
+
+
+class Command(BaseCommand):
+    """
+    Worker processing the Stripe events stored in the inbox by the webhook (WebhookEvent).
+    The inbox is polled until the command is stopped, unless --once is given. The processed events
+    older than WEBHOOK_RETENTION_DAYS are purged at start and then every hour, the expired seat holds
+    every SEAT_HOLD_SWEEP_INTERVAL seconds. The stage timings are published when the inbox is empty
+    and when the command exits, so the last batch is not left unpublished.
+
+    Usage
+    -----
+        `python manage.py process_webhook_events`
+        `python manage.py process_webhook_events --once --batch-size 50`
+    """
+
+    help = "Process the Stripe events stored in the webhook inbox"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Process the due events and exit",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10,
+            help="Maximum number of events claimed at once (default: 10)",
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        purged_at = 0
+        swept_at = 0
+        unpublished = False  # Events processed since the last publication of the timings
+        try:
+            while True:
+                if time.time() - purged_at >= PURGE_INTERVAL:
+                    purge_processed_webhook_events()
+                    purged_at = time.time()
+
+                if time.time() - swept_at >= settings.SEAT_HOLD_SWEEP_INTERVAL:
+                    release_expired_seat_holds()
+                    swept_at = time.time()
+
+                count = process_pending_webhook_events(options["batch_size"])
+                total += count
+                unpublished = unpublished or bool(count)
+
+                if options["once"]:
+                    # Process every due event before exiting
+                    if count:
+                        continue
+                    break
+
+                if not count:
+                    if unpublished:  # Going idle, the timings of the last batch are published
+                        publish_stage_timings(force=True)
+                        unpublished = False
+                    time.sleep(settings.WEBHOOK_POLL_INTERVAL)
+        finally:
+            if unpublished:
+                publish_stage_timings(force=True)
+
+        self.stdout.write(self.style.SUCCESS(f"{total} Stripe event(s) handled"))
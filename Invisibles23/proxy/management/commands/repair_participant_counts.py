@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from website.models import Event, EventParticipants
+
+
+class Command(BaseCommand):
+    """
+    Recompute the participant counter of the events (Event.participant_count) from their participations,
+    and their fully booked status. Only the events whose counter differs are updated, in bulk.
+
+    Usage
+    -----
+        `python manage.py repair_participant_counts`
+        `python manage.py repair_participant_counts --dry-run`
+    """
+
+    help = "Recompute the participant counter of the events from their participations"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only list the events with a wrong counter",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of events updated per query (default: 500)",
+        )
+
+    def handle(self, *args, **options):
+        participants = (
+            EventParticipants.objects.filter(event=OuterRef("pk"))
+            .values("event")
+            .annotate(count=Count("pk"))
+            .values("count")
+        )
+
+        with transaction.atomic():
+            events = list(
+                Event.objects.select_for_update()
+                .annotate(actual_count=Coalesce(Subquery(participants), 0))
+                .exclude(participant_count=F("actual_count"))
+                .only("id", "title", "date", "participant_count", "participants_limit", "is_fully_booked")
+            )
+
+            for event in events:
+                self.stdout.write(
+                    f"{event} (ID {event.pk}): counter {event.participant_count}, "
+                    f"{event.actual_count} participation(s)"
+                )
+                event.participant_count = event.actual_count
+                event.is_fully_booked = event.actual_count >= event.participants_limit
+
+            if not options["dry_run"]:
+                Event.objects.bulk_update(
+                    events,
+                    ["participant_count", "is_fully_booked"],
+                    batch_size=options["batch_size"],
+                )
+
+        prefix = "[DRY RUN] " if options["dry_run"] else ""
+        self.stdout.write(self.style.SUCCESS(f"{prefix}{len(events)} event counter(s) repaired"))
@@ -0,0 +1,140 @@
+import json
+from datetime import datetime, timedelta, time as dt_time, timezone as dt_timezone
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from website.models import WebhookEvent
+from proxy.utils.webhooks import replay_stripe_events
+
+
+class Command(BaseCommand):
+    """
+    Replay Stripe events through the webhook handlers (no HTTP request, no signature verification),
+    e.g. to backfill the members and event participants after an outage.
+
+    The events are read from the inbox (WebhookEvent), or from a JSON lines file with a Stripe event
+    per line (--file). The date range applies to the reception date for the inbox and to the creation
+    date of the Stripe event for a file. Events already processed are skipped unless --force is given.
+
+    Emails, Mailchimp subscriptions and Stripe customer updates are only sent with --notify.
+
+    Usage
+    -----
+        `python manage.py replay_webhook_events --since 2024-08-01 --until 2024-08-31 --dry-run`
+        `python manage.py replay_webhook_events --file events.jsonl --type invoice.paid --batch-size 500`
+    """
+
+    help = "Replay stored or exported Stripe events through the webhook handlers"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--file",
+            help="JSON lines file of Stripe events (e.g. exported from the Stripe dashboard)",
+        )
+        parser.add_argument("--since", type=_parse_date, help="First day of the range (YYYY-MM-DD)")
+        parser.add_argument("--until", type=_parse_date, help="Last day of the range (YYYY-MM-DD)")
+        parser.add_argument(
+            "--type",
+            action="append",
+            dest="types",
+            help="Only replay this event type (can be repeated), e.g. --type invoice.paid",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Number of events processed in a transaction (default: 100)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Count the events that would be replayed without processing them",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Replay the events already processed as well",
+        )
+        parser.add_argument(
+            "--notify",
+            action="store_true",
+            help="Send the emails, Mailchimp subscriptions and Stripe customer updates",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("The batch size must be at least 1")
+
+        since = _start_of_day(options["since"]) if options["since"] else None
+        until = _start_of_day(options["until"], days=1) if options["until"] else None
+
+        if options["file"]:
+            events = self._read_file(options["file"], since, until, options["types"])
+        else:
+            events = self._read_inbox(since, until, options["types"])
+
+        counters = replay_stripe_events(
+            events,
+            batch_size=options["batch_size"],
+            dry_run=options["dry_run"],
+            force=options["force"],
+            notify=options["notify"],
+        )
+
+        prefix = "[DRY RUN] " if options["dry_run"] else ""
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{prefix}{counters['processed']} event(s) replayed, "
+                f"{counters['skipped']} already processed, {counters['failed']} failed"
+            )
+        )
+
+    def _read_inbox(self, since, until, types):
+        """
+        Iterate over the payloads of the stored events, oldest first.
+        """
+        events = WebhookEvent.objects.order_by("received_at")
+        if since:
+            events = events.filter(received_at__gte=since)
+        if until:
+            events = events.filter(received_at__lt=until)
+        if types:
+            events = events.filter(event_type__in=types)
+        return events.values_list("payload", flat=True).iterator(chunk_size=500)
+
+    def _read_file(self, path, since, until, types):
+        """
+        Iterate over the Stripe events of a JSON lines file, filtered on their creation date and type.
+        """
+        try:
+            with open(path, encoding="utf-8") as file:
+                for line_number, line in enumerate(file, start=1):
+                    if not line.strip():
+                        continue
+                    try:
+                        event = json.loads(line)
+                    except json.JSONDecodeError as error:
+                        raise CommandError(f"Invalid JSON at line {line_number}: {error}")
+
+                    created = datetime.fromtimestamp(event.get("created", 0), tz=dt_timezone.utc)
+                    if since and created < since or until and created >= until:
+                        continue
+                    if types and event.get("type") not in types:
+                        continue
+                    yield event
+        except OSError as error:
+            raise CommandError(f"Cannot read {path}: {error}")
+
+
+def _parse_date(value):
+    date = parse_date(value)
+    if date is None:
+        raise ValueError(f"Invalid date: {value}")
+    return date
+
+
+def _start_of_day(date, days=0):
+    """
+    Return the aware datetime of the start of the day (in the current time zone), shifted by days.
+    """
+    return timezone.make_aware(datetime.combine(date, dt_time.min)) + timedelta(days=days)
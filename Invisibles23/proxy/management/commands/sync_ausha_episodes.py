@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from proxy.utils.ausha import sync_ausha_episodes
+
+
+class Command(BaseCommand):
+    """
+    Synchronise the podcast episodes of the Ausha show in the database (PodcastEpisode).
+    Only the episodes newer than the last synchronised one are fetched, unless --full is given.
+
+    Usage
+    -----
+        `python manage.py sync_ausha_episodes`
+        `python manage.py sync_ausha_episodes --show-id 44497 --full`
+    """
+
+    help = "Synchronise the podcast episodes of the Ausha show in the database"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--show-id",
+            type=int,
+            default=settings.AUSHA_SHOW_ID,
+            help="ID of the Ausha show (default: AUSHA_SHOW_ID setting)",
+        )
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Fetch and update all the episodes, not only the new ones",
+        )
+
+    def handle(self, *args, **options):
+        count = sync_ausha_episodes(options["show_id"], full=options["full"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{count} episode(s) synchronised for show {options['show_id']}"
+            )
+        )
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from website.utils.subscriptions import sync_member_subscriptions
+
+
+class Command(BaseCommand):
+    """
+    Set the subscription status of the members (Members.is_subscription_active) from their Stripe
+    subscriptions. To run once after the deploy of the subscription status, the status is then kept
+    up to date by the customer.subscription.updated and customer.subscription.deleted webhook events.
+
+    Usage
+    -----
+        `python manage.py sync_member_subscriptions`
+    """
+
+    help = "Synchronise the subscription status of the members with Stripe"
+
+    def handle(self, *args, **options):
+        count = sync_member_subscriptions()
+        self.stdout.write(self.style.SUCCESS(f"{count} member(s) with an active subscription"))
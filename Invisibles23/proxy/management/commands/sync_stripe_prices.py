@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from website.utils.stripe_prices import sync_stripe_prices
+
+
+class Command(BaseCommand):
+    """
+    Synchronise the catalog of the Stripe prices (StripePrice) with the active prices of Stripe that
+    have a lookup key. The catalog is then kept up to date by the price.* and product.* webhook events.
+
+    Usage
+    -----
+        `python manage.py sync_stripe_prices`
+    """
+
+    help = "Synchronise the catalog of the Stripe prices by lookup key"
+
+    def handle(self, *args, **options):
+        count = sync_stripe_prices()
+        self.stdout.write(self.style.SUCCESS(f"{count} Stripe price(s) synchronised"))
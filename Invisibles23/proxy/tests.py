@@ -6,15 +6,62 @@ from django.test import TestCase, override_settings
 from django.urls import reverse
 import unittest
 import requests
-from proxy.views import StripeWebhook, MailchimpProxy
-from website.models import Members, MembershipPlans, Event, Participant, EventParticipants
+import stripe
+from proxy.views import (
+    StripeWebhook,
+    MailchimpProxy,
+    AsyncAushaProxy,
+    AsyncMailchimpProxy,
+    AsyncEmailSender,
+)
+from website.models import (
+    Members,
+    MembershipPlans,
+    Event,
+    Participant,
+    EventParticipants,
+    PodcastEpisode,
+    WebhookEvent,
+)
 from proxy.test_data.test_objects import MOCK_MEMBERSHIP_EVENT, MOCK_TALK_EVENT
 from Invisibles23.logging_config import logger
-from django.test import TestCase, RequestFactory, Client
-from unittest.mock import patch, Mock
+from django.test import TestCase, RequestFactory, AsyncRequestFactory, Client
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.core.management import call_command
+from django.core.exceptions import ValidationError
+from django.core.management.base import SystemCheckError
+from proxy.checks import check_shared_cache
+from proxy.utils.cache import StaleWhileRevalidateCache, delete_if_equal, COMPARE_AND_DELETE_SCRIPT
+from django.core.cache.backends.redis import RedisCache
+from website.utils.view_helpers import podcast_episodes_version_key
+from proxy.utils.http import get_http_session, default_timeout, max_request_duration
+from proxy.utils.webhooks import purge_processed_webhook_events, process_pending_webhook_events
+from proxy.utils.stripe_payload import extract_event_data
+from proxy.utils.metrics import (
+    LatencyHistogram,
+    publish_stage_timings,
+    published_stage_timings,
+    record_stage,
+    reset_stage_timings,
+)
+from proxy.utils.circuit_breaker import CircuitBreaker, CircuitOpenError, circuit_breaker_stats
+from django.contrib.auth.models import User
+from unittest.mock import patch, Mock, AsyncMock
 from Invisibles23.logging_utils import log_debug_info
+import asyncio
+from datetime import timedelta
+import brotli
+import gzip
+import io
+import json
+import os
 import random
 import string
+import tempfile
+import threading
+import time
 
 
 class StripeWebhookTest(TestCase):
@@ -88,6 +135,9 @@ class StripeWebhookTest(TestCase):
         # Instantiate the view and call the post method
         response = StripeWebhook.as_view()(request)
 
+        # Process the stored event (worker)
+        call_command("process_webhook_events", "--once", stdout=io.StringIO())
+
         self.assertEqual(response.status_code, 200)
         
         # Check if member was added to the database
@@ -146,6 +196,9 @@ class StripeWebhookTest(TestCase):
 
         # Instantiate the view and call the post method
         response = StripeWebhook.as_view()(request)
+
+        # Process the stored event (worker)
+        call_command("process_webhook_events", "--once", stdout=io.StringIO())
         
         self.assertEqual(response.status_code, 200)
         
@@ -182,6 +235,9 @@ class StripeWebhookTest(TestCase):
 
         # Instantiate the view and call the post method
         response = StripeWebhook.as_view()(request)
+
+        # Process the stored event (worker)
+        call_command("process_webhook_events", "--once", stdout=io.StringIO())
         
         logger.info(f"EVENT ID: {self.event.id}")
 
@@ -203,6 +259,905 @@ class StripeWebhookTest(TestCase):
         self.assertEqual(event_participant.participant, participant)
 
 
+class SubscriptionStatusWebhookTest(TestCase):
+    """
+    Test case for the subscription status of the members, updated by the customer.subscription.* events.
+    """
+
+    def setUp(self):
+        plan = MembershipPlans.objects.create(
+            name="Reduced", price=25, frequency="yearly", lookup_key="reduced-yearly"
+        )
+        self.member = Members.objects.create(
+            fname="Anita",
+            lname="Cassiette",
+            email="anita@test.com",
+            birthdate="1990-01-01",
+            address="Chemin des fauvettes 6",
+            zip_code="1212",
+            city="Lancy",
+            membership_plan=plan,
+            stripe_customer_id="cus_123",
+        )
+
+    def _process(self, event_type, status):
+        subscription = {"id": "sub_123", "customer": "cus_123", "status": status}
+        StripeWebhook().process_event({"type": event_type, "data": {"object": subscription}})
+        self.member.refresh_from_db()
+
+    def test_subscription_status_updated(self):
+        self._process("customer.subscription.updated", "unpaid")
+        self.assertFalse(self.member.is_subscription_active)
+
+        self._process("customer.subscription.updated", "active")
+        self.assertTrue(self.member.is_subscription_active)
+
+        self._process("customer.subscription.deleted", "canceled")
+        self.assertFalse(self.member.is_subscription_active)
+        self.assertIsNotNone(self.member.subscription_confirmed_at)
+
+    @patch("website.utils.subscriptions.stripe.Subscription.list")
+    def test_subscription_status_synchronised(self, mock_subscription_list):
+        """
+        The members stored before the subscription events were handled should get their status from Stripe.
+        """
+        cancelled = Members.objects.create(
+            fname="Paul",
+            lname="Hochon",
+            email="paul@test.com",
+            birthdate="1990-01-01",
+            address="Chemin des fauvettes 8",
+            zip_code="1212",
+            city="Lancy",
+            membership_plan=self.member.membership_plan,
+            stripe_customer_id="cus_456",
+        )
+        mock_subscription_list.return_value.auto_paging_iter.return_value = [
+            {"id": "sub_123", "customer": "cus_123", "status": "active"}
+        ]
+
+        stdout = io.StringIO()
+        call_command("sync_member_subscriptions", stdout=stdout)
+
+        self.assertIn("1 member(s) with an active subscription", stdout.getvalue())
+        self.member.refresh_from_db()
+        cancelled.refresh_from_db()
+        self.assertTrue(self.member.is_subscription_active)
+        self.assertFalse(cancelled.is_subscription_active)
+        self.assertIsNotNone(cancelled.subscription_confirmed_at)
+
+
+class WebhookInboxTest(TestCase):
+    """
+    Test case for the Stripe webhook inbox and its worker (process_webhook_events command).
+    """
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def _post_event(self, event):
+        request = self.factory.post(
+            "/stripe-webhook/",
+            data=b"{}",
+            content_type="application/json",
+            HTTP_STRIPE_SIGNATURE="t=1724337946,v1=signature",
+        )
+        with patch("proxy.views.stripe.Webhook.construct_event", return_value=event):
+            return StripeWebhook.as_view()(request)
+
+    @patch("proxy.views.stripe.Customer.modify")
+    def test_event_stored_without_processing(self, mock_stripe_customer_modify):
+        """
+        The webhook should only store the event, nothing is processed during the request.
+        """
+        response = self._post_event(MOCK_MEMBERSHIP_EVENT)
+
+        self.assertEqual(response.status_code, 200)
+        webhook_event = WebhookEvent.objects.get()
+        self.assertEqual(webhook_event.stripe_event_id, MOCK_MEMBERSHIP_EVENT["id"])
+        self.assertEqual(webhook_event.event_type, "invoice.paid")
+        self.assertEqual(webhook_event.status, WebhookEvent.PENDING)
+        self.assertFalse(Members.objects.exists())
+        mock_stripe_customer_modify.assert_not_called()
+
+    def test_duplicate_event_ignored(self):
+        """
+        A retry of Stripe for an event already received should cost a single lookup.
+        """
+        self._post_event(MOCK_MEMBERSHIP_EVENT)
+
+        with self.assertNumQueries(1):
+            response = self._post_event(MOCK_MEMBERSHIP_EVENT)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(WebhookEvent.objects.count(), 1)
+
+    def test_processed_events_purged_after_retention(self):
+        """
+        Only the processed events older than the retention window should be deleted.
+        """
+        for event_id, status, days in [
+            ("evt_old", WebhookEvent.PROCESSED, 40),
+            ("evt_recent", WebhookEvent.PROCESSED, 1),
+            ("evt_failed", WebhookEvent.FAILED, 40),
+        ]:
+            WebhookEvent.objects.create(
+                stripe_event_id=event_id,
+                event_type="invoice.paid",
+                payload={},
+                status=status,
+                processed_at=timezone.now() - timedelta(days=days),
+            )
+
+        self.assertEqual(purge_processed_webhook_events(retention_days=30), 1)
+        self.assertFalse(WebhookEvent.objects.filter(stripe_event_id="evt_old").exists())
+
+    @patch.object(StripeWebhook, "handle_talk_group", side_effect=Exception("Database unavailable"))
+    def test_failed_event_is_retried_later(self, mock_handle_talk_group):
+        """
+        A failed event should keep its error and attempt count, and wait for the backoff before a retry.
+        """
+        self._post_event(MOCK_TALK_EVENT)
+
+        call_command("process_webhook_events", "--once", stdout=io.StringIO())
+        webhook_event = WebhookEvent.objects.get()
+        self.assertEqual(webhook_event.status, WebhookEvent.FAILED)
+        self.assertEqual(webhook_event.attempts, 1)
+        self.assertEqual(webhook_event.error, "Database unavailable")
+        self.assertGreater(webhook_event.next_attempt_at, timezone.now())
+
+        call_command("process_webhook_events", "--once", stdout=io.StringIO())
+        webhook_event.refresh_from_db()
+        self.assertEqual(webhook_event.attempts, 1)
+
+    def test_event_abandoned_on_last_attempt_marked_failed(self):
+        """
+        An event abandoned by a stopped worker during its last attempt should be marked as failed once
+        its lease expired, not left processing forever.
+        """
+        for event_id, lease in [("evt_abandoned", -1), ("evt_in_progress", 60)]:
+            WebhookEvent.objects.create(
+                stripe_event_id=event_id,
+                event_type="invoice.paid",
+                payload={},
+                status=WebhookEvent.PROCESSING,
+                attempts=settings.WEBHOOK_MAX_ATTEMPTS,
+                next_attempt_at=timezone.now() + timedelta(seconds=lease),
+            )
+
+        with patch("proxy.utils.webhooks.process_webhook_event") as mock_process:
+            call_command("process_webhook_events", "--once", stdout=io.StringIO())
+
+        mock_process.assert_not_called()
+        abandoned = WebhookEvent.objects.get(stripe_event_id="evt_abandoned")
+        self.assertEqual(abandoned.status, WebhookEvent.FAILED)
+        self.assertIn("last attempt", abandoned.error)
+        self.assertEqual(
+            WebhookEvent.objects.get(stripe_event_id="evt_in_progress").status, WebhookEvent.PROCESSING
+        )
+
+    @patch.object(StripeWebhook, "_subscribe_to_mailing_list")
+    def test_permanent_error_not_retried(self, mock_subscribe):
+        """
+        An event failing with a permanent error should not be retried, and a membership that could not
+        be stored should not be subscribed to the mailing list.
+        """
+        self._post_event(MOCK_TALK_EVENT)  # The event of the metadata does not exist
+        # The membership plan does not exist (both mocks share the same event ID)
+        self._post_event({**MOCK_MEMBERSHIP_EVENT, "id": "evt_membership"})
+
+        call_command("process_webhook_events", "--once", stdout=io.StringIO())
+
+        for webhook_event in WebhookEvent.objects.all():
+            self.assertEqual(webhook_event.status, WebhookEvent.FAILED)
+            self.assertEqual(webhook_event.attempts, settings.WEBHOOK_MAX_ATTEMPTS)
+        self.assertEqual(
+            WebhookEvent.objects.get(event_type="invoice.paid").error, "Membership plan not found"
+        )
+        mock_subscribe.assert_not_called()
+
+        WebhookEvent.objects.update(next_attempt_at=timezone.now())
+        with patch("proxy.utils.webhooks.process_webhook_event") as mock_process:
+            call_command("process_webhook_events", "--once", stdout=io.StringIO())
+        mock_process.assert_not_called()
+
+    @patch.object(
+        StripeWebhook,
+        "_create_and_associate_participant_with_event",
+        side_effect=ValidationError("L'évènement est complet !"),
+    )
+    def test_fully_booked_event_not_retried(self, mock_create_participant):
+        """
+        A registration refused because the event is fully booked should not be retried.
+        """
+        self._post_event(MOCK_TALK_EVENT)
+
+        call_command("process_webhook_events", "--once", stdout=io.StringIO())
+
+        webhook_event = WebhookEvent.objects.get()
+        self.assertEqual(webhook_event.status, WebhookEvent.FAILED)
+        self.assertEqual(webhook_event.attempts, settings.WEBHOOK_MAX_ATTEMPTS)
+
+
+class WebhookReplayTest(TestCase):
+    """
+    Test case for the replay of Stripe events (replay_webhook_events command).
+    """
+
+    def setUp(self):
+        MembershipPlans.objects.create(
+            name="Test Membership Plan",
+            description="This is a test membership plan",
+            price=25.00,
+            frequency="yearly",
+            lookup_key="reduced-yearly",
+        )
+        self.export = tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False)
+        self.export.write(json.dumps(MOCK_MEMBERSHIP_EVENT) + "\n\n")
+        self.export.close()
+        self.addCleanup(os.remove, self.export.name)
+
+    def _replay(self, *args):
+        stdout = io.StringIO()
+        call_command("replay_webhook_events", "--file", self.export.name, *args, stdout=stdout)
+        return stdout.getvalue()
+
+    @patch("proxy.views.stripe.Customer.modify")
+    def test_replay_from_export_without_notifications(self, mock_stripe_customer_modify):
+        """
+        Replaying an export should backfill the member and store the event, without notifying anyone.
+        """
+        output = self._replay()
+
+        self.assertIn("1 event(s) replayed", output)
+        self.assertTrue(Members.objects.filter(email="afra.amaya@tutanota.com").exists())
+        webhook_event = WebhookEvent.objects.get(stripe_event_id=MOCK_MEMBERSHIP_EVENT["id"])
+        self.assertEqual(webhook_event.status, WebhookEvent.PROCESSED)
+        mock_stripe_customer_modify.assert_not_called()
+
+    def test_dry_run_writes_nothing(self):
+        """
+        A dry run should only count the events.
+        """
+        output = self._replay("--dry-run")
+
+        self.assertIn("[DRY RUN] 1 event(s) replayed", output)
+        self.assertFalse(Members.objects.exists())
+        self.assertFalse(WebhookEvent.objects.exists())
+
+    def test_processed_event_skipped(self):
+        """
+        An event already processed should be skipped, unless --force is given.
+        """
+        WebhookEvent.objects.create(
+            stripe_event_id=MOCK_MEMBERSHIP_EVENT["id"],
+            event_type="invoice.paid",
+            payload=MOCK_MEMBERSHIP_EVENT,
+            status=WebhookEvent.PROCESSED,
+        )
+
+        self.assertIn("1 already processed", self._replay())
+        self.assertFalse(Members.objects.exists())
+
+        self.assertIn("1 event(s) replayed", self._replay("--force"))
+        self.assertTrue(Members.objects.exists())
+
+    @patch("proxy.utils.webhooks.StripeWebhook.process_event")
+    def test_failed_replay_not_retried_by_the_worker(self, mock_process_event):
+        """
+        A failed replay should be kept for a manual replay, the worker should not process it again
+        (with the notifications).
+        """
+        mock_process_event.side_effect = Exception("Database unavailable")
+
+        self.assertIn("1 failed", self._replay())
+        webhook_event = WebhookEvent.objects.get(stripe_event_id=MOCK_MEMBERSHIP_EVENT["id"])
+        self.assertEqual(webhook_event.status, WebhookEvent.FAILED)
+        self.assertEqual(webhook_event.attempts, settings.WEBHOOK_MAX_ATTEMPTS)
+
+        self.assertEqual(process_pending_webhook_events(), 0)
+        self.assertEqual(mock_process_event.call_count, 1)
+
+    def test_filters_of_the_inbox(self):
+        """
+        Only the stored events of the date range and types should be replayed.
+        """
+        for event_id, event_type, days in [
+            ("evt_in_range", "invoice.paid", 2),
+            ("evt_too_old", "invoice.paid", 20),
+            ("evt_other_type", "checkout.session.completed", 2),
+        ]:
+            webhook_event = WebhookEvent.objects.create(
+                stripe_event_id=event_id,
+                event_type=event_type,
+                payload={**MOCK_MEMBERSHIP_EVENT, "id": event_id, "type": event_type},
+                status=WebhookEvent.PROCESSED,
+            )
+            WebhookEvent.objects.filter(pk=webhook_event.pk).update(
+                received_at=timezone.now() - timedelta(days=days)
+            )
+
+        since = (timezone.localdate() - timedelta(days=7)).isoformat()
+        stdout = io.StringIO()
+        call_command(
+            "replay_webhook_events", "--since", since, "--type", "invoice.paid", "--dry-run", stdout=stdout
+        )
+        self.assertIn("0 event(s) replayed, 1 already processed", stdout.getvalue())
+
+
+class WebhookTimingTest(TestCase):
+    """
+    Test case for the stage timings of the Stripe webhook handlers.
+    """
+
+    def setUp(self):
+        reset_stage_timings()
+        self.addCleanup(reset_stage_timings)
+
+    def test_histogram_percentiles(self):
+        """
+        The percentiles of the histogram should be close to the exact ones (log scale buckets).
+        """
+        histogram = LatencyHistogram()
+        for duration_ms in range(1, 1001):
+            histogram.observe(duration_ms)
+
+        for percent in (50, 95, 99):
+            self.assertAlmostEqual(histogram.percentile(percent), percent * 10, delta=percent * 10 * 0.25)
+        self.assertEqual(histogram.summary()["max_ms"], 1000)
+
+        other = LatencyHistogram()
+        other.observe(5000)
+        histogram.merge(other)
+        self.assertEqual(histogram.count, 1001)
+        self.assertEqual(histogram.maximum, 5000)
+
+    @patch("proxy.views.stripe.Customer.modify")
+    def test_stages_recorded_and_summarised(self, mock_stripe_customer_modify):
+        """
+        Processing an event should time each stage of the handler, the summary is staff only.
+        """
+        MembershipPlans.objects.create(
+            name="Test Membership Plan",
+            description="This is a test membership plan",
+            price=25.00,
+            frequency="yearly",
+            lookup_key="reduced-yearly",
+        )
+        with patch("proxy.views.sendEmail"), patch.object(StripeWebhook, "_subscribe_to_mailing_list"):
+            with self.assertLogs(logger, level="INFO") as logs:
+                StripeWebhook().process_event(MOCK_MEMBERSHIP_EVENT)
+
+        timing_records = [record for record in logs.records if hasattr(record, "webhook_timing")]
+        self.assertEqual(len(timing_records), 1)
+        timing = timing_records[0].webhook_timing
+        self.assertEqual(timing["handler"], "membership")
+        self.assertEqual(timing["event_id"], MOCK_MEMBERSHIP_EVENT["id"])
+        self.assertEqual(
+            list(timing["stages_ms"]),
+            [
+                "extract_customer_data",
+                "add_member_to_database",
+                "update_stripe_customer",
+                "send_alerts",
+                "subscribe_to_mailing_list",
+            ],
+        )
+
+        url = reverse("stripe-webhook-stats")
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        staff = User.objects.create_user("staff", password="password", is_staff=True)
+        self.client.force_login(staff)
+        stages = self.client.get(url).json()["stages"]
+        self.assertEqual(stages["membership.add_member_to_database"]["count"], 1)
+        self.assertEqual(
+            set(stages["membership.total"]), {"count", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"}
+        )
+
+
+    @override_settings(WEBHOOK_TIMINGS_PUBLISH_INTERVAL=3600)
+    @patch("proxy.views.stripe.Customer.modify")
+    def test_timings_published_when_worker_exits(self, mock_stripe_customer_modify):
+        """
+        The timings of the last batch of the worker should be published, even within the publish interval.
+        """
+        MembershipPlans.objects.create(
+            name="Test Membership Plan",
+            price=25.00,
+            frequency="yearly",
+            lookup_key="reduced-yearly",
+        )
+        publish_stage_timings(force=True)  # Published just before the batch
+        WebhookEvent.objects.create(
+            stripe_event_id=MOCK_MEMBERSHIP_EVENT["id"],
+            event_type="invoice.paid",
+            payload=MOCK_MEMBERSHIP_EVENT,
+        )
+
+        with patch("proxy.views.sendEmail"), patch.object(StripeWebhook, "_subscribe_to_mailing_list"):
+            call_command("process_webhook_events", "--once", stdout=io.StringIO())
+
+        self.assertEqual(published_stage_timings()["membership.total"].count, 1)
+
+    def test_processes_publish_in_their_own_slot(self):
+        """
+        Processes publishing at the same time should not overwrite the timings of each other.
+        """
+        record_stage("membership", "total", 10)
+        with patch("proxy.utils.metrics.PROCESS_ID", "other-host:1"):
+            publish_stage_timings(force=True)
+        publish_stage_timings(force=True)
+
+        self.assertEqual(published_stage_timings()["membership.total"].count, 2)
+
+
+class StripePayloadSpecTest(TestCase):
+    """
+    Test case for the extraction of the Stripe webhook data with the declared specs.
+    """
+
+    def test_invoice_fields_extracted(self):
+        """
+        The declared fields of an invoice should be resolved from their paths.
+        """
+        invoice = extract_event_data("invoice.paid", MOCK_MEMBERSHIP_EVENT["data"]["object"])
+
+        self.assertEqual(invoice.customer_id, "cus_Qhzk8mRaY916py")
+        self.assertEqual(invoice.customer_email, "afra.amaya@tutanota.com")
+        self.assertEqual(invoice.customer_country_code, "CH")
+        self.assertEqual(invoice.plan_lookup_key, "reduced-yearly")
+        self.assertEqual(invoice.metadata["type"], "membership")
+        self.assertEqual(invoice.missing, ())
+
+    def test_missing_fields_reported_together(self):
+        """
+        All the missing required fields should be reported at once.
+        """
+        invoice = extract_event_data(
+            "invoice.paid", {"customer": "cus_123", "customer_name": "", "lines": {"data": []}}
+        )
+
+        self.assertEqual(
+            invoice.missing,
+            (
+                "customer_name",
+                "customer_email",
+                "customer_country_code",
+                "customer_invoice_url",
+                "customer_subscription_plan",
+                "plan_lookup_key",
+            ),
+        )
+        self.assertIsNone(extract_event_data("customer.created", {}))
+
+    def test_benchmark_command(self):
+        """
+        The benchmark should run on a generated large invoice.
+        """
+        stdout = io.StringIO()
+        call_command(
+            "benchmark_webhook_extraction", "--lines", "10", "--iterations", "10", stdout=stdout
+        )
+        self.assertIn("extraction spec", stdout.getvalue())
+
+
+class AushaProxyTest(TestCase):
+    """
+    Test case for the Ausha proxy view and its cache.
+    Note: The Ausha API is mocked, no request is sent to Ausha.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.payload = {"data": [{"id": 1, "name": "Episode 1"}]}
+
+    @patch("proxy.utils.http.requests.Session.get")
+    def test_podcasts_are_cached(self, mock_get):
+        """
+        The second request for the same show should be served from the cache.
+        """
+        mock_get.return_value = Mock(status_code=200, json=Mock(return_value=self.payload))
+
+        first = self.client.post(reverse("ausha-proxy"), {"show_id": 44497})
+        second = self.client.post(reverse("ausha-proxy"), {"show_id": 44497})
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first["X-Cache"], "MISS")
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(second.json()["data"], self.payload["data"])
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(
+            StaleWhileRevalidateCache("ausha").stats(),
+            {"hit": 1, "miss": 1, "stale": 0, "fallback": 0},
+        )
+
+    @override_settings(AUSHA_CACHE_TTL=0, AUSHA_CACHE_STALE_TTL=0)
+    @patch("proxy.utils.http.requests.Session.get")
+    def test_last_good_payload_served_on_error(self, mock_get):
+        """
+        If Ausha fails once the cache has expired, the last good payload should be served.
+        """
+        mock_get.return_value = Mock(status_code=200, json=Mock(return_value=self.payload))
+        self.client.post(reverse("ausha-proxy"), {"show_id": 44497})
+
+        mock_get.side_effect = requests.Timeout("Ausha timed out")
+        response = self.client.post(reverse("ausha-proxy"), {"show_id": 44497})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Cache"], "FALLBACK")
+        self.assertEqual(response.json()["data"], self.payload["data"])
+
+    @patch("proxy.utils.http.requests.Session.get", side_effect=requests.Timeout("Ausha timed out"))
+    def test_error_without_cached_payload(self, mock_get):
+        """
+        Without any cached payload, an upstream error should return an error message.
+        """
+        response = self.client.post(reverse("ausha-proxy"), {"show_id": 44497})
+        self.assertEqual(response.status_code, 500)
+
+
+    def test_episodes_read_from_database(self):
+        """
+        Once the show is synchronised, the episodes should be read from the database without calling Ausha.
+        """
+        PodcastEpisode.objects.create(
+            ausha_id=1,
+            show_id=44497,
+            name="Episode 1",
+            created_at="2024-01-01T10:00:00Z",
+            payload={"id": 1, "name": "Episode 1"},
+        )
+
+        with patch("proxy.utils.http.requests.Session.get") as mock_get:
+            response = self.client.post(reverse("ausha-proxy"), {"show_id": 44497})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["data"], [{"id": 1, "name": "Episode 1"}])
+        mock_get.assert_not_called()
+
+    @patch("proxy.utils.http.requests.Session.get")
+    def test_same_shape_from_ausha_and_database(self, mock_get):
+        """
+        The response should have the same shape before and after the synchronisation of the show,
+        and a show not synchronised should not query the database on each request.
+        """
+        mock_get.return_value = Mock(
+            status_code=200,
+            json=Mock(return_value={**self.payload, "links": {"next": None}, "meta": {"total": 1}}),
+        )
+        data = {"show_id": 44497, "fields": "id,name"}
+        from_ausha = self.client.post(reverse("ausha-proxy"), data)
+        with self.assertNumQueries(0):
+            self.client.post(reverse("ausha-proxy"), data)
+
+        PodcastEpisode.objects.create(
+            ausha_id=1,
+            show_id=44497,
+            name="Episode 1",
+            created_at="2024-01-01T10:00:00Z",
+            payload={"id": 1, "name": "Episode 1", "description": "Long text"},
+        )
+        cache.set(podcast_episodes_version_key(44497), time.time())  # Done by sync_ausha_episodes
+        from_database = self.client.post(reverse("ausha-proxy"), data)
+
+        expected = {
+            "data": [{"id": 1, "name": "Episode 1"}],
+            "meta": {"offset": 0, "limit": None, "total": 1},
+        }
+        self.assertEqual(from_ausha.json(), expected)
+        self.assertEqual(from_database.json(), expected)
+        self.assertFalse(from_database.has_header("X-Cache"))
+
+    @patch("proxy.utils.http.requests.Session.get")
+    def test_total_of_ausha_fallback_is_the_available_episodes(self, mock_get):
+        """
+        Before the synchronisation, the total should be the number of episodes of the first Ausha page,
+        so clients do not page past them.
+        """
+        mock_get.return_value = Mock(
+            status_code=200,
+            json=Mock(return_value={**self.payload, "links": {"next": "page=2"}, "meta": {"total": 42}}),
+        )
+
+        response = self.client.post(reverse("ausha-proxy"), {"show_id": 44497, "offset": 1, "limit": 4})
+
+        self.assertEqual(response.json()["meta"], {"offset": 1, "limit": 4, "total": 1})
+
+    def test_limit_offset_and_fields(self):
+        """
+        Only the requested podcasts and fields should be returned, and the variant should be cached.
+        """
+        for i in range(1, 6):
+            PodcastEpisode.objects.create(
+                ausha_id=i,
+                show_id=44497,
+                name=f"Episode {i}",
+                created_at=f"2024-01-0{i}T10:00:00Z",
+                payload={"id": i, "name": f"Episode {i}", "description": "Long text"},
+            )
+        data = {"show_id": 44497, "offset": 1, "limit": 2, "fields": "id,name"}
+
+        response = self.client.post(reverse("ausha-proxy"), data)
+        with self.assertNumQueries(0):
+            cached_response = self.client.post(reverse("ausha-proxy"), data)
+
+        expected = {
+            "data": [{"id": 4, "name": "Episode 4"}, {"id": 3, "name": "Episode 3"}],
+            "meta": {"offset": 1, "limit": 2, "total": 5},
+        }
+        self.assertEqual(response.json(), expected)
+        self.assertEqual(cached_response.json(), expected)
+
+    def test_invalid_trim_params(self):
+        """
+        Unknown fields and invalid limits should be rejected.
+        """
+        response = self.client.post(reverse("ausha-proxy"), {"show_id": 44497, "fields": "id,secret"})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(reverse("ausha-proxy"), {"show_id": 44497, "limit": 1000})
+        self.assertEqual(response.status_code, 400)
+
+    def test_precompressed_variants(self):
+        """
+        The cached variant should be sent in the encoding accepted by the client, without being re-encoded.
+        """
+        PodcastEpisode.objects.create(
+            ausha_id=1,
+            show_id=44497,
+            name="Episode 1",
+            created_at="2024-01-01T10:00:00Z",
+            payload={"id": 1, "name": "Episode 1"},
+        )
+        data = {"show_id": 44497}
+        identity = self.client.get(reverse("ausha-proxy"), data)
+
+        with self.assertNumQueries(0), patch("proxy.utils.compression.compress_string") as mock_compress:
+            gzipped = self.client.get(reverse("ausha-proxy"), data, HTTP_ACCEPT_ENCODING="gzip, deflate")
+            brotli_encoded = self.client.get(
+                reverse("ausha-proxy"), data, HTTP_ACCEPT_ENCODING="gzip;q=0.5, br"
+            )
+        mock_compress.assert_not_called()
+
+        self.assertNotIn("Content-Encoding", identity)
+        self.assertEqual(gzipped["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(gzipped.content), identity.content)
+        self.assertIn("Accept-Encoding", gzipped["Vary"])
+        self.assertNotEqual(gzipped["ETag"], identity["ETag"])
+        self.assertEqual(brotli_encoded["Content-Encoding"], "br")
+        self.assertEqual(brotli.decompress(brotli_encoded.content), identity.content)
+
+    def test_get_sends_caching_headers(self):
+        """
+        GET responses should be cacheable and revalidated with If-None-Match or If-Modified-Since.
+        """
+        PodcastEpisode.objects.create(
+            ausha_id=1,
+            show_id=44497,
+            name="Episode 1",
+            created_at="2024-01-01T10:00:00Z",
+            payload={"id": 1, "name": "Episode 1"},
+        )
+        data = {"show_id": 44497, "limit": 4}
+
+        response = self.client.get(reverse("ausha-proxy"), data)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("public", response["Cache-Control"])
+        self.assertIn("max-age=", response["Cache-Control"])
+        self.assertTrue(response.has_header("Last-Modified"))
+
+        not_modified = self.client.get(
+            reverse("ausha-proxy"), data, HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified["ETag"], response["ETag"])
+
+        not_modified = self.client.get(
+            reverse("ausha-proxy"), data, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        self.assertEqual(not_modified.status_code, 304)
+
+        other_variant = self.client.get(
+            reverse("ausha-proxy"), {"show_id": 44497}, HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(other_variant.status_code, 200)
+
+
+class SyncAushaEpisodesTest(TestCase):
+    """
+    Test case for the sync_ausha_episodes command (Ausha API is mocked).
+    """
+
+    @staticmethod
+    def _page(episode_ids, last_page):
+        return Mock(
+            status_code=200,
+            json=Mock(
+                return_value={
+                    "data": [
+                        {
+                            "id": episode_id,
+                            "name": f"Episode {episode_id}",
+                            "audio_url": f"https://audio.ausha.co/{episode_id}.mp3",
+                            "created_at": f"2024-01-{episode_id:02d}T10:00:00.000000Z",
+                        }
+                        for episode_id in episode_ids
+                    ],
+                    "meta": {"last_page": last_page},
+                }
+            ),
+        )
+
+    @patch("proxy.utils.http.requests.Session.get")
+    def test_full_sync_pages_through_show(self, mock_get):
+        """
+        All the pages should be fetched and the episodes inserted on the first synchronisation.
+        """
+        mock_get.side_effect = [self._page([4, 3], 2), self._page([2, 1], 2)]
+
+        call_command("sync_ausha_episodes", "--show-id", "44497", stdout=io.StringIO())
+
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(
+            list(PodcastEpisode.objects.values_list("ausha_id", flat=True)), [4, 3, 2, 1]
+        )
+
+    @patch("proxy.utils.http.requests.Session.get")
+    def test_incremental_sync_stops_at_watermark(self, mock_get):
+        """
+        Only the episodes newer than the last synchronised one should be fetched.
+        """
+        mock_get.side_effect = [self._page([2, 1], 1)]
+        call_command("sync_ausha_episodes", "--show-id", "44497", stdout=io.StringIO())
+
+        mock_get.side_effect = [self._page([4, 3], 2), self._page([2, 1], 2)]
+        call_command("sync_ausha_episodes", "--show-id", "44497", stdout=io.StringIO())
+
+        self.assertEqual(mock_get.call_count, 3)  # Second page of the second sync is not fetched
+        self.assertEqual(PodcastEpisode.objects.count(), 4)
+        self.assertEqual(PodcastEpisode.objects.first().name, "Episode 4")
+
+
+class StaleWhileRevalidateCacheTest(TestCase):
+    """
+    Test case for the single-flight coalescing of the upstream calls.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.swr_cache = StaleWhileRevalidateCache("test", ttl=60, stale_ttl=60, lock_timeout=2)
+        self.calls = 0
+
+    def _slow_fetch(self):
+        self.calls += 1
+        time.sleep(0.2)
+        return {"data": ["episode"]}
+
+    def test_concurrent_misses_are_coalesced(self):
+        """
+        Threads missing the same key at the same time should trigger a single upstream call.
+        """
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(self.swr_cache.get_or_fetch("show", self._slow_fetch))
+            )
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(len(results), 8)
+        self.assertTrue(all(payload == {"data": ["episode"]} for payload, _ in results))
+
+    def test_wait_for_other_process(self):
+        """
+        If another process holds the lock, the payload it stores should be returned without calling the upstream.
+        """
+        cache.set("test:lock:show", True)
+
+        def other_process():
+            time.sleep(0.2)
+            cache.set("test:payload:show", {"payload": {"data": ["other"]}, "fetched_at": time.time()})
+            cache.delete("test:lock:show")
+
+        threading.Thread(target=other_process).start()
+        payload, status = self.swr_cache.get_or_fetch("show", self._slow_fetch)
+
+        self.assertEqual(payload, {"data": ["other"]})
+        self.assertEqual(status, "MISS")
+        self.assertEqual(self.calls, 0)
+
+    def test_lock_of_another_process_kept(self):
+        """
+        A lock that expired during the upstream call and was taken by another process must not be released.
+        """
+
+        def fetch_outliving_lock():
+            cache.set("test:lock:show", "other-process")  # Lock expired and acquired by another process
+            return {"data": ["episode"]}
+
+        payload, _ = self.swr_cache.get_or_fetch("show", fetch_outliving_lock)
+
+        self.assertEqual(payload, {"data": ["episode"]})
+        self.assertEqual(cache.get("test:lock:show"), "other-process")
+
+    def test_lock_released_atomically_on_redis(self):
+        """
+        On Redis, the lock should be compared and deleted by a single script run on the server.
+        """
+        redis_cache = RedisCache("redis://localhost:6379/0", {})
+        redis_cache._cache = Mock()
+        redis_cache._cache._serializer.dumps.side_effect = lambda value: f"serialized:{value}"
+        client = redis_cache._cache.get_client.return_value
+        client.eval.return_value = 1
+
+        with patch("proxy.utils.cache.caches", {"default": redis_cache}):
+            self.assertTrue(delete_if_equal("test:lock:show", "token"))
+
+        client.eval.assert_called_once_with(
+            COMPARE_AND_DELETE_SCRIPT, 1, ":1:test:lock:show", "serialized:token"
+        )
+
+    def _wait_for_slow_leader(self):
+        """
+        Start a leader thread whose upstream call outlives the lock_timeout of the waiting thread,
+        and return the result of the waiting thread.
+        """
+        swr_cache = StaleWhileRevalidateCache("test", ttl=60, stale_ttl=60, lock_timeout=0.1)
+
+        def slow_leader_fetch():
+            time.sleep(0.5)
+            return {"data": ["leader"]}
+
+        leader = threading.Thread(target=lambda: swr_cache.get_or_fetch("show", slow_leader_fetch))
+        leader.start()
+        time.sleep(0.05)
+        try:
+            return swr_cache.get_or_fetch("show", lambda: {"data": ["waiter"]})
+        finally:
+            leader.join()
+
+    def test_waiter_of_slow_leader_fetches_without_payload(self):
+        """
+        A thread giving up on a slow leader should call the upstream itself if there is no payload.
+        """
+        self.assertEqual(self._wait_for_slow_leader(), ({"data": ["waiter"]}, "MISS"))
+
+    def test_waiter_of_slow_leader_serves_last_good_payload(self):
+        """
+        A thread giving up on a slow leader should serve the last good payload.
+        """
+        cache.set("test:payload:show", {"payload": {"data": ["old"]}, "fetched_at": time.time() - 1000})
+        self.assertEqual(self._wait_for_slow_leader(), ({"data": ["old"]}, "FALLBACK"))
+
+    @override_settings(
+        HTTP_CONNECT_TIMEOUT=3, HTTP_READ_TIMEOUT=10, HTTP_MAX_RETRIES=2, HTTP_RETRY_BACKOFF=0.5
+    )
+    def test_lock_outlives_upstream_call(self):
+        """
+        The lock lifetime derived from the HTTP settings should cover every attempt and backoff.
+        """
+        self.assertEqual(max_request_duration(), 3 * (3 + 10) + 0.5 + 1)
+        self.assertEqual(max_request_duration(read_timeout=5), 3 * (3 + 5) + 0.5 + 1)
+
+    def test_local_cache_refused_at_deploy(self):
+        """
+        The deploy checks should refuse a cache that is not shared between the processes.
+        """
+        local_cache = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+        with override_settings(CACHES=local_cache), self.assertRaises(SystemCheckError):
+            call_command("check", deploy=True, fail_level="ERROR", stdout=io.StringIO())
+
+        shared_cache = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache"}}
+        with override_settings(CACHES=shared_cache):
+            self.assertEqual(check_shared_cache(None), [])
+
+
 class MailchimpProxyTest(TestCase):
     """
     Important: This test case requires a Mailchimp account and a list to be created.
@@ -323,3 +1278,220 @@ class MailchimpProxyTest(TestCase):
         last_name = random.choice(last_names)
 
         return first_name, last_name
+
+
+class HttpSessionTest(TestCase):
+    """
+    Test case for the HTTP session shared by the outbound calls.
+    """
+
+    def test_session_is_shared_and_configured(self):
+        """
+        The same pooled session should be returned, with a default timeout and bounded retries.
+        """
+        session = get_http_session()
+        adapter = session.get_adapter("https://developers.ausha.co")
+
+        self.assertIs(get_http_session(), session)
+        self.assertEqual(adapter.timeout, default_timeout())
+        self.assertEqual(adapter.max_retries.total, settings.HTTP_MAX_RETRIES)
+        self.assertNotIn("POST", adapter.max_retries.allowed_methods)
+
+    @patch("proxy.utils.http.HTTPAdapter.send", return_value=requests.Response())
+    def test_default_timeout_applied(self, mock_send):
+        """
+        Requests sent without a timeout should use the default (connect, read) timeout.
+        """
+        get_http_session().post("https://www.google.com/recaptcha/api/siteverify", data={})
+        self.assertEqual(mock_send.call_args.kwargs["timeout"], default_timeout())
+
+    def test_stripe_configured_at_startup(self):
+        """
+        The Stripe SDK should use the API key, a pooled HTTP client, timeouts and retries of the settings.
+        """
+        client = stripe.default_http_client
+
+        self.assertEqual(stripe.api_key, settings.STRIPE_API_TOKEN)
+        self.assertEqual(stripe.max_network_retries, settings.STRIPE_MAX_NETWORK_RETRIES)
+        self.assertIsInstance(client, stripe.http_client.RequestsClient)
+        self.assertEqual(client._timeout, (settings.HTTP_CONNECT_TIMEOUT, settings.STRIPE_READ_TIMEOUT))
+        self.assertIsNotNone(client._session.get_adapter("https://api.stripe.com"))
+
+
+@override_settings(CIRCUIT_BREAKER_FAILURE_THRESHOLD=3, CIRCUIT_BREAKER_RESET_TIMEOUT=30)
+class CircuitBreakerTest(TestCase):
+    """
+    Test case for the circuit breakers of the upstreams (state shared through the cache).
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    def _fail(self, upstream, error):
+        with self.assertRaises(type(error)):
+            with CircuitBreaker(upstream):
+                raise error
+
+    def test_circuit_opens_after_consecutive_failures(self):
+        """
+        The circuit should open after the threshold of consecutive failures, then fail fast.
+        A success resets the count and client errors are not failures.
+        """
+        self._fail("ausha", requests.ConnectionError("Connection refused"))
+        with CircuitBreaker("ausha"):
+            pass
+        not_found = requests.HTTPError("404 Not Found", response=Mock(status_code=404))
+        for _ in range(3):
+            self._fail("ausha", not_found)
+        self.assertEqual(circuit_breaker_stats()["ausha"]["consecutive_failures"], 0)
+
+        with self.assertLogs(logger, level="ERROR") as logs:
+            for _ in range(3):
+                self._fail("ausha", requests.Timeout("Ausha timed out"))
+        self.assertTrue(any("closed -> open" in message for message in logs.output))
+
+        upstream_call = Mock()
+        with self.assertRaises(CircuitOpenError):
+            with CircuitBreaker("ausha"):
+                upstream_call()
+        upstream_call.assert_not_called()
+
+        stats = circuit_breaker_stats()
+        self.assertEqual(stats["ausha"]["state"], "open")
+        self.assertEqual(stats["ausha"]["opened"], 1)
+        self.assertEqual(stats["ausha"]["rejected"], 1)
+        self.assertEqual(stats["stripe"]["state"], "closed")  # One breaker per upstream
+
+    def test_half_open_probe(self):
+        """
+        Once the reset timeout is over, a single probe should be sent : the circuit is opened again if it
+        fails and closed if it succeeds.
+        """
+        for _ in range(3):
+            self._fail("mailchimp", requests.ConnectionError("Connection refused"))
+
+        later = time.time() + 31
+        with patch("proxy.utils.circuit_breaker.time.time", return_value=later):
+            with CircuitBreaker("mailchimp"):
+                # Other calls fail fast while the probe is sent
+                with self.assertRaises(CircuitOpenError):
+                    CircuitBreaker("mailchimp").before_call()
+            self.assertEqual(circuit_breaker_stats()["mailchimp"]["state"], "closed")
+
+            for _ in range(3):
+                self._fail("mailchimp", requests.ConnectionError("Connection refused"))
+        with patch("proxy.utils.circuit_breaker.time.time", return_value=later + 31):
+            self._fail("mailchimp", requests.ConnectionError("Still down"))
+            self.assertEqual(circuit_breaker_stats()["mailchimp"]["state"], "open")
+
+        self.assertEqual(circuit_breaker_stats()["mailchimp"]["opened"], 3)
+        self.assertEqual(circuit_breaker_stats()["mailchimp"]["closed"], 1)
+
+    @patch("proxy.utils.http.requests.Session.get", side_effect=requests.ConnectionError("Connection refused"))
+    def test_proxy_fails_fast_while_open(self, mock_get):
+        """
+        The proxy views should stop calling an upstream that is down and answer 503 right away.
+        """
+        statuses = [
+            self.client.post(reverse("ausha-proxy"), {"show_id": 44497}).status_code
+            for _ in range(5)
+        ]
+
+        self.assertEqual(statuses, [500, 500, 500, 503, 503])
+        self.assertEqual(mock_get.call_count, 3)
+        response = self.client.post(reverse("ausha-proxy"), {"show_id": 44497})
+        self.assertEqual(int(response["Retry-After"]), 30)
+        self.assertEqual(
+            response.json()["message"], "The service is temporarily unavailable, please try again later."
+        )
+
+    @patch("stripe.http_client.RequestsClient.request")
+    def test_stripe_server_errors_open_the_circuit(self, mock_request):
+        """
+        The Stripe SDK calls should count the 5xx responses (after the retries) and fail fast once open.
+        """
+        mock_request.return_value = ('{"error": {"message": "Server error"}}', 500, {})
+
+        with patch.object(stripe, "max_network_retries", 0):
+            for _ in range(3):
+                with self.assertRaises(stripe.error.APIError):
+                    stripe.Price.list(lookup_keys=["reduced-yearly"])
+            with self.assertRaises(CircuitOpenError):
+                stripe.Price.list(lookup_keys=["reduced-yearly"])
+
+        self.assertEqual(mock_request.call_count, 3)
+        self.assertEqual(circuit_breaker_stats()["stripe"]["state"], "open")
+
+    def test_stats_view(self):
+        url = reverse("circuit-breaker-stats")
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.client.force_login(User.objects.create_user("staff", password="password", is_staff=True))
+        upstreams = self.client.get(url).json()["upstreams"]
+        self.assertEqual(set(upstreams), {"stripe", "mailchimp", "ausha", "recaptcha"})
+        self.assertEqual(upstreams["stripe"]["state"], "closed")
+
+
+class AsyncProxyViewsTest(TestCase):
+    """
+    Test case for the async versions of the proxy views (upstreams are mocked).
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.factory = AsyncRequestFactory()
+
+    @staticmethod
+    def _upstream_response(payload, is_error=False):
+        return Mock(is_error=is_error, json=Mock(return_value=payload), raise_for_status=Mock())
+
+    async def test_concurrent_ausha_requests_are_coalesced(self):
+        """
+        Concurrent requests for a show missing from the cache should wait for a single call to Ausha.
+        """
+        payload = {"data": [{"id": 1, "name": "Episode 1"}]}
+
+        async def slow_get(*args, **kwargs):
+            await asyncio.sleep(0.1)
+            return self._upstream_response(payload)
+
+        client = Mock(get=AsyncMock(side_effect=slow_get))
+        with patch("proxy.utils.ausha.get_async_http_client", return_value=client):
+            responses = await asyncio.gather(
+                *[
+                    AsyncAushaProxy.as_view()(self.factory.get("/api/proxy/ausha/", {"show_id": 44497}))
+                    for _ in range(20)
+                ]
+            )
+
+        self.assertEqual(client.get.await_count, 1)
+        self.assertTrue(all(response.status_code == 200 for response in responses))
+        self.assertEqual(json.loads(responses[-1].content)["data"], payload["data"])
+
+    async def test_mailchimp_subscriber_added(self):
+        """
+        The subscriber should be added with the Mailchimp Marketing API endpoint.
+        """
+        client = Mock(post=AsyncMock(return_value=self._upstream_response({"id": "abc"})))
+        with patch("proxy.utils.helpers.get_async_http_client", return_value=client):
+            response = await AsyncMailchimpProxy.as_view()(
+                self.factory.post("/api/proxy/mailchimp/", {"email": "test@example.com"})
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(client.post.call_args.kwargs["json"]["email_address"], "test@example.com")
+
+    async def test_email_not_sent_if_recaptcha_fails(self):
+        """
+        No email should be sent if Google rejects the reCAPTCHA token.
+        """
+        client = Mock(post=AsyncMock(return_value=self._upstream_response({"success": False})))
+        with patch("proxy.views.get_async_http_client", return_value=client), patch(
+            "proxy.views.sendEmail"
+        ) as mock_send_email:
+            response = await AsyncEmailSender.as_view()(
+                self.factory.post("/api/proxy/email_server/", {"recaptcha_token": "token"})
+            )
+
+        self.assertEqual(response.status_code, 500)
+        mock_send_email.assert_not_called()
@@ -1,12 +1,34 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+# Async views are used when the project is served by an ASGI server (see PROXY_ASYNC_VIEWS in settings)
+if settings.PROXY_ASYNC_VIEWS:
+    AushaProxy = views.AsyncAushaProxy
+    MailchimpProxy = views.AsyncMailchimpProxy
+    EmailSender = views.AsyncEmailSender
+else:
+    AushaProxy = views.AushaProxy
+    MailchimpProxy = views.MailchimpProxy
+    EmailSender = views.EmailSender
+
 urlpatterns = [
-    path("mailchimp/", views.MailchimpProxy.as_view(), name="mailchimp-proxy"),
-    path("ausha/", views.AushaProxy.as_view(), name="ausha-proxy"),
+    path("mailchimp/", MailchimpProxy.as_view(), name="mailchimp-proxy"),
+    path("ausha/", AushaProxy.as_view(), name="ausha-proxy"),
+    path("ausha/stats/", views.AushaCacheStats.as_view(), name="ausha-cache-stats"),
     path(
         "stripe-webhook/", views.StripeWebhook.as_view(), name="stripe-webhook"
     ),  # For membership subscription and event payment
+    path(
+        "stripe-webhook/stats/",
+        views.WebhookTimingStats.as_view(),
+        name="stripe-webhook-stats",
+    ),
+    path(
+        "circuit-breakers/stats/",
+        views.CircuitBreakerStats.as_view(),
+        name="circuit-breaker-stats",
+    ),
     path("get_api_secrets/", views.GetAPISecrets.as_view(), name="get-api-secrets"),
-    path("email_server/", views.EmailSender.as_view(), name="email-server"),
+    path("email_server/", EmailSender.as_view(), name="email-server"),
 ]
@@ -0,0 +1,207 @@
+import os
+import time
+import environ
+import httpx
+from datetime import timezone as dt_timezone
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from Invisibles23.settings import BASE_DIR
+from Invisibles23.logging_config import logger
+from website.models import PodcastEpisode
+from website.utils.view_helpers import (
+    podcast_episodes_cache_key,
+    podcast_episodes_version_key,
+)
+from website.utils.page_cache import invalidate_pages
+from .http import get_async_http_client, get_http_session
+from .circuit_breaker import CircuitBreaker
+
+# Read the environment variables
+env = environ.Env()
+env.read_env(os.path.join(BASE_DIR, ".env"))
+
+AUSHA_API_URL = "https://developers.ausha.co/v1"
+
+# Attributes of an episode that can be requested with the fields parameter of AushaProxy
+PODCAST_FIELDS = (
+    "id",
+    "name",
+    "html_description",
+    "image_url",
+    "audio_url",
+    "duration",
+    "created_at",
+)
+
+# Columns updated when an already stored episode is synchronised again
+EPISODE_UPDATE_FIELDS = [
+    "show_id",
+    "name",
+    "html_description",
+    "image_url",
+    "audio_url",
+    "duration",
+    "created_at",
+    "payload",
+    "synced_at",
+]
+
+
+def fetch_ausha_podcasts(show_id, page=None) -> dict:
+    """
+    Get a page of podcasts of the show from the Ausha API (raises on error or timeout, and
+    CircuitOpenError while the Ausha circuit is open).
+
+    Param
+    ------
+    show_id: int
+        The ID of the Ausha show
+    page: int
+        The page to get (first page if None)
+
+    Return
+    ------
+    The JSON payload of the Ausha API, like {"data": [...], "links": {...}, "meta": {...}}
+    """
+    with CircuitBreaker("ausha"):
+        response = get_http_session().get(
+            f"{AUSHA_API_URL}/shows/{show_id}/podcasts",
+            params={"page": page} if page else None,
+            headers=_ausha_headers(),
+            timeout=(settings.HTTP_CONNECT_TIMEOUT, settings.AUSHA_API_TIMEOUT),
+        )
+        response.raise_for_status()
+    return response.json()
+
+
+async def afetch_ausha_podcasts(show_id, page=None) -> dict:
+    """
+    Async version of fetch_ausha_podcasts, using the shared async HTTP client.
+    """
+    async with CircuitBreaker("ausha"):
+        response = await get_async_http_client().get(
+            f"{AUSHA_API_URL}/shows/{show_id}/podcasts",
+            params={"page": page} if page else None,
+            headers=_ausha_headers(),
+            timeout=httpx.Timeout(settings.AUSHA_API_TIMEOUT, connect=settings.HTTP_CONNECT_TIMEOUT),
+        )
+        response.raise_for_status()
+    return response.json()
+
+
+def sync_ausha_episodes(show_id, full=False) -> int:
+    """
+    Page through the podcasts of the show (most recent first) and upsert them in the PodcastEpisode table.
+    Unless full is True, paging stops at the first episode older than the last synchronised one (watermark).
+
+    Return
+    ------
+    The number of episodes inserted or updated
+    """
+    watermark = None
+    if not full:
+        watermark = PodcastEpisode.objects.filter(show_id=show_id).aggregate(
+            Max("created_at")
+        )["created_at__max"]
+    logger.info(f"Synchronising Ausha episodes of show {show_id} (watermark: {watermark})")
+
+    episodes = {}  # By Ausha ID, pages can overlap if an episode is published during the sync
+    page = 1
+    while True:
+        payload = fetch_ausha_podcasts(show_id, page)
+        reached_watermark = False
+
+        for item in payload.get("data", []):
+            episode = _build_episode(show_id, item)
+            if watermark and episode.created_at <= watermark:
+                reached_watermark = True
+                break
+            episodes[episode.ausha_id] = episode
+
+        if reached_watermark or not _has_next_page(payload, page):
+            break
+        page += 1
+
+    PodcastEpisode.objects.bulk_create(
+        episodes.values(),
+        batch_size=500,
+        update_conflicts=True,
+        unique_fields=["ausha_id"],
+        update_fields=EPISODE_UPDATE_FIELDS,
+    )
+    if episodes:
+        # Pages and proxy variants are served from the cache (see get_cached_podcast_episodes)
+        cache.delete(podcast_episodes_cache_key(show_id))
+        cache.set(podcast_episodes_version_key(show_id), time.time(), timeout=None)
+        invalidate_pages(PodcastEpisode)  # bulk_create sends no post_save signal
+    logger.info(f"{len(episodes)} Ausha episode(s) synchronised for show {show_id}")
+    return len(episodes)
+
+
+def project_podcasts(podcasts, total, offset=0, limit=None, fields=None) -> dict:
+    """
+    Build the proxy payload from a list of podcasts, keeping only the requested fields.
+
+    Param
+    ------
+    podcasts: list
+        The podcasts (Ausha format) already sliced with offset and limit
+    total: int
+        The total number of podcasts of the show
+    fields: list
+        The fields to keep in each podcast (see PODCAST_FIELDS), all fields if None
+
+    Return
+    ------
+    A dict like {"data": [...], "meta": {"offset": 0, "limit": 4, "total": 42}}
+    """
+    if fields:
+        podcasts = [{field: podcast.get(field) for field in fields} for podcast in podcasts]
+
+    return {
+        "data": podcasts,
+        "meta": {"offset": offset, "limit": limit, "total": total},
+    }
+
+
+def _ausha_headers() -> dict:
+    return {
+        "Accept": "application/json",
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {env('AUSHA_API_TOKEN')}",
+    }
+
+
+def _build_episode(show_id, item) -> PodcastEpisode:
+    """
+    Create an (unsaved) PodcastEpisode from an Ausha podcast item.
+    """
+    created_at = parse_datetime(item["created_at"])
+    if timezone.is_naive(created_at):
+        created_at = timezone.make_aware(created_at, dt_timezone.utc)
+
+    return PodcastEpisode(
+        ausha_id=item["id"],
+        show_id=show_id,
+        name=item.get("name") or "",
+        html_description=item.get("html_description") or "",
+        image_url=item.get("image_url") or "",
+        audio_url=item.get("audio_url") or "",
+        duration=item.get("duration"),
+        created_at=created_at,
+        payload=item,
+        synced_at=timezone.now(),  # auto_now is not applied by bulk_create updates
+    )
+
+
+def _has_next_page(payload, page) -> bool:
+    """
+    Check the pagination data of an Ausha API payload.
+    """
+    meta = payload.get("meta") or {}
+    if "last_page" in meta:
+        return page < meta["last_page"]
+    return bool((payload.get("links") or {}).get("next"))
@@ -0,0 +1,466 @@
+import asyncio
+import threading
+import time
+import uuid
+from asgiref.sync import sync_to_async
+from django.core.cache import cache, caches
+from django.core.cache.backends.redis import RedisCache
+from Invisibles23.logging_config import logger
+from Invisibles23.logging_utils import log_debug_info
+
+
+class StaleWhileRevalidateCache:
+    """
+    Cache layer for upstream API payloads (e.g. Ausha podcasts) stored in the shared Django cache.
+
+    Each entry is stored with the time it was fetched and is served according to its age :
+    - age < ttl : the entry is fresh and served directly (HIT)
+    - ttl <= age < ttl + stale_ttl : the entry is served and refreshed in a background thread (STALE)
+    - age >= ttl + stale_ttl or no entry : the upstream is called synchronously (MISS)
+
+    If the upstream fails on a MISS, the last good payload is served instead (FALLBACK).
+
+    Concurrent misses for the same key are coalesced (single-flight) : within a process, one thread
+    calls the upstream and the others wait for its result. Across processes sharing the cache, a lock
+    key is added to the cache and the other processes poll the cache until the payload is stored
+    (or until lock_timeout is reached, then they call the upstream themselves). The lock holds a token
+    of its owner, it is only released by the process which acquired it. Threads waiting longer than
+    lock_timeout for a slow leader serve the last good payload, or call the upstream if there is none.
+
+    Parameters
+    ----------
+    namespace: str
+        Prefix of the cache keys (e.g. "ausha")
+    ttl: int
+        Number of seconds an entry is considered fresh
+    stale_ttl: int
+        Number of seconds a stale entry can still be served while it is refreshed
+    lock_timeout: int
+        Maximum number of seconds to wait for another thread or process fetching the same key, and
+        lifetime of the lock (it must exceed the longest upstream call, see max_request_duration)
+
+    Usage
+    -----
+        `swr_cache = StaleWhileRevalidateCache("ausha", ttl=900, stale_ttl=86400)`
+        `payload, status = swr_cache.get_or_fetch(show_id, lambda: fetch_podcasts(show_id))`
+        `payload, status = await swr_cache.aget_or_fetch(show_id, lambda: afetch_podcasts(show_id))`
+    """
+
+    STATS = ("hit", "miss", "stale", "fallback")
+
+    POLL_INTERVAL = 0.05  # Seconds between two cache reads while another process holds the lock
+
+    # Keys currently refreshed in a background thread (shared by all instances of the process)
+    _refreshing = set()
+    _refreshing_lock = threading.Lock()
+
+    # Upstream calls in progress in this process, by entry key
+    _flights = {}
+    _flights_lock = threading.Lock()
+
+    # Upstream calls in progress in the event loops of this process (async views), by loop and entry key
+    _async_flights = {}
+    # Background refresh tasks of the event loops, referenced until they complete
+    _tasks = set()
+
+    def __init__(self, namespace, ttl=0, stale_ttl=0, lock_timeout=10):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.lock_timeout = lock_timeout
+
+    def get_or_fetch(self, key, fetch) -> tuple:
+        """
+        Return the payload for the given key and the cache status (HIT, MISS, STALE or FALLBACK).
+
+        Param
+        ------
+        key: str
+            The key identifying the payload (e.g. the show ID)
+        fetch: callable
+            Function without arguments returning the upstream payload, it must raise on error
+        """
+        entry = cache.get(self._entry_key(key))
+
+        if entry is not None:
+            age = time.time() - entry["fetched_at"]
+            if age < self.ttl:
+                self._incr("hit")
+                return entry["payload"], "HIT"
+            if age < self.ttl + self.stale_ttl:
+                self._incr("stale")
+                self._revalidate_in_background(key, fetch, entry["fetched_at"])
+                return entry["payload"], "STALE"
+
+        self._incr("miss")
+        try:
+            seen_at = entry["fetched_at"] if entry is not None else 0
+            return self._single_flight(key, fetch, seen_at), "MISS"
+        except Exception as error:
+            if entry is None:
+                raise
+            logger.warning(
+                f"Upstream error for '{self._entry_key(key)}', serving last good payload: {error}"
+            )
+            self._incr("fallback")
+            return entry["payload"], "FALLBACK"
+
+    async def aget_or_fetch(self, key, fetch) -> tuple:
+        """
+        Async version of get_or_fetch, fetch is a function without arguments returning an awaitable.
+        Waiting requests do not block the event loop, the stale entries are refreshed in a task.
+        """
+        entry = await cache.aget(self._entry_key(key))
+
+        if entry is not None:
+            age = time.time() - entry["fetched_at"]
+            if age < self.ttl:
+                await self._aincr("hit")
+                return entry["payload"], "HIT"
+            if age < self.ttl + self.stale_ttl:
+                await self._aincr("stale")
+                self._arevalidate_in_background(key, fetch, entry["fetched_at"])
+                return entry["payload"], "STALE"
+
+        await self._aincr("miss")
+        try:
+            seen_at = entry["fetched_at"] if entry is not None else 0
+            return await self._asingle_flight(key, fetch, seen_at), "MISS"
+        except Exception as error:
+            if entry is None:
+                raise
+            logger.warning(
+                f"Upstream error for '{self._entry_key(key)}', serving last good payload: {error}"
+            )
+            await self._aincr("fallback")
+            return entry["payload"], "FALLBACK"
+
+    def stats(self) -> dict:
+        """
+        Return the hit, miss, stale and fallback counters of the namespace.
+        """
+        counters = cache.get_many([self._stat_key(name) for name in self.STATS])
+        return {name: counters.get(self._stat_key(name), 0) for name in self.STATS}
+
+    def _single_flight(self, key, fetch, seen_at):
+        """
+        Coalesce the concurrent upstream calls of this process for the same key. The first thread
+        (leader) fetches the payload, the others wait for its result or error.
+        """
+        entry_key = self._entry_key(key)
+        with self._flights_lock:
+            flight = self._flights.get(entry_key)
+            is_leader = flight is None
+            if is_leader:
+                flight = _Flight()
+                self._flights[entry_key] = flight
+
+        if not is_leader:
+            log_debug_info(f"Waiting for the upstream call in progress for '{entry_key}'")
+            if not flight.done.wait(self.lock_timeout):
+                return self._after_flight_timeout(key, fetch, seen_at)
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = self._refresh_across_processes(key, fetch, seen_at)
+            return flight.result
+        except Exception as error:
+            flight.error = error
+            raise
+        finally:
+            with self._flights_lock:
+                self._flights.pop(entry_key, None)
+            flight.done.set()
+
+    def _after_flight_timeout(self, key, fetch, seen_at):
+        """
+        A waiting thread gave up on a slow leader : the payload stored meanwhile is returned, or the
+        last good payload (TimeoutError, served as FALLBACK by get_or_fetch), or the upstream is called
+        if there is no payload at all.
+        """
+        entry_key = self._entry_key(key)
+        logger.warning(f"Timed out waiting for the upstream call for '{entry_key}'")
+        entry = cache.get(entry_key)
+        if entry is not None and entry["fetched_at"] > seen_at:
+            return entry["payload"]
+        if entry is not None:
+            raise TimeoutError(f"Timed out waiting for the upstream call for '{entry_key}'")
+        return self._refresh(key, fetch)
+
+    def _refresh_across_processes(self, key, fetch, seen_at, wait=True):
+        """
+        Refresh the entry while holding the cache lock of the key, so a single process calls the upstream.
+        If another process holds the lock, poll the cache until it stores a payload newer than seen_at.
+        Returns None if wait is False and the lock is already held.
+        """
+        entry_key = self._entry_key(key)
+        lock_key = self._lock_key(key)
+        deadline = time.time() + self.lock_timeout
+
+        token = uuid.uuid4().hex
+
+        while True:
+            # add() only succeeds if the key does not exist yet (atomic on shared backends)
+            if cache.add(lock_key, token, timeout=self.lock_timeout):
+                try:
+                    # The payload may have been stored while the lock was acquired
+                    entry = cache.get(entry_key)
+                    if entry is not None and entry["fetched_at"] > seen_at:
+                        return entry["payload"]
+                    return self._refresh(key, fetch)
+                finally:
+                    self._release_lock(lock_key, token)
+
+            if not wait:
+                return None
+
+            time.sleep(self.POLL_INTERVAL)
+            entry = cache.get(entry_key)
+            if entry is not None and entry["fetched_at"] > seen_at:
+                return entry["payload"]
+
+            if time.time() >= deadline:
+                logger.warning(
+                    f"Timed out waiting for the lock of '{entry_key}', calling the upstream without it"
+                )
+                return self._refresh(key, fetch)
+
+    def _release_lock(self, lock_key, token) -> None:
+        """
+        Delete the lock if it is still owned by the caller. If the upstream call outlived the lock,
+        another process may hold it now and its lock must be kept (see delete_if_equal).
+        """
+        if not delete_if_equal(lock_key, token):
+            logger.warning(f"Lock '{lock_key}' expired before the upstream call completed")
+
+    def _refresh(self, key, fetch):
+        """
+        Call the upstream and store the payload with its fetch time. The entry never expires
+        from the cache so it can be used as last good payload.
+        """
+        payload = fetch()
+        cache.set(
+            self._entry_key(key),
+            {"payload": payload, "fetched_at": time.time()},
+            timeout=None,
+        )
+        return payload
+
+    def _revalidate_in_background(self, key, fetch, seen_at) -> None:
+        """
+        Refresh the entry in a daemon thread, unless a refresh of the same key is already running.
+        """
+        entry_key = self._entry_key(key)
+        with self._refreshing_lock:
+            if entry_key in self._refreshing:
+                return
+            self._refreshing.add(entry_key)
+
+        def revalidate():
+            try:
+                # Skip the refresh if another process is already refreshing the entry
+                if self._refresh_across_processes(key, fetch, seen_at, wait=False) is not None:
+                    logger.info(f"Background refresh of '{entry_key}' completed")
+            except Exception as error:
+                logger.warning(f"Background refresh of '{entry_key}' failed: {error}")
+            finally:
+                with self._refreshing_lock:
+                    self._refreshing.discard(entry_key)
+
+        threading.Thread(target=revalidate, daemon=True).start()
+
+    async def _asingle_flight(self, key, fetch, seen_at):
+        """
+        Async version of _single_flight : the first task of the event loop fetches the payload,
+        the others await the same future.
+        """
+        loop = asyncio.get_running_loop()
+        flight_key = (loop, self._entry_key(key))
+        flight = self._async_flights.get(flight_key)
+
+        if flight is not None:
+            log_debug_info(f"Waiting for the upstream call in progress for '{flight_key[1]}'")
+            try:
+                return await asyncio.wait_for(asyncio.shield(flight), self.lock_timeout)
+            except asyncio.TimeoutError:
+                return await self._aafter_flight_timeout(key, fetch, seen_at)
+
+        flight = loop.create_future()
+        self._async_flights[flight_key] = flight
+        try:
+            result = await self._arefresh_across_processes(key, fetch, seen_at)
+            flight.set_result(result)
+            return result
+        except Exception as error:
+            flight.set_exception(error)
+            flight.exception()  # Retrieved, asyncio must not log it if no other task was waiting
+            raise
+        finally:
+            self._async_flights.pop(flight_key, None)
+            if not flight.done():
+                flight.cancel()  # The leader was cancelled (e.g. client disconnected)
+
+    async def _aafter_flight_timeout(self, key, fetch, seen_at):
+        """
+        Async version of _after_flight_timeout.
+        """
+        entry_key = self._entry_key(key)
+        logger.warning(f"Timed out waiting for the upstream call for '{entry_key}'")
+        entry = await cache.aget(entry_key)
+        if entry is not None and entry["fetched_at"] > seen_at:
+            return entry["payload"]
+        if entry is not None:
+            raise TimeoutError(f"Timed out waiting for the upstream call for '{entry_key}'")
+        return await self._arefresh(key, fetch)
+
+    async def _arefresh_across_processes(self, key, fetch, seen_at, wait=True):
+        """
+        Async version of _refresh_across_processes.
+        """
+        entry_key = self._entry_key(key)
+        lock_key = self._lock_key(key)
+        deadline = time.time() + self.lock_timeout
+
+        token = uuid.uuid4().hex
+
+        while True:
+            if await cache.aadd(lock_key, token, timeout=self.lock_timeout):
+                try:
+                    entry = await cache.aget(entry_key)
+                    if entry is not None and entry["fetched_at"] > seen_at:
+                        return entry["payload"]
+                    return await self._arefresh(key, fetch)
+                finally:
+                    await self._arelease_lock(lock_key, token)
+
+            if not wait:
+                return None
+
+            await asyncio.sleep(self.POLL_INTERVAL)
+            entry = await cache.aget(entry_key)
+            if entry is not None and entry["fetched_at"] > seen_at:
+                return entry["payload"]
+
+            if time.time() >= deadline:
+                logger.warning(
+                    f"Timed out waiting for the lock of '{entry_key}', calling the upstream without it"
+                )
+                return await self._arefresh(key, fetch)
+
+    async def _arelease_lock(self, lock_key, token) -> None:
+        if not await sync_to_async(delete_if_equal)(lock_key, token):
+            logger.warning(f"Lock '{lock_key}' expired before the upstream call completed")
+
+    async def _arefresh(self, key, fetch):
+        payload = await fetch()
+        await cache.aset(
+            self._entry_key(key),
+            {"payload": payload, "fetched_at": time.time()},
+            timeout=None,
+        )
+        return payload
+
+    def _arevalidate_in_background(self, key, fetch, seen_at) -> None:
+        """
+        Refresh the entry in a task of the running event loop, unless a refresh of the same key is already running.
+        """
+        entry_key = self._entry_key(key)
+        with self._refreshing_lock:
+            if entry_key in self._refreshing:
+                return
+            self._refreshing.add(entry_key)
+
+        async def revalidate():
+            try:
+                if await self._arefresh_across_processes(key, fetch, seen_at, wait=False) is not None:
+                    logger.info(f"Background refresh of '{entry_key}' completed")
+            except Exception as error:
+                logger.warning(f"Background refresh of '{entry_key}' failed: {error}")
+            finally:
+                with self._refreshing_lock:
+                    self._refreshing.discard(entry_key)
+
+        task = asyncio.get_running_loop().create_task(revalidate())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _aincr(self, name) -> None:
+        await sync_to_async(self._incr)(name)
+
+    def _incr(self, name) -> None:
+        incr_counter(self._stat_key(name))
+
+    def _entry_key(self, key) -> str:
+        return f"{self.namespace}:payload:{key}"
+
+    def _stat_key(self, name) -> str:
+        return f"{self.namespace}:stats:{name}"
+
+    def _lock_key(self, key) -> str:
+        return f"{self.namespace}:lock:{key}"
+
+
+def incr_counter(key) -> int:
+    """
+    Increment a counter of the default cache shared by the processes (created if missing, never expires).
+
+    Returns
+    -------
+    int
+        The new value of the counter
+    """
+    # add() is a no-op if the counter already exists, incr() is atomic on shared backends
+    cache.add(key, 0, timeout=None)
+    try:
+        return cache.incr(key)
+    except ValueError:  # Evicted between add() and incr()
+        cache.set(key, 1, timeout=None)
+        return 1
+
+
+# Deletes KEYS[1] only if it holds ARGV[1], run on the Redis server (atomic)
+COMPARE_AND_DELETE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+def delete_if_equal(key, value) -> bool:
+    """
+    Delete a key of the default cache only if it still holds the given value (e.g. the token of a lock).
+
+    Atomic on Redis (Lua script). Django has no compare-and-delete for the other backends, a get
+    followed by a delete is used : if the key expires and is set again by another process between
+    them, the new value is deleted (a lock would then be shared by two processes for one upstream call).
+
+    Returns
+    -------
+    bool
+        True if the key was deleted
+    """
+    backend = caches["default"]
+    if isinstance(backend, RedisCache):
+        cache_key = backend.make_and_validate_key(key)
+        client = backend._cache.get_client(cache_key, write=True)
+        # Values are stored serialized by the Redis client of Django, the compared value too
+        serialized = backend._cache._serializer.dumps(value)
+        return bool(client.eval(COMPARE_AND_DELETE_SCRIPT, 1, cache_key, serialized))
+
+    if backend.get(key) == value:
+        return bool(backend.delete(key))
+    return False
+
+
+class _Flight:
+    """
+    Upstream call in progress, shared by the leader thread and the threads waiting for its result.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
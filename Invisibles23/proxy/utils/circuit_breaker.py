@@ -0,0 +1,266 @@
+import math
+import time
+import httpx
+import requests
+import stripe
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse
+from mailchimp_marketing.api_client import ApiClientError
+from Invisibles23.logging_config import logger
+from .cache import incr_counter
+
+# Upstreams protected by a circuit breaker (names of the breakers)
+UPSTREAMS = ("stripe", "mailchimp", "ausha", "recaptcha")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Counters of each breaker, see circuit_breaker_stats
+STATS = ("success", "failure", "rejected", "opened", "closed")
+
+# Errors raised when an upstream can not be reached or answers with an error
+UPSTREAM_ERRORS = (
+    requests.RequestException,
+    httpx.HTTPError,
+    stripe.error.StripeError,
+    ApiClientError,
+    OSError,  # Timeouts and connection errors of the SDKs and SMTP
+)
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling an upstream while its circuit is open.
+    """
+
+    def __init__(self, upstream, retry_in):
+        self.upstream = upstream
+        self.retry_in = retry_in
+        super().__init__(f"{upstream} is unavailable, calls are suspended for {retry_in:.0f}s")
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker of an upstream (e.g. Stripe), its state is stored in the shared cache so every
+    worker stops calling an upstream that is down :
+    - closed : calls are sent, the consecutive failures are counted
+    - open : after CIRCUIT_BREAKER_FAILURE_THRESHOLD consecutive failures, calls fail fast with
+      CircuitOpenError for CIRCUIT_BREAKER_RESET_TIMEOUT seconds instead of waiting for a timeout
+    - half open : once the timeout is over, a single call (probe) is sent. The circuit is closed if
+      it succeeds and opened again if it fails, the other calls still fail fast meanwhile.
+
+    Only the upstream errors count as failures (network errors, timeouts, 5xx and 429 responses),
+    not the client errors (e.g. 400 for a member already subscribed). A call can also be marked as
+    failed without exception (see fail). Only shared between processes if the cache is (CACHE_URL).
+
+    Usage
+    -----
+        `with CircuitBreaker("ausha"):`
+        `    response = get_http_session().get(url)`
+        `    response.raise_for_status()`
+
+        `async with CircuitBreaker("recaptcha"):`
+        `    response = await get_async_http_client().post(url, data=data)`
+    """
+
+    def __init__(self, upstream):
+        self.upstream = upstream
+        self.threshold = settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD
+        self.reset_timeout = settings.CIRCUIT_BREAKER_RESET_TIMEOUT
+        self.probing = False
+        self.failures = 0
+        self.failure_reason = None
+
+    def __enter__(self):
+        self.before_call()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.after_call(exc_value)
+        return False
+
+    async def __aenter__(self):
+        await sync_to_async(self.before_call)()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await sync_to_async(self.after_call)(exc_value)
+        return False
+
+    def fail(self, reason) -> None:
+        """
+        Mark the call as failed without exception (e.g. 5xx response returned by a client).
+        """
+        self.failure_reason = reason
+
+    def before_call(self) -> None:
+        """
+        Raise CircuitOpenError if the circuit is open, or half open and another call is probing.
+        """
+        keys = cache.get_many([self._key("opened_until"), self._key("failures")])
+        opened_until = keys.get(self._key("opened_until"))
+        self.failures = keys.get(self._key("failures"), 0)
+        if opened_until is None:
+            return
+
+        now = time.time()
+        # add() only succeeds for one worker, the probe (it expires if the probe never returns)
+        if now >= opened_until and cache.add(self._key("probe"), 1, timeout=self.reset_timeout):
+            self.probing = True
+            self._log_transition(OPEN, HALF_OPEN, "probing the upstream")
+            return
+
+        self._incr("rejected")
+        raise CircuitOpenError(self.upstream, max(opened_until - now, 0))
+
+    def after_call(self, error=None) -> None:
+        """
+        Record the result of the call, the error raised by the call if any.
+        """
+        if isinstance(error, CircuitOpenError):
+            return
+        if error is not None and is_upstream_failure(error):
+            self.failure_reason = str(error)
+
+        if self.failure_reason is None:
+            self._record_success()
+        else:
+            self._record_failure()
+
+    def _record_success(self) -> None:
+        self._incr("success")
+        if self.probing:
+            cache.delete_many(
+                [self._key("opened_until"), self._key("failures"), self._key("probe")]
+            )
+            self._incr("closed")
+            self._log_transition(HALF_OPEN, CLOSED, "probe succeeded")
+        elif self.failures:
+            cache.delete(self._key("failures"))  # Only consecutive failures open the circuit
+
+    def _record_failure(self) -> None:
+        self._incr("failure")
+        logger.warning(f"[CIRCUIT] {self.upstream} call failed: {self.failure_reason}")
+        opened_until = time.time() + self.reset_timeout
+
+        if self.probing:
+            cache.set(self._key("opened_until"), opened_until, timeout=None)
+            cache.delete(self._key("probe"))
+            self._incr("opened")
+            self._log_transition(HALF_OPEN, OPEN, f"probe failed: {self.failure_reason}")
+            return
+
+        failures = incr_counter(self._key("failures"))
+        # add() only succeeds for the first worker reaching the threshold
+        if failures >= self.threshold and cache.add(
+            self._key("opened_until"), opened_until, timeout=None
+        ):
+            self._incr("opened")
+            self._log_transition(
+                CLOSED, OPEN, f"{failures} consecutive failures, last: {self.failure_reason}"
+            )
+
+    def _log_transition(self, previous, state, reason) -> None:
+        log = logger.info if state == CLOSED else logger.warning if state == HALF_OPEN else logger.error
+        log(
+            f"[CIRCUIT] upstream={self.upstream} {previous} -> {state} ({reason})",
+            extra={
+                "circuit_breaker": {
+                    "upstream": self.upstream,
+                    "previous": previous,
+                    "state": state,
+                    "reason": reason,
+                }
+            },
+        )
+
+    def _incr(self, name) -> None:
+        incr_counter(self._key(f"stats:{name}"))
+
+    def _key(self, name) -> str:
+        return f"circuit:{self.upstream}:{name}"
+
+
+def is_upstream_failure(error) -> bool:
+    """
+    Return True if the error means that the upstream is unavailable (network error, timeout, 5xx or
+    429 response), False for the other errors (e.g. invalid request).
+    """
+    if not isinstance(error, UPSTREAM_ERRORS):
+        return False
+    status = _status_code(error)
+    return status is None or status >= 500 or status == 429
+
+
+def circuit_open_response(error) -> JsonResponse:
+    """
+    Response of the proxy views while the circuit of their upstream is open (the frontend displays
+    its error message), clients are told when to retry. The state of the breaker is only logged.
+    """
+    logger.warning(f"[CIRCUIT] Call rejected: {error}")
+    response = JsonResponse(
+        {
+            "message": "The service is temporarily unavailable, please try again later.",
+        },
+        status=503,
+    )
+    response["Retry-After"] = str(max(math.ceil(error.retry_in), 1))
+    return response
+
+
+def circuit_breaker_stats() -> dict:
+    """
+    Return the state and counters of the breaker of each upstream.
+
+    Return
+    ------
+    A dict like {"stripe": {"state": "closed", "consecutive_failures": 0, "success": 12, ...}, ...}
+    """
+    keys = [
+        f"circuit:{upstream}:{name}"
+        for upstream in UPSTREAMS
+        for name in ["opened_until", "failures", *(f"stats:{stat}" for stat in STATS)]
+    ]
+    values = cache.get_many(keys)
+    now = time.time()
+
+    stats = {}
+    for upstream in UPSTREAMS:
+        opened_until = values.get(f"circuit:{upstream}:opened_until")
+        if opened_until is None:
+            state = CLOSED
+        else:
+            state = OPEN if now < opened_until else HALF_OPEN
+        stats[upstream] = {
+            "state": state,
+            "consecutive_failures": values.get(f"circuit:{upstream}:failures", 0),
+            **{stat: values.get(f"circuit:{upstream}:stats:{stat}", 0) for stat in STATS},
+        }
+    return stats
+
+
+def reset_circuit_breakers() -> None:
+    """
+    Close every circuit and clear the counters.
+    """
+    cache.delete_many(
+        [
+            f"circuit:{upstream}:{name}"
+            for upstream in UPSTREAMS
+            for name in ["opened_until", "failures", "probe", *(f"stats:{stat}" for stat in STATS)]
+        ]
+    )
+
+
+def _status_code(error):
+    # Stripe (http_status), Mailchimp (status_code), requests and httpx (response)
+    for attribute in ("http_status", "status_code"):
+        status = getattr(error, attribute, None)
+        if isinstance(status, int):
+            return status
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None)
+    return status if isinstance(status, int) else None
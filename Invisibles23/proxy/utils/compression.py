@@ -0,0 +1,80 @@
+import hashlib
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional, gzip is always available
+    brotli = None
+
+# Encodings by order of preference when the client accepts several of them
+PREFERRED_ENCODINGS = ("br", "gzip")
+
+
+def encode_json_payload(payload) -> dict:
+    """
+    Serialize the payload once and compress it with every supported encoding, so the variants can be
+    cached and sent as is (see encoded_json_response).
+
+    Return
+    ------
+    A dict like {"bodies": {"identity": b"...", "gzip": b"...", "br": b"..."}, "etag": '"<md5>"'}
+    """
+    body = json.dumps(payload, cls=DjangoJSONEncoder).encode()
+    bodies = {"identity": body, "gzip": compress_string(body)}
+    if brotli is not None:
+        bodies["br"] = brotli.compress(body, mode=brotli.MODE_TEXT)
+
+    return {"bodies": bodies, "etag": f'"{hashlib.md5(body).hexdigest()}"'}
+
+
+def select_encoding(accept_encoding, available) -> str:
+    """
+    Return the preferred encoding of the available ones accepted by the client ("identity" if none).
+
+    Param
+    ------
+    accept_encoding: str
+        The Accept-Encoding header of the request (e.g. "gzip, deflate, br;q=0.9")
+    available: iterable
+        The encodings of the cached variants
+    """
+    accepted = set()
+    for item in (accept_encoding or "").split(","):
+        coding, *params = item.split(";")
+        quality = 1.0
+        for param in params:
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0
+        if quality > 0:  # q=0 means the encoding is refused
+            accepted.add(coding.strip().lower())
+
+    for encoding in PREFERRED_ENCODINGS:
+        if encoding in available and (encoding in accepted or "*" in accepted):
+            return encoding
+    return "identity"
+
+
+def encoded_json_response(request, encoded, status=200) -> HttpResponse:
+    """
+    Build a JSON response from the pre-compressed variants of encode_json_payload, in the encoding
+    negotiated with the Accept-Encoding header of the request. The ETag differs for each encoding.
+    """
+    bodies = encoded["bodies"]
+    encoding = select_encoding(request.headers.get("Accept-Encoding"), bodies)
+
+    response = HttpResponse(bodies[encoding], content_type="application/json", status=status)
+    patch_vary_headers(response, ("Accept-Encoding",))
+    if encoding == "identity":
+        response["ETag"] = encoded["etag"]
+    else:
+        response["Content-Encoding"] = encoding
+        response["ETag"] = f'{encoded["etag"][:-1]}-{encoding}"'
+    return response
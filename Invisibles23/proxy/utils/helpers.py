@@ -10,6 +10,8 @@ from mailchimp_marketing.api_client import ApiClientError
 from django.http import JsonResponse
 from django.conf import settings
 from datetime import datetime
+from .http import get_async_http_client
+from .circuit_breaker import CircuitBreaker, CircuitOpenError, circuit_open_response
 
 # Read the environment variables
 env = environ.Env()
@@ -122,8 +124,15 @@ def mailchimp_add_subscriber(
 
     try:
         client = MailchimpMarketing.Client()
-        client.set_config({"api_key": mailchimp_api_key, "server": server_prefix})
-        response = client.lists.add_list_member(list_id, member_info)
+        client.set_config(
+            {
+                "api_key": mailchimp_api_key,
+                "server": server_prefix,
+                "timeout": (settings.HTTP_CONNECT_TIMEOUT, settings.HTTP_READ_TIMEOUT),
+            }
+        )
+        with CircuitBreaker("mailchimp"):
+            response = client.lists.add_list_member(list_id, member_info)
         logger.info(f"Mailchimp response: {response}")
 
         return JsonResponse(
@@ -141,6 +150,51 @@ def mailchimp_add_subscriber(
             },
             status=error.status_code,
         )
+    except CircuitOpenError as error:
+        return circuit_open_response(error)
+
+
+async def amailchimp_add_subscriber(
+    mailchimp_api_key, server_prefix, list_id, member_info
+) -> JsonResponse:
+    """
+    Async version of mailchimp_add_subscriber. The Mailchimp SDK is synchronous, so the member is
+    added with the Marketing API endpoint (same request as the SDK) through the shared async HTTP client.
+
+    Parameters and Returns: see mailchimp_add_subscriber
+    """
+    logger.info("Adding subscriber to Mailchimp list...")
+
+    try:
+        async with CircuitBreaker("mailchimp") as breaker:
+            response = await get_async_http_client().post(
+                f"https://{server_prefix}.api.mailchimp.com/3.0/lists/{list_id}/members",
+                json=member_info,
+                auth=("anystring", mailchimp_api_key),  # Basic auth, the user name is ignored by Mailchimp
+            )
+            if response.is_error and (response.status_code >= 500 or response.status_code == 429):
+                breaker.fail(f"HTTP {response.status_code} response")
+    except CircuitOpenError as error:
+        return circuit_open_response(error)
+
+    if response.is_error:
+        logger.error(f"An exception occurred: {response.text}")
+
+        return JsonResponse(
+            {
+                "message": f"An error occurred: {response.text}",
+            },
+            status=response.status_code,
+        )
+
+    logger.info(f"Mailchimp response: {response.json()}")
+
+    return JsonResponse(
+        {
+            "message": "You have successfully subscribed to our mailing list.",
+        },
+        status=200,
+    )
 
 
 def format_birthdate_for_mailchimp(birthdate) -> str:
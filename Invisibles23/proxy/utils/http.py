@@ -0,0 +1,134 @@
+import asyncio
+import threading
+import weakref
+import httpx
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Module-level session shared by the proxy views (one per process, created on first use)
+_session = None
+_session_lock = threading.Lock()
+
+# Async clients of the async proxy views, one per event loop (a single loop per ASGI worker)
+_async_clients = weakref.WeakKeyDictionary()
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """
+    HTTP adapter applying a default (connect, read) timeout to the requests sent without one,
+    so a stalled upstream can not block a worker indefinitely.
+    """
+
+    def __init__(self, *args, timeout=None, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().send(request, **kwargs)
+
+
+def get_http_session() -> requests.Session:
+    """
+    Return the HTTP session shared by all outbound calls of the process (Ausha, reCAPTCHA, ...).
+
+    Connections are kept alive in a pool per host (see HTTP_POOL_MAXSIZE in settings) and each request
+    has a default timeout (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT). Failed connections, as well as
+    idempotent requests answered with 429 or 5xx, are retried HTTP_MAX_RETRIES times with an exponential
+    backoff (HTTP_RETRY_BACKOFF). POST requests are only retried if the connection could not be opened.
+
+    Usage
+    -----
+        `response = get_http_session().get(url, params=params, timeout=10)`
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """
+    Return the async HTTP client shared by the async proxy views running in the current event loop.
+
+    Like the sync session, connections are kept alive in a pool (HTTP_ASYNC_MAX_CONNECTIONS in total,
+    HTTP_POOL_MAXSIZE idle ones) and the same default timeouts apply. Only the connections that could not
+    be opened are retried (HTTP_MAX_RETRIES), so POST requests are never sent twice.
+
+    Usage
+    -----
+        `response = await get_async_http_client().get(url, params=params)`
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _build_async_client()
+        _async_clients[loop] = client
+    return client
+
+
+def default_timeout() -> tuple:
+    """
+    Return the default (connect, read) timeout of the outbound calls.
+    """
+    return (settings.HTTP_CONNECT_TIMEOUT, settings.HTTP_READ_TIMEOUT)
+
+
+def max_request_duration(read_timeout=None) -> float:
+    """
+    Return an upper bound of the seconds an outbound call can take with its retries (HTTP_MAX_RETRIES),
+    e.g. to keep a lock while the upstream is called.
+
+    Param
+    ------
+    read_timeout: float
+        The read timeout of the call, HTTP_READ_TIMEOUT if None
+    """
+    read_timeout = settings.HTTP_READ_TIMEOUT if read_timeout is None else read_timeout
+    attempts = settings.HTTP_MAX_RETRIES + 1
+    backoff = sum(settings.HTTP_RETRY_BACKOFF * 2**retry for retry in range(settings.HTTP_MAX_RETRIES))
+    return attempts * (settings.HTTP_CONNECT_TIMEOUT + read_timeout) + backoff
+
+
+def _build_session() -> requests.Session:
+    retry = Retry(
+        total=settings.HTTP_MAX_RETRIES,
+        connect=settings.HTTP_MAX_RETRIES,
+        read=settings.HTTP_MAX_RETRIES,
+        status=settings.HTTP_MAX_RETRIES,
+        backoff_factor=settings.HTTP_RETRY_BACKOFF,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,  # Idempotent methods only
+        respect_retry_after_header=True,
+        raise_on_status=False,  # The last response is returned, callers use raise_for_status()
+    )
+    adapter = TimeoutHTTPAdapter(
+        timeout=default_timeout(),
+        max_retries=retry,
+        pool_connections=settings.HTTP_POOL_CONNECTIONS,
+        pool_maxsize=settings.HTTP_POOL_MAXSIZE,
+    )
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _build_async_client() -> httpx.AsyncClient:
+    transport = httpx.AsyncHTTPTransport(
+        retries=settings.HTTP_MAX_RETRIES,
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_ASYNC_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_POOL_MAXSIZE,
+        ),
+    )
+    return httpx.AsyncClient(
+        transport=transport,
+        timeout=httpx.Timeout(settings.HTTP_READ_TIMEOUT, connect=settings.HTTP_CONNECT_TIMEOUT),
+    )
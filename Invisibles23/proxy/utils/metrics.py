@@ -0,0 +1,253 @@
+import bisect
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from django.conf import settings
+from django.core.cache import cache
+from Invisibles23.logging_config import logger
+
+# Upper bounds of the histogram buckets in milliseconds (log scale, +25% per bucket, 0.1 ms to ~2 min)
+BUCKET_BOUNDS = tuple(round(0.1 * 1.25**i, 3) for i in range(64))
+
+# The histograms of each process (web workers and webhook worker) are published in a slot of the cache,
+# claimed with add() so two processes never share one (see _store_in_slot)
+MAX_PROCESSES = 64
+PROCESS_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+PERCENTILES = (50, 95, 99)
+
+
+class LatencyHistogram:
+    """
+    Histogram of durations with fixed log scale buckets (see BUCKET_BOUNDS). The memory used does not
+    depend on the number of observations, and histograms of several processes can be merged.
+    Percentiles are interpolated in their bucket (precision of about 25%).
+    """
+
+    def __init__(self, counts=None, total=0.0, maximum=0.0):
+        self.counts = list(counts) if counts else [0] * (len(BUCKET_BOUNDS) + 1)
+        self.total = total
+        self.maximum = maximum
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def observe(self, duration_ms) -> None:
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS, duration_ms)] += 1
+        self.total += duration_ms
+        self.maximum = max(self.maximum, duration_ms)
+
+    def merge(self, other) -> None:
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.total += other.total
+        self.maximum = max(self.maximum, other.maximum)
+
+    def percentile(self, percent) -> float:
+        """
+        Return the duration in milliseconds below which the given percent of the observations fall.
+        """
+        count = self.count
+        if not count:
+            return 0.0
+
+        rank = percent / 100 * count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = BUCKET_BOUNDS[index - 1] if index else 0.0
+                upper = BUCKET_BOUNDS[index] if index < len(BUCKET_BOUNDS) else self.maximum
+                value = lower + (upper - lower) * (rank - seen) / bucket_count
+                return round(min(value, self.maximum), 2)
+            seen += bucket_count
+        return round(self.maximum, 2)
+
+    def summary(self) -> dict:
+        count = self.count
+        return {
+            "count": count,
+            "mean_ms": round(self.total / count, 2) if count else 0.0,
+            **{f"p{percent}_ms": self.percentile(percent) for percent in PERCENTILES},
+            "max_ms": round(self.maximum, 2),
+        }
+
+    def to_dict(self) -> dict:
+        return {"counts": self.counts, "total": self.total, "maximum": self.maximum}
+
+
+class StageTimer:
+    """
+    Time the stages of a Stripe webhook handler. Each stage is added to the histograms of the process
+    (see stage_timing_summary) and the timings are logged together, as structured fields, when the
+    timer exits.
+
+    Parameters
+    ----------
+    handler: str
+        The name of the handler (e.g. "membership"), prefix of the histograms
+    **fields:
+        Fields added to the log record (e.g. event_id)
+
+    Usage
+    -----
+        `with StageTimer("membership", event_id=event["id"]) as timer:`
+        `    with timer.stage("add_member_to_database"):`
+        `        self._add_member_to_database()`
+    """
+
+    def __init__(self, handler, **fields):
+        self.handler = handler
+        self.fields = fields
+        self.timings = {}
+        self.failed_stage = None
+        self.started_at = None
+
+    def __enter__(self):
+        self.started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        total_ms = (time.perf_counter() - self.started_at) * 1000
+        record_stage(self.handler, "total", total_ms)
+
+        stages = " ".join(f"{stage}_ms={duration:.1f}" for stage, duration in self.timings.items())
+        logger.info(
+            f"[TIMING] handler={self.handler} total_ms={total_ms:.1f} {stages}"
+            f"{f' failed_stage={self.failed_stage}' if self.failed_stage else ''}",
+            extra={
+                "webhook_timing": {
+                    "handler": self.handler,
+                    "total_ms": round(total_ms, 2),
+                    "stages_ms": {stage: round(duration, 2) for stage, duration in self.timings.items()},
+                    "failed_stage": self.failed_stage,
+                    **self.fields,
+                }
+            },
+        )
+        publish_stage_timings()
+        return False
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.failed_stage = name
+            raise
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            self.timings[name] = duration_ms
+            record_stage(self.handler, name, duration_ms)
+
+
+# Histograms of the process by "<handler>.<stage>"
+_histograms = {}
+_histograms_lock = threading.Lock()
+_published_at = 0.0
+# Slot of the cache where this process publishes its histograms
+_slot = None
+_publish_lock = threading.Lock()
+
+
+def record_stage(handler, stage, duration_ms) -> None:
+    """
+    Add a duration to the histogram of the stage in this process.
+    """
+    with _histograms_lock:
+        histogram = _histograms.setdefault(f"{handler}.{stage}", LatencyHistogram())
+        histogram.observe(duration_ms)
+
+
+def publish_stage_timings(force=False) -> None:
+    """
+    Store the histograms of this process in the cache, so the summary view (served by a web process)
+    can merge them with those of the webhook worker. Published at most every
+    WEBHOOK_TIMINGS_PUBLISH_INTERVAL seconds unless forced (e.g. by the webhook worker when it goes
+    idle or exits). Only shared between processes if the cache is (CACHE_URL).
+    """
+    global _published_at
+    now = time.monotonic()
+    if not force and now - _published_at < settings.WEBHOOK_TIMINGS_PUBLISH_INTERVAL:
+        return
+    _published_at = now
+
+    with _histograms_lock:
+        snapshot = {name: histogram.to_dict() for name, histogram in _histograms.items()}
+
+    try:
+        with _publish_lock:
+            if not _store_in_slot({"process": PROCESS_ID, "histograms": snapshot}):
+                logger.warning(f"No free slot to publish the webhook timings ({MAX_PROCESSES} processes)")
+    except Exception as error:  # Timings must never break the webhook
+        logger.warning(f"Could not publish the webhook timings: {error}")
+
+
+def published_stage_timings() -> dict:
+    """
+    Merge the histograms published by every process (the expired slots of restarted workers are missing).
+
+    Return
+    ------
+    A dict of LatencyHistogram by "<handler>.<stage>"
+    """
+    records = cache.get_many([_slot_key(index) for index in range(MAX_PROCESSES)])
+
+    merged = {}
+    for record in records.values():
+        for name, data in record["histograms"].items():
+            merged.setdefault(name, LatencyHistogram()).merge(LatencyHistogram(**data))
+    return merged
+
+
+def stage_timing_summary() -> dict:
+    """
+    Merge the histograms published by every process and return the percentiles of each stage.
+
+    Return
+    ------
+    A dict like {"membership.add_member_to_database": {"count": 12, "p50_ms": 8.1, ...}, ...}
+    """
+    publish_stage_timings(force=True)
+    merged = published_stage_timings()
+    return {name: merged[name].summary() for name in sorted(merged)}
+
+
+def reset_stage_timings() -> None:
+    """
+    Clear the histograms of this process and the published ones.
+    """
+    global _slot
+    with _histograms_lock:
+        _histograms.clear()
+    with _publish_lock:
+        _slot = None
+        cache.delete_many([_slot_key(index) for index in range(MAX_PROCESSES)])
+
+
+def _store_in_slot(record) -> bool:
+    """
+    Store the record in the slot of this process, a free slot is claimed with add() (atomic on shared
+    backends) on the first publish, or if the slot expired and was claimed by another process.
+    """
+    global _slot
+    timeout = settings.WEBHOOK_TIMINGS_TTL
+    if _slot is not None:
+        current = cache.get(_slot_key(_slot))
+        if current is not None and current["process"] == PROCESS_ID:
+            cache.set(_slot_key(_slot), record, timeout=timeout)
+            return True
+        if current is None and cache.add(_slot_key(_slot), record, timeout=timeout):
+            return True
+
+    for index in range(MAX_PROCESSES):
+        if cache.add(_slot_key(index), record, timeout=timeout):
+            _slot = index
+            return True
+    return False
+
+
+def _slot_key(index) -> str:
+    return f"webhook:timings:slot:{index}"
@@ -0,0 +1,55 @@
+import requests
+import stripe
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from Invisibles23.logging_config import logger
+from .circuit_breaker import CircuitBreaker
+
+
+def configure_stripe() -> None:
+    """
+    Configure the Stripe SDK once for the process (called when the proxy app is ready, see ProxyConfig).
+    All the Stripe calls of the views, the webhook and the commands then share:
+    - the API key (STRIPE_API_TOKEN), read once from the environment
+    - a pooled HTTP client, so the connections (and their TLS handshake) are reused between requests
+    - explicit timeouts (HTTP_CONNECT_TIMEOUT, STRIPE_READ_TIMEOUT)
+    - bounded retries (STRIPE_MAX_NETWORK_RETRIES) of the network errors, 409 and 5xx responses.
+      The SDK sends an idempotency key with each POST, so a retried call is never applied twice.
+    - a circuit breaker, so the calls fail fast while Stripe is down (see CircuitBreaker)
+    """
+    if not settings.STRIPE_API_TOKEN:
+        logger.warning("STRIPE_API_TOKEN is not set, the Stripe calls will fail")
+
+    stripe.api_key = settings.STRIPE_API_TOKEN
+    stripe.max_network_retries = settings.STRIPE_MAX_NETWORK_RETRIES
+    stripe.default_http_client = CircuitBreakerRequestsClient(
+        timeout=(settings.HTTP_CONNECT_TIMEOUT, settings.STRIPE_READ_TIMEOUT),
+        session=_build_stripe_session(),
+    )
+
+
+class CircuitBreakerRequestsClient(stripe.http_client.RequestsClient):
+    """
+    HTTP client of the Stripe SDK protected by the "stripe" circuit breaker. A call (with its retries)
+    fails if Stripe can not be reached or answers with a 5xx or 429 status.
+    """
+
+    def request_with_retries(self, method, url, headers, post_data=None):
+        with CircuitBreaker("stripe") as breaker:
+            response = super().request_with_retries(method, url, headers, post_data)
+            status_code = response[1]
+            if status_code >= 500 or status_code == 429:
+                breaker.fail(f"HTTP {status_code} response to {method.upper()} {url}")
+            return response
+
+
+def _build_stripe_session() -> requests.Session:
+    # Retries are handled by the SDK (with idempotency keys), not by the adapter
+    adapter = HTTPAdapter(
+        pool_connections=1,  # Only api.stripe.com
+        pool_maxsize=max(settings.HTTP_POOL_MAXSIZE, settings.STRIPE_CONCURRENT_CALLS),
+        max_retries=0,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    return session
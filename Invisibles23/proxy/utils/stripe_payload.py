@@ -0,0 +1,169 @@
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+@dataclass(slots=True)
+class InvoiceData:
+    """
+    Fields of a Stripe invoice used by the membership subscription (invoice.paid, invoice.payment_failed).
+    """
+
+    customer_id: Optional[str] = None
+    customer_name: Optional[str] = None
+    customer_email: Optional[str] = None
+    customer_country_code: Optional[str] = None
+    customer_invoice_url: Optional[str] = None
+    customer_subscription_plan: Optional[str] = None
+    plan_lookup_key: Optional[str] = None
+    metadata: Optional[dict] = None
+    missing: tuple = field(default=())  # Required fields not found (or empty) in the payload
+
+
+@dataclass(slots=True)
+class CheckoutSessionData:
+    """
+    Fields of a Stripe checkout session used by the event registration (checkout.session.completed).
+    """
+
+    customer_email: Optional[str] = None
+    metadata: Optional[dict] = None
+    missing: tuple = field(default=())
+
+
+@dataclass(slots=True)
+class PaymentIntentData:
+    """
+    Fields of a Stripe payment intent (payment_intent.payment_failed).
+    """
+
+    metadata: Optional[dict] = None
+    missing: tuple = field(default=())
+
+
+class PayloadSpec:
+    """
+    Extraction spec of a Stripe object. The declared paths are split once (at import) into tuples of
+    keys, extract() follows them with a plain loop : only the declared branches are visited, instead
+    of scanning the whole object for each field.
+
+    Parameters
+    ----------
+    record_class: dataclass
+        The record returned by extract(), with a field for each declared path and a "missing" field
+    paths: dict
+        The path of each field, dot separated (list indexes are numbers, e.g. "lines.data.0.description").
+        A tuple of paths can be given, the first one found is used.
+    required: tuple
+        The fields reported in record.missing if they are not found or empty
+
+    Usage
+    -----
+        `spec = PayloadSpec(InvoiceData, {"customer_id": "customer"}, required=("customer_id",))`
+        `invoice = spec.extract(event["data"]["object"])`
+    """
+
+    def __init__(self, record_class, paths, required=()):
+        self.record_class = record_class
+        self.required = tuple(required)
+        # Field name: key paths by order of priority, e.g. {"customer_id": (("customer",),)}
+        self.paths = {
+            name: tuple(
+                compile_path(path)
+                for path in ((alternatives,) if isinstance(alternatives, str) else alternatives)
+            )
+            for name, alternatives in paths.items()
+        }
+
+    def extract(self, obj):
+        """
+        Resolve the declared fields of a Stripe object and return them in a record.
+        """
+        values = {}
+        for name, alternatives in self.paths.items():
+            value = None
+            for keys in alternatives:
+                value = resolve_path(obj, keys)
+                if value is not None:
+                    break
+            values[name] = value
+
+        # Required fields not found or empty, reported together
+        missing = tuple(name for name in self.required if not values[name])
+        return self.record_class(**values, missing=missing)
+
+
+def compile_path(path) -> tuple:
+    """
+    Split a dot separated path into keys, list indexes are converted to int.
+    """
+    return tuple(int(key) if key.isdigit() else key for key in path.split("."))
+
+
+def resolve_path(obj, keys):
+    """
+    Follow the keys of a path (see compile_path) in a Stripe object, None if one of them is not found.
+    """
+    for key in keys:
+        if isinstance(key, int):
+            obj = obj[key] if isinstance(obj, list) and len(obj) > key else None
+        else:
+            obj = obj.get(key) if isinstance(obj, dict) else None
+        if obj is None:
+            return None
+    return obj
+
+
+INVOICE_SPEC = PayloadSpec(
+    InvoiceData,
+    {
+        "customer_id": "customer",
+        "customer_name": "customer_name",
+        "customer_email": "customer_email",
+        "customer_country_code": (
+            "customer_address.country",
+            "customer_shipping.address.country",
+        ),
+        "customer_invoice_url": "hosted_invoice_url",
+        "customer_subscription_plan": "lines.data.0.description",
+        "plan_lookup_key": "lines.data.0.price.lookup_key",
+        "metadata": "lines.data.0.metadata",
+    },
+    required=(
+        "customer_id",
+        "customer_name",
+        "customer_email",
+        "customer_country_code",
+        "customer_invoice_url",
+        "customer_subscription_plan",
+        "plan_lookup_key",
+    ),
+)
+
+CHECKOUT_SESSION_SPEC = PayloadSpec(
+    CheckoutSessionData,
+    {
+        "customer_email": ("customer_details.email", "customer_email"),
+        "metadata": "metadata",
+    },
+)
+
+PAYMENT_INTENT_SPEC = PayloadSpec(PaymentIntentData, {"metadata": "metadata"})
+
+# Extraction spec of the data object of each handled event type
+STRIPE_EVENT_SPECS = {
+    "invoice.paid": INVOICE_SPEC,
+    "invoice.payment_failed": INVOICE_SPEC,
+    "checkout.session.completed": CHECKOUT_SESSION_SPEC,
+    "checkout.session.expired": CHECKOUT_SESSION_SPEC,
+    "payment_intent.payment_failed": PAYMENT_INTENT_SPEC,
+}
+
+
+def extract_event_data(event_type, data_object):
+    """
+    Extract the fields of the data object of a Stripe event, None if the event type is not handled.
+    """
+    spec = STRIPE_EVENT_SPECS.get(event_type)
+    if spec is None:
+        return None
+    return spec.extract(data_object)
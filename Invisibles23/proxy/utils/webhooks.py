@@ -0,0 +1,218 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from Invisibles23.logging_config import logger
+from website.models import WebhookEvent
+from proxy.views import StripeWebhook
+
+# Errors raised again by every attempt (invalid payload, unknown event or membership plan, event fully
+# booked), the events failing with them are not retried
+PERMANENT_ERRORS = (ValueError, ObjectDoesNotExist, ValidationError)
+
+
+def process_pending_webhook_events(batch_size=10) -> int:
+    """
+    Claim a batch of due Stripe events of the inbox (pending, failed or abandoned by a stopped worker)
+    and process them. Rows are locked while claimed, so several workers can run at the same time.
+
+    Param
+    ------
+    batch_size: int
+        The maximum number of events to process
+
+    Return
+    ------
+    The number of events claimed
+    """
+    now = timezone.now()
+    fail_abandoned_webhook_events(now)
+    with transaction.atomic():
+        events = list(
+            WebhookEvent.objects.select_for_update(skip_locked=True)
+            .filter(
+                status__in=[
+                    WebhookEvent.PENDING,
+                    WebhookEvent.FAILED,
+                    WebhookEvent.PROCESSING,
+                ],
+                next_attempt_at__lte=now,
+                attempts__lt=settings.WEBHOOK_MAX_ATTEMPTS,
+            )
+            .order_by("next_attempt_at")[:batch_size]
+        )
+        WebhookEvent.objects.filter(pk__in=[event.pk for event in events]).update(
+            status=WebhookEvent.PROCESSING,
+            attempts=F("attempts") + 1,
+            next_attempt_at=now + timedelta(seconds=settings.WEBHOOK_PROCESSING_TIMEOUT),
+        )
+
+    for webhook_event in events:
+        webhook_event.attempts += 1
+        process_webhook_event(webhook_event)
+    return len(events)
+
+
+def fail_abandoned_webhook_events(now=None) -> int:
+    """
+    Mark as failed the events abandoned by a stopped worker during their last attempt : their lease
+    (next_attempt_at, see WEBHOOK_PROCESSING_TIMEOUT) expired and they can not be claimed anymore.
+
+    Return
+    ------
+    The number of events marked as failed
+    """
+    count = WebhookEvent.objects.filter(
+        status=WebhookEvent.PROCESSING,
+        next_attempt_at__lte=now or timezone.now(),
+        attempts__gte=settings.WEBHOOK_MAX_ATTEMPTS,
+    ).update(
+        status=WebhookEvent.FAILED,
+        error="The worker stopped while processing the last attempt of the event",
+    )
+    if count:
+        logger.error(f"{count} Stripe event(s) abandoned during their last attempt marked as failed")
+    return count
+
+
+def process_webhook_event(webhook_event) -> bool:
+    """
+    Process a claimed event with the Stripe webhook handlers and store the result.
+    A failed event is retried later with an exponential backoff (see WEBHOOK_RETRY_BACKOFF), unless
+    its error is permanent (see PERMANENT_ERRORS).
+
+    Return
+    ------
+    True if the event was processed
+    """
+    logger.info(f"Processing Stripe event {webhook_event} (attempt {webhook_event.attempts})")
+    try:
+        StripeWebhook().process_event(webhook_event.payload)
+    except PERMANENT_ERRORS as error:
+        logger.error(f"Stripe event {webhook_event} failed, it will not be retried: {error}")
+        WebhookEvent.objects.filter(pk=webhook_event.pk).update(
+            status=WebhookEvent.FAILED,
+            error=str(error),
+            attempts=max(webhook_event.attempts, settings.WEBHOOK_MAX_ATTEMPTS),
+        )
+        return False
+    except Exception as error:
+        delay = settings.WEBHOOK_RETRY_BACKOFF * 2 ** (webhook_event.attempts - 1)
+        logger.error(f"Stripe event {webhook_event} failed: {error}")
+        WebhookEvent.objects.filter(pk=webhook_event.pk).update(
+            status=WebhookEvent.FAILED,
+            error=str(error),
+            next_attempt_at=timezone.now() + timedelta(seconds=delay),
+        )
+        return False
+
+    WebhookEvent.objects.filter(pk=webhook_event.pk).update(
+        status=WebhookEvent.PROCESSED,
+        error="",
+        processed_at=timezone.now(),
+    )
+    return True
+
+
+def replay_stripe_events(events, batch_size=100, dry_run=False, force=False, notify=False) -> dict:
+    """
+    Process Stripe events through the webhook handlers, without HTTP nor signature verification
+    (see the replay_webhook_events command). Each event is stored in the inbox if it is not there yet,
+    so the later deliveries of Stripe are ignored.
+
+    Events are processed by batches, each batch in a transaction with a savepoint per event : a failed
+    event is rolled back and recorded in the inbox without stopping the batch.
+
+    Param
+    ------
+    events: iterable
+        The Stripe events (dicts)
+    batch_size: int
+        The number of events processed in a transaction
+    dry_run: bool
+        Only count the events that would be processed
+    force: bool
+        Process the events already processed as well
+    notify: bool
+        Send the emails, subscribe to Mailchimp and update the Stripe customers (off for backfills)
+
+    Return
+    ------
+    A dict like {"processed": 10, "skipped": 2, "failed": 0}
+    """
+    counters = {"processed": 0, "skipped": 0, "failed": 0}
+    batch = []
+    for event in events:
+        batch.append(event)
+        if len(batch) >= batch_size:
+            _replay_batch(batch, counters, dry_run, force, notify)
+            batch = []
+    if batch:
+        _replay_batch(batch, counters, dry_run, force, notify)
+    return counters
+
+
+def _replay_batch(events, counters, dry_run, force, notify) -> None:
+    with transaction.atomic():
+        stored = WebhookEvent.objects.select_for_update().in_bulk(
+            [event["id"] for event in events], field_name="stripe_event_id"
+        )
+
+        for event in events:
+            webhook_event = stored.get(event["id"])
+            if webhook_event and webhook_event.status == WebhookEvent.PROCESSED and not force:
+                counters["skipped"] += 1
+                continue
+            if dry_run:
+                logger.info(f"[DRY RUN] Stripe event {event['type']} ({event['id']}) would be processed")
+                counters["processed"] += 1
+                continue
+
+            if webhook_event is None:
+                webhook_event = WebhookEvent.objects.create(
+                    stripe_event_id=event["id"],
+                    event_type=event["type"],
+                    payload=event,
+                    status=WebhookEvent.PROCESSING,
+                )
+                stored[event["id"]] = webhook_event  # The export may contain the same event twice
+
+            try:
+                with transaction.atomic():
+                    StripeWebhook(notify=notify).process_event(event)
+            except Exception as error:
+                logger.error(f"Replay of Stripe event {webhook_event} failed: {error}")
+                webhook_event.status = WebhookEvent.FAILED
+                webhook_event.error = str(error)
+                # Not retried by the worker (it would notify the members again), replayed on demand only
+                webhook_event.attempts = max(webhook_event.attempts + 1, settings.WEBHOOK_MAX_ATTEMPTS)
+                counters["failed"] += 1
+            else:
+                webhook_event.status = WebhookEvent.PROCESSED
+                webhook_event.error = ""
+                webhook_event.processed_at = timezone.now()
+                webhook_event.attempts += 1
+                counters["processed"] += 1
+
+            webhook_event.save(update_fields=["status", "error", "processed_at", "attempts"])
+
+
+def purge_processed_webhook_events(retention_days=None) -> int:
+    """
+    Delete the processed events older than the retention window (WEBHOOK_RETENTION_DAYS).
+    Failed events are kept to be checked in the admin.
+
+    Return
+    ------
+    The number of deleted events
+    """
+    retention_days = retention_days or settings.WEBHOOK_RETENTION_DAYS
+    count, _ = WebhookEvent.objects.filter(
+        status=WebhookEvent.PROCESSED,
+        processed_at__lt=timezone.now() - timedelta(days=retention_days),
+    ).delete()
+    if count:
+        logger.info(f"{count} processed Stripe event(s) purged from the inbox")
+    return count
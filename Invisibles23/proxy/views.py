@@ -1,25 +1,73 @@
 from django.views import View
-from website.models import Members, MembershipPlans, Event, Participant, EventParticipants
+from website.models import (
+    Members,
+    MembershipPlans,
+    Event,
+    Participant,
+    EventParticipants,
+    PodcastEpisode,
+    WebhookEvent,
+)
 from Invisibles23.logging_config import logger
 from Invisibles23.logging_utils import log_debug_info
 import mailchimp_marketing as MailchimpMarketing
 from mailchimp_marketing.api_client import ApiClientError
-from django.http import HttpResponse, JsonResponse, HttpResponseBadRequest
+from django.http import (
+    HttpResponse,
+    JsonResponse,
+    HttpResponseBadRequest,
+    HttpResponseForbidden,
+)
 from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    set_response_etag,
+)
+from django.utils.http import http_date
 from django.urls import reverse
-from django.core.exceptions import ObjectDoesNotExist
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
+from asgiref.sync import sync_to_async
 import environ
-import requests
 import stripe
 from datetime import datetime
+from django.utils import timezone
 from .utils.helpers import (
     sendEmail,
-    find_key_in_dict,
     mailchimp_add_subscriber,
+    amailchimp_add_subscriber,
     format_birthdate_for_mailchimp,
 )
+from .utils.cache import StaleWhileRevalidateCache
+from .utils.stripe_payload import extract_event_data
+from .utils.circuit_breaker import (
+    CircuitBreaker,
+    CircuitOpenError,
+    circuit_breaker_stats,
+    circuit_open_response,
+)
+from .utils.metrics import StageTimer, stage_timing_summary
+from .utils.compression import encode_json_payload, encoded_json_response
+from .utils.http import get_async_http_client, get_http_session, max_request_duration
+from .utils.ausha import (
+    afetch_ausha_podcasts,
+    fetch_ausha_podcasts,
+    project_podcasts,
+    PODCAST_FIELDS,
+)
+from website.utils.view_helpers import podcast_episodes_version_key
+from website.utils.stripe_prices import (
+    delete_stripe_price,
+    store_stripe_price,
+    update_stripe_product,
+)
+from website.utils.seat_holds import release_seat_hold
+from website.utils.checkout_sessions import forget_checkout_session
 
 # Read the .env file
 env = environ.Env()
@@ -45,36 +93,311 @@ class GetAPISecrets(View):
 
 
 class AushaProxy(View):
-    http_method_names = ["post"]  # Only POST requests are allowed
-    ausha_api_key = env("AUSHA_API_TOKEN")
+    """
+    This view returns the podcasts of an Ausha show. Episodes are read from the database (PodcastEpisode,
+    filled by the sync_ausha_episodes command). If the show has not been synchronised yet, the Ausha API
+    is called instead : its payload is cached per show ID (see AUSHA_CACHE_TTL and AUSHA_CACHE_STALE_TTL
+    in settings) and the cache status is sent in the X-Cache header.
+    Concurrent misses for the same show are coalesced into a single call to Ausha.
+    Both sources return the same shape : {"data": [...], "meta": {"offset": 0, "limit": 4, "total": 42}}.
+
+    Parameters (POST data, or query string for GET) :
+    - show_id: ID of the Ausha show (required)
+    - offset: number of podcasts to skip (most recent first)
+    - limit: number of podcasts to return (max 100)
+    - fields: comma separated list of podcast attributes to return (see PODCAST_FIELDS)
+
+    Each trimmed variant read from the database is cached separately until the next synchronisation,
+    serialized and compressed once (gzip and brotli) : the encoding accepted by the client is sent as is.
+    GET responses are public and sent with Cache-Control, ETag and Last-Modified headers so browsers
+    and CDNs can cache them (304 Not Modified is returned if the ETag or date matches).
+    """
+
+    http_method_names = ["get", "post"]  # GET is cacheable, POST is kept for older bundles
+    max_limit = 100  # Maximum number of podcasts per request
+
+    def get(self, request):
+        response, last_modified = self._get_podcasts_response(request, request.GET)
+        return self._make_cacheable(request, response, last_modified)
 
     def post(self, request):
-        show_id = request.POST.get("show_id")
+        response, _ = self._get_podcasts_response(request, request.POST)
+        return response
 
-        if not show_id:
-            return HttpResponseBadRequest("Show ID is required")
+    def _get_podcasts_response(self, request, params) -> tuple:
+        """
+        Build the podcasts response from the request parameters.
 
-        url = f"https://developers.ausha.co/v1/shows/{show_id}/podcasts"
+        Return
+        ------
+        A tuple (response, last_modified) where last_modified is the timestamp of the last
+        synchronisation of the episodes (None if the podcasts do not come from the database)
+        """
+        try:
+            show_id, offset, limit, fields = self._parse_params(params)
+        except ValueError as error:
+            return HttpResponseBadRequest(str(error)), None
+
+        variant = self._get_variant(show_id, offset, limit, fields)
+        if variant is not None:
+            return encoded_json_response(request, variant), variant["last_modified"]
 
-        # Send a request to Ausha API
         try:
-            response = requests.get(
-                url,
-                headers={
-                    "Accept": "application/json",
-                    "Content-Type": "application/json",
-                    "Authorization": f"Bearer {self.ausha_api_key}",
-                },
+            payload, cache_status = self._get_podcasts_cache().get_or_fetch(
+                show_id, lambda: fetch_ausha_podcasts(show_id)
             )
-            return JsonResponse(response.json(), safe=False)
         except Exception as error:
-            print(f"An exception occurred: {error}")
-            return JsonResponse(
-                {
-                    "message": f"An error occurred: {error}",
-                },
-                status=500,
+            return self._upstream_error_response(error), None
+
+        return self._upstream_response(show_id, payload, cache_status, offset, limit, fields), None
+
+    def _make_cacheable(self, request, response, last_modified):
+        """
+        Add the HTTP caching headers to a successful GET response, or return 304 if the client copy is still valid.
+        """
+        if response.status_code != 200:
+            return response
+
+        if not response.has_header("ETag"):
+            set_response_etag(response)
+        if last_modified:
+            response["Last-Modified"] = http_date(last_modified)
+        patch_cache_control(
+            response,
+            public=True,
+            max_age=settings.AUSHA_HTTP_MAX_AGE,
+            stale_while_revalidate=settings.AUSHA_HTTP_MAX_AGE,
+        )
+        return get_conditional_response(
+            request,
+            etag=response["ETag"],
+            last_modified=int(last_modified) if last_modified else None,
+            response=response,
+        )
+
+    def _parse_params(self, params) -> tuple:
+        """
+        Get the show_id, offset, limit and fields parameters from the request data (raises ValueError if invalid).
+        """
+        show_id = params.get("show_id")
+
+        if not show_id:
+            raise ValueError("Show ID is required")
+
+        if not show_id.isdigit():
+            raise ValueError("Show ID must be a number")
+
+        return (show_id, *self._parse_trim_params(params))
+
+    def _get_variant(self, show_id, offset, limit, fields):
+        """
+        Get the trimmed variant from the cache or the database, None if the show has not been synchronised.
+        A show without episodes is remembered until its next synchronisation, so its requests go straight
+        to the Ausha API without querying the database.
+        """
+        version = cache.get(podcast_episodes_version_key(show_id), 0)
+        variant_key = self._variant_cache_key(show_id, version, offset, limit, fields)
+        unsynced_key = f"ausha:unsynced:{show_id}:{version}"
+
+        cached = cache.get_many([variant_key, unsynced_key])
+        if unsynced_key in cached:
+            return None
+
+        variant = cached.get(variant_key)
+        if variant is None:
+            variant = self._get_episodes_from_database(show_id, offset, limit, fields)
+            if variant is None:
+                cache.set(unsynced_key, True, timeout=settings.PODCAST_EPISODES_CACHE_TTL)
+                return None
+            cache.set(variant_key, variant, timeout=settings.PODCAST_EPISODES_CACHE_TTL)
+        return variant
+
+    def _get_podcasts_cache(self) -> StaleWhileRevalidateCache:
+        return StaleWhileRevalidateCache(
+            "ausha",
+            ttl=settings.AUSHA_CACHE_TTL,
+            stale_ttl=settings.AUSHA_CACHE_STALE_TTL,
+            lock_timeout=settings.AUSHA_CACHE_LOCK_TIMEOUT
+            or max_request_duration(settings.AUSHA_API_TIMEOUT),
+        )
+
+    def _upstream_response(self, show_id, payload, cache_status, offset, limit, fields):
+        """
+        Build the response from the (cached) Ausha API payload, projected like the episodes read from
+        the database (see project_podcasts), so clients get the same shape whatever the source.
+        Only the first page of Ausha is cached, the total is the number of episodes it contains (not
+        the total of the show) so clients do not page past them until the show is synchronised.
+        """
+        log_debug_info(f"Ausha cache {cache_status} for show {show_id}")
+        podcasts = payload.get("data", [])
+        payload = project_podcasts(
+            podcasts[offset : offset + limit if limit else None],
+            len(podcasts),
+            offset,
+            limit,
+            fields,
+        )
+        response = JsonResponse(payload)
+        response["X-Cache"] = cache_status
+        return response
+
+    def _upstream_error_response(self, error):
+        if isinstance(error, CircuitOpenError):
+            return circuit_open_response(error)
+        logger.error(f"An exception occurred while fetching Ausha podcasts: {error}")
+        return JsonResponse(
+            {
+                "message": f"An error occurred: {error}",
+            },
+            status=500,
+        )
+
+    def _parse_trim_params(self, params) -> tuple:
+        """
+        Get the offset, limit and fields parameters from the request data (raises ValueError if invalid).
+        """
+        offset = params.get("offset") or "0"
+        limit = params.get("limit")
+        fields = params.get("fields")
+
+        if not offset.isdigit():
+            raise ValueError("Offset must be a positive number")
+
+        if limit and (not limit.isdigit() or not 0 < int(limit) <= self.max_limit):
+            raise ValueError(f"Limit must be a number between 1 and {self.max_limit}")
+
+        if fields:
+            fields = [field.strip() for field in fields.split(",") if field.strip()]
+            unknown_fields = set(fields) - set(PODCAST_FIELDS)
+            if unknown_fields:
+                raise ValueError(f"Unknown fields: {', '.join(sorted(unknown_fields))}")
+
+        return int(offset), int(limit) if limit else None, fields or None
+
+    def _get_episodes_from_database(self, show_id, offset, limit, fields):
+        """
+        Get the trimmed podcasts of the show from the database, None if the show has not been synchronised.
+
+        Return
+        ------
+        A dict like {"bodies": {...}, "etag": '"..."', "last_modified": 1724337945.0}, the payload
+        is serialized and compressed once (see encode_json_payload)
+        """
+        episodes = PodcastEpisode.objects.filter(show_id=show_id)
+        summary = episodes.aggregate(total=Count("id"), last_synced_at=Max("synced_at"))
+        total = summary["total"]
+        if not total:
+            return None
+
+        podcasts = list(
+            episodes.values_list("payload", flat=True)[
+                offset : offset + limit if limit else None
+            ]
+        )
+        log_debug_info(f"{len(podcasts)} episodes read from database for show {show_id}")
+        return {
+            **encode_json_payload(project_podcasts(podcasts, total, offset, limit, fields)),
+            "last_modified": summary["last_synced_at"].timestamp(),
+        }
+
+    def _variant_cache_key(self, show_id, version, offset, limit, fields) -> str:
+        """
+        Cache key of a trimmed variant, for a version of the episodes (changed by each synchronisation of the show).
+        """
+        return f"ausha:encoded:{show_id}:{version}:{offset}:{limit}:{','.join(fields or [])}"
+
+
+class AsyncAushaProxy(AushaProxy):
+    """
+    Async version of AushaProxy for ASGI deployments (see PROXY_ASYNC_VIEWS in settings). The Ausha API
+    is called with the shared async HTTP client, so requests waiting for Ausha do not occupy a worker.
+    """
+
+    async def get(self, request):
+        response, last_modified = await self._aget_podcasts_response(request, request.GET)
+        return self._make_cacheable(request, response, last_modified)
+
+    async def post(self, request):
+        response, _ = await self._aget_podcasts_response(request, request.POST)
+        return response
+
+    async def _aget_podcasts_response(self, request, params) -> tuple:
+        """
+        Async version of _get_podcasts_response.
+        """
+        try:
+            show_id, offset, limit, fields = self._parse_params(params)
+        except ValueError as error:
+            return HttpResponseBadRequest(str(error)), None
+
+        variant = await sync_to_async(self._get_variant)(show_id, offset, limit, fields)
+        if variant is not None:
+            return encoded_json_response(request, variant), variant["last_modified"]
+
+        try:
+            payload, cache_status = await self._get_podcasts_cache().aget_or_fetch(
+                show_id, lambda: afetch_ausha_podcasts(show_id)
             )
+        except Exception as error:
+            return self._upstream_error_response(error), None
+
+        return self._upstream_response(show_id, payload, cache_status, offset, limit, fields), None
+
+
+class AushaCacheStats(View):
+    """
+    Return the Ausha cache counters (hit, miss, stale, fallback) to tune the TTL (staff only).
+    """
+
+    http_method_names = ["get"]  # Only GET requests are allowed
+
+    def get(self, request):
+        if not request.user.is_staff:
+            return HttpResponseForbidden()
+
+        return JsonResponse(
+            {
+                "ttl": settings.AUSHA_CACHE_TTL,
+                "stale_ttl": settings.AUSHA_CACHE_STALE_TTL,
+                "stats": StaleWhileRevalidateCache("ausha").stats(),
+            }
+        )
+
+
+class CircuitBreakerStats(View):
+    """
+    Return the state and counters of the circuit breaker of each upstream (staff only).
+    See CircuitBreaker.
+    """
+
+    http_method_names = ["get"]  # Only GET requests are allowed
+
+    def get(self, request):
+        if not request.user.is_staff:
+            return HttpResponseForbidden()
+
+        return JsonResponse(
+            {
+                "failure_threshold": settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+                "reset_timeout": settings.CIRCUIT_BREAKER_RESET_TIMEOUT,
+                "upstreams": circuit_breaker_stats(),
+            }
+        )
+
+
+class WebhookTimingStats(View):
+    """
+    Return the p50, p95 and p99 durations of each stage of the Stripe webhook handlers, merged from
+    every process (staff only). See StageTimer.
+    """
+
+    http_method_names = ["get"]  # Only GET requests are allowed
+
+    def get(self, request):
+        if not request.user.is_staff:
+            return HttpResponseForbidden()
+
+        return JsonResponse({"stages": stage_timing_summary()})
 
 
 class MailchimpProxy(View):
@@ -91,6 +414,24 @@ class MailchimpProxy(View):
         self.subscriber_email = None
 
     def post(self, request):
+        member_info = self._get_member_info(request)
+        if member_info is None:
+            return HttpResponseBadRequest("Email is required")
+
+        # Mailchimp API endpoint
+        response = mailchimp_add_subscriber(
+            self.mailchimp_api_key,
+            "us9" if settings.DEBUG else "us21",
+            self.list_id,
+            member_info,
+        )
+
+        return response
+
+    def _get_member_info(self, request):
+        """
+        Get the Mailchimp member to add from the form data, None if no email was provided.
+        """
         logger.info("MailchimpProxy initiated ...")
         self.subscriber_email = request.POST.get("email")
         logger.info(
@@ -100,24 +441,14 @@ class MailchimpProxy(View):
 
         if not self.subscriber_email:
             logger.error("No email provided for newsletter subscription")
-            return HttpResponseBadRequest("Email is required")
+            return None
 
-        member_info = {
+        return {
             "email_address": self.subscriber_email,
             "status": "subscribed",
             "tags": ["Abonné"],
         }
 
-        # Mailchimp API endpoint
-        response = mailchimp_add_subscriber(
-            self.mailchimp_api_key,
-            "us9" if settings.DEBUG else "us21",
-            self.list_id,
-            member_info,
-        )
-
-        return response
-
     def _handle_test_status(self, request):
         """
         To easily test the error handling in frontend, this method simulates an error based on the test_status parameter.
@@ -132,6 +463,25 @@ class MailchimpProxy(View):
             raise ApiClientError("An error occurred", status_code=test_status)
 
 
+class AsyncMailchimpProxy(MailchimpProxy):
+    """
+    Async version of MailchimpProxy (see PROXY_ASYNC_VIEWS in settings), the subscriber is added
+    with the shared async HTTP client.
+    """
+
+    async def post(self, request):
+        member_info = self._get_member_info(request)
+        if member_info is None:
+            return HttpResponseBadRequest("Email is required")
+
+        return await amailchimp_add_subscriber(
+            self.mailchimp_api_key,
+            "us9" if settings.DEBUG else "us21",
+            self.list_id,
+            member_info,
+        )
+
+
 @method_decorator(csrf_exempt, name="dispatch")
 class StripeWebhook(View):
     """
@@ -139,6 +489,7 @@ class StripeWebhook(View):
     """
 
     http_method_names = ["post"]  # Only POST requests are allowed
+    notify = True  # Emails, Mailchimp subscription and Stripe customer update (disabled by replays)
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -156,54 +507,40 @@ class StripeWebhook(View):
         self.meeting = None
         self.talk_event_link = None
         self.data = None
+        self.event_data = None
         self.metadata = None
+        self.event_id = None
         self.event_type = None
 
     def post(self, request) -> HttpResponse:
         """
-        Handle the POST request for the Stripe webhook.
+        Handle the POST request for the Stripe webhook. The event is only verified and stored in the
+        WebhookEvent inbox, so Stripe gets its response right away. It is then processed by the
+        process_webhook_events command (see process_event).
         """
         logger.info("Stripe event registration webhook initiated ...")
         self.request = request
         try:
-            payload = request.body
-            sig_header = request.META["HTTP_STRIPE_SIGNATURE"]
-            stripe_secret = env("STRIPE_WEBHOOK_SECRET")
-            stripe.api_key = env("STRIPE_API_TOKEN")
-            event = stripe.Webhook.construct_event(payload, sig_header, stripe_secret)
-            self.event_type = event["type"]
-
-            log_debug_info(f"Event type: {self.event_type}")
-
-            # Get metadata from event data
-            self.data = event["data"]
-            self._extract_metadata()
-            registration_type = None
-
-            if self.metadata:
-                log_debug_info("Extracted metadata : ", self.metadata)
-                logger.info(f"Registration type: {self.metadata['type']}")
-                registration_type = self.metadata["type"]
-
-            if (
-                self.event_type == "checkout.session.completed"
-                and registration_type == "talk-group"
-            ):
-                self.handle_talk_group()
-            elif (
-                self.event_type == "invoice.paid" and registration_type == "membership"
-            ):
-                self.handle_membership()
-            elif self.event_type == "payment_intent.payment_failed":
-                logger.warning(
-                    f"[EVENT] Payment failed event initiated for {self.metadata['type'] if self.metadata else None}: {self.metadata}"
-                )
-            elif self.event_type == "invoice.payment_failed":
-                logger.warning(
-                    f"[EVENT] Invoice payment failed event initiated for {self.metadata['type'] if self.metadata else None}: {self.metadata}"
-                )
-            else:
-                logger.warning(f"Unhandled event type: {event['type']}")
+            with StageTimer("webhook") as timer:
+                with timer.stage("verify_signature"):
+                    payload = request.body
+                    sig_header = request.META["HTTP_STRIPE_SIGNATURE"]
+                    event = stripe.Webhook.construct_event(
+                        payload, sig_header, settings.STRIPE_WEBHOOK_SECRET
+                    )
+                timer.fields["event_id"] = event["id"]
+
+                # Stripe retries events until it gets a 2xx response, they are only stored once
+                with timer.stage("store_event"):
+                    webhook_event, created = WebhookEvent.objects.get_or_create(
+                        stripe_event_id=event["id"],
+                        defaults={"event_type": event["type"], "payload": event},
+                    )
+            if not created:
+                logger.info(f"Duplicate Stripe event ignored: {webhook_event}")
+                return HttpResponse(status=200)
+
+            logger.info(f"Stripe event stored in the inbox: {webhook_event}")
 
             return HttpResponse(status=200)
 
@@ -214,31 +551,91 @@ class StripeWebhook(View):
             logger.error(f"Unexpected error in webhook: {str(e)}")
             return HttpResponse(status=500)
 
+    def process_event(self, event) -> None:
+        """
+        Process a Stripe event of the inbox (called by the process_webhook_events command).
+        Raises if the event could not be processed, so it is retried later.
+        """
+        self.event_id = event.get("id")
+        self.event_type = event["type"]
+
+        log_debug_info(f"Event type: {self.event_type}")
+
+        # Get metadata from event data
+        self.data = event["data"]
+        self._extract_metadata()
+        registration_type = None
+
+        if self.metadata:
+            log_debug_info("Extracted metadata : ", self.metadata)
+            logger.info(f"Registration type: {self.metadata['type']}")
+            registration_type = self.metadata["type"]
+
+        if (
+            self.event_type == "checkout.session.completed"
+            and registration_type == "talk-group"
+        ):
+            self.handle_talk_group()
+        elif self.event_type == "checkout.session.expired":
+            self.handle_checkout_expired()
+        elif (
+            self.event_type == "invoice.paid" and registration_type == "membership"
+        ):
+            self.handle_membership()
+        elif self.event_type in (
+            "customer.subscription.updated",
+            "customer.subscription.deleted",
+        ):
+            self.handle_subscription_status()
+        elif self.event_type.startswith("price."):
+            self.handle_price()
+        elif self.event_type.startswith("product."):
+            self.handle_product()
+        elif self.event_type == "payment_intent.payment_failed":
+            logger.warning(
+                f"[EVENT] Payment failed event initiated for {self.metadata['type'] if self.metadata else None}: {self.metadata}"
+            )
+        elif self.event_type == "invoice.payment_failed":
+            logger.warning(
+                f"[EVENT] Invoice payment failed event initiated for {self.metadata['type'] if self.metadata else None}: {self.metadata}"
+            )
+        else:
+            logger.warning(f"Unhandled event type: {event['type']}")
+
     def handle_membership(self) -> None:
         """
         Subroutine to handle the membership subscription. It updates the member's metadata and sends email alerts
         Note : Updating is the only way I found to transmit the metadata to stripe
         """
-        try:
-            self._extract_customer_data()
-            self._add_member_to_database()
-            self._update_stripe_customer_metadata()
-            self._log_event()
-
-        except ValueError as e:
-            logger.error(f"Invalid data in webhook payload: {str(e)}")
-            raise ValueError("Invalid data in webhook payload")
-        except ObjectDoesNotExist as e:
-            logger.error(f"Membership plan not found: {str(e)}")
-            raise ObjectDoesNotExist("Membership plan not found")
-        except Exception as e:
-            logger.error(f"Error processing membership event: {str(e)}")
-            raise Exception("Error processing membership event")
-        else:
-            logger.info("Membership subscription event completed.")
-            self._send_membership_alerts()
-        finally:
-            self._subscribe_to_mailing_list()
+        with StageTimer("membership", event_id=self.event_id) as timer:
+            try:
+                with timer.stage("extract_customer_data"):
+                    self._extract_customer_data()
+                with timer.stage("add_member_to_database"):
+                    self._add_member_to_database()
+                forget_checkout_session(self.metadata["email"], self.plan_lookup_key)
+                if self.notify:
+                    with timer.stage("update_stripe_customer"):
+                        self._update_stripe_customer_metadata()
+                self._log_event()
+
+            except ValueError as e:
+                logger.error(f"Invalid data in webhook payload: {str(e)}")
+                raise ValueError("Invalid data in webhook payload")
+            except ObjectDoesNotExist as e:
+                logger.error(f"Membership plan not found: {str(e)}")
+                raise ObjectDoesNotExist("Membership plan not found")
+            except Exception as e:
+                logger.error(f"Error processing membership event: {str(e)}")
+                raise Exception("Error processing membership event")
+            else:
+                logger.info("Membership subscription event completed.")
+                if self.notify:
+                    with timer.stage("send_alerts"):
+                        self._send_membership_alerts()
+                    # Only once the member is stored, a failed event is retried by the worker
+                    with timer.stage("subscribe_to_mailing_list"):
+                        self._subscribe_to_mailing_list()
 
     def handle_talk_group(self) -> None:
         """
@@ -246,77 +643,116 @@ class StripeWebhook(View):
         """
         logger.info("[EVENT] Checkout completed event initiated ...")
 
-        try:
-            #self._extract_customer_data()
-            self._extract_meeting_id()
-            self._create_and_associate_participant_with_event()
-            self._get_talk_event_zoom_link()
-            self._log_event()
-        except ObjectDoesNotExist as e:
-            logger.error(f"Event not found: {str(e)}")
-        except ValueError as e:
-            logger.error(f"Invalid data in webhook payload: {str(e)}")
-        except Exception as e:
-            logger.error(f"Error processing checkout completed event: {str(e)}")
+        with StageTimer("talk_group", event_id=self.event_id) as timer:
+            try:
+                #self._extract_customer_data()
+                with timer.stage("extract_meeting_id"):
+                    self._extract_meeting_id()
+                with timer.stage("create_participant"):
+                    self._create_and_associate_participant_with_event()
+                with timer.stage("get_zoom_link"):
+                    self._get_talk_event_zoom_link()
+                self._log_event()
+            except ObjectDoesNotExist as e:
+                logger.error(f"Event not found: {str(e)}")
+                raise ObjectDoesNotExist("Event not found")
+            except ValueError as e:
+                logger.error(f"Invalid data in webhook payload: {str(e)}")
+                raise ValueError("Invalid data in webhook payload")
+            except ValidationError as e:
+                logger.error(f"Registration refused: {str(e)}")
+                raise  # e.g. event fully booked, not retried by the worker
+            except Exception as e:
+                logger.error(f"Error processing checkout completed event: {str(e)}")
+                raise Exception("Error processing checkout completed event")
+            else:
+                logger.info("Checkout completed event completed.")
+                if self.notify:
+                    with timer.stage("send_alerts"):
+                        self._send_event_registration_alerts()
+
+    def handle_checkout_expired(self) -> None:
+        """
+        Subroutine to release the seat held by an unpaid checkout session (checkout.session.expired).
+        The expired holds are also swept by the worker, this frees the seat right away.
+        """
+        checkout_session_id = self.data["object"]["id"]
+        release_seat_hold(checkout_session_id)
+        if self.metadata and self.metadata.get("type") == "talk-group":
+            forget_checkout_session(
+                self.metadata["email"], f"event-{self.metadata['event_id']}", checkout_session_id
+            )
+
+    def handle_subscription_status(self) -> None:
+        """
+        Subroutine to keep the subscription status of the member up to date (customer.subscription.updated,
+        customer.subscription.deleted). MembershipView relies on it to detect the active subscriptions,
+        both events must be enabled on the Stripe webhook endpoint (see STRIPE_WEBHOOK_SECRET in settings).
+        """
+        subscription = self.data["object"]
+        is_active = (
+            self.event_type != "customer.subscription.deleted"
+            and subscription["status"] == "active"
+        )
+        count = Members.objects.filter(stripe_customer_id=subscription["customer"]).update(
+            is_subscription_active=is_active, subscription_confirmed_at=timezone.now()
+        )
+        logger.info(
+            f"Subscription of customer {subscription['customer']} {'active' if is_active else 'inactive'} "
+            f"({count} member(s) updated)"
+        )
+
+    def handle_price(self) -> None:
+        """
+        Subroutine to keep the catalog of the Stripe prices up to date (price.created, price.updated,
+        price.deleted), so the checkout sessions are created without calling Stripe.
+        """
+        price = self.data["object"]
+        if self.event_type == "price.deleted":
+            delete_stripe_price(price["id"])
         else:
-            logger.info("Checkout completed event completed.")
-            self._send_event_registration_alerts()
+            store_stripe_price(price)
+
+    def handle_product(self) -> None:
+        """
+        Subroutine to update the prices of a Stripe product in the catalog (product.updated, product.deleted).
+        """
+        product = self.data["object"]
+        count = update_stripe_product(product, deleted=self.event_type == "product.deleted")
+        logger.info(f"{count} price(s) of the Stripe product {product['id']} updated in the catalog")
 
     def _extract_customer_data(self) -> None:
         """
         Extract customer data from the event data (only for membership subscription)(setter).
         """
+        invoice = self.event_data
 
-        self.customer_id = find_key_in_dict(self.data["object"], "customer")
-        self.customer_name = find_key_in_dict(self.data["object"], "customer_name")
-        self.customer_email = find_key_in_dict(self.data["object"], "customer_email")
-        self.customer_country_code = find_key_in_dict(self.data["object"], "country")
-        self.customer_invoice_url = find_key_in_dict(
-            self.data["object"], "hosted_invoice_url"
-        )
-        self.customer_subscription_plan = self.data["object"]["lines"]["data"][0]["description"]
-        self.plan_lookup_key = self.data["object"]["lines"]["data"][0]["price"]["lookup_key"]
-
-        missing_fields = []
-
-        if not self.customer_id:
-            missing_fields.append("customer_id")
-        if not self.customer_name:
-            missing_fields.append("customer_name")
-        if not self.customer_email:
-            missing_fields.append("customer_email")
-        if not self.customer_country_code:
-            missing_fields.append("customer_country_code")
-        if not self.customer_invoice_url:
-            missing_fields.append("customer_invoice_url")
-        if not self.customer_subscription_plan:
-            missing_fields.append("customer_subscription_plan")
-        if not self.plan_lookup_key:
-            missing_fields.append("plan_lookup_key")
-
-        if missing_fields:
+        if invoice.missing:
             raise ValueError(
-                f"Missing member data in event payload: {', '.join(missing_fields)}"
+                f"Missing member data in event payload: {', '.join(invoice.missing)}"
             )
+
+        self.customer_id = invoice.customer_id
+        self.customer_name = invoice.customer_name
+        self.customer_email = invoice.customer_email
+        self.customer_country_code = invoice.customer_country_code
+        self.customer_invoice_url = invoice.customer_invoice_url
+        self.customer_subscription_plan = invoice.customer_subscription_plan
+        self.plan_lookup_key = invoice.plan_lookup_key
+
         logger.info(
             f"Customer data extracted: {self.customer_name}, {self.customer_email}, {self.customer_subscription_plan}, {self.customer_country_code}, {self.customer_id}"
         )
 
     def _extract_metadata(self) -> None:
         """
-        Extract metadata from the event data based on the event type (setter).
+        Extract the fields of the event data declared for the event type (see STRIPE_EVENT_SPECS),
+        in a single traversal, and set the metadata (setter).
         """
         log_debug_info(f"Event type: {self.event_type}")
 
-        if self.event_type in [
-            "checkout.session.completed",
-            "payment_intent.payment_failed",
-        ]:
-            self.metadata = find_key_in_dict(self.data["object"], "metadata")
-        elif self.event_type in ["invoice.paid", "invoice.payment_failed"]:
-            self.metadata = find_key_in_dict(
-                self.data["object"]["lines"]["data"][0], "metadata"
-            )
+        self.event_data = extract_event_data(self.event_type, self.data["object"])
+        self.metadata = self.event_data.metadata if self.event_data else None
 
     def _extract_meeting_id(self) -> None:
         """
@@ -353,6 +789,8 @@ class StripeWebhook(View):
                 "stripe_customer_id": self.customer_id,
                 "payment_info_name": str.title(self.customer_name),
                 "payment_info_country": self.customer_country_code,
+                "is_subscription_active": True,  # Also set again on the renewal of a cancelled member
+                "subscription_confirmed_at": timezone.now(),
             },
         )
         
@@ -405,9 +843,19 @@ class StripeWebhook(View):
 
         logger.info(f"{'New' if created else 'Existing'} participant: {participant}")
 
-        # Associate the participant with the event
-        EventParticipants.objects.create(event=self.meeting, participant=participant)
-        logger.info(f"Participant {participant} registered for event {self.meeting}")
+        # Associate the participant with the event (already done if the event is replayed)
+        # The seat held during the checkout is converted in the same transaction
+        with transaction.atomic():
+            _, registered = EventParticipants.objects.get_or_create(
+                event=self.meeting, participant=participant
+            )
+            release_seat_hold(self.data["object"]["id"])
+        # The paid session can no longer be reused by the registration form
+        forget_checkout_session(self.metadata["email"], f"event-{self.meeting_id}")
+        if registered:
+            logger.info(f"Participant {participant} registered for event {self.meeting}")
+        else:
+            logger.warning(f"Participant {participant} already registered for event {self.meeting}")
 
     def _get_talk_event_zoom_link(self) -> str:
         """
@@ -583,60 +1031,110 @@ class EmailSender(View):
     logger.info("EmailSender initialized ...")
 
     def post(self, request):
-        # Get the form data
-        fname = request.POST.get("first_name")
-        lname = request.POST.get("last_name")
-        email = request.POST.get("email")
-        message = request.POST.get("message")
         g_recaptcha_response = request.POST.get("recaptcha_token")
 
         # Verify reCAPTCHA
-        if self.verifyRecaptchaV2(g_recaptcha_response):
-            try:
-                logger.info("Recaptcha verified. Sending email...")
-                sendEmail(
-                    env("OWNER_EMAIL"),
-                    "Un nouveau message a été envoyé depuis le site web",
-                    "contact_email.html",
-                    {
-                        "fname": fname,
-                        "lname": lname,
-                        "email": email,
-                        "message": message,
-                    },
-                )
+        try:
+            is_human = self.verifyRecaptchaV2(g_recaptcha_response)
+        except CircuitOpenError as error:
+            return circuit_open_response(error)
 
-                return JsonResponse(
-                    {
-                        "message": "Email sent successfully.",
-                    },
-                    status=200,
-                )
-
-            except Exception as error:
-                logger.error(f"An exception occurred: {error}")
-                return JsonResponse(
-                    {
-                        "message": f"An error occurred: {error}",
-                    },
-                    status=500,
-                )
+        if is_human:
+            return self._send_contact_email(request.POST)
         else:
-            return JsonResponse(
-                {
-                    "message": "reCAPTCHA verification failed.",
-                },
-                status=500,
-            )
+            return self._recaptcha_failed_response()
 
     def verifyRecaptchaV2(self, g_recaptcha_response):
+        # Send request to Google
+        with CircuitBreaker("recaptcha"):
+            r = get_http_session().post(
+                "https://www.google.com/recaptcha/api/siteverify",
+                data=self._recaptcha_data(g_recaptcha_response),
+            )
+            r.raise_for_status()
+        result = r.json()
+
+        return result["success"]
+
+    def _recaptcha_data(self, g_recaptcha_response) -> dict:
         # Build POST request
-        data = {
+        return {
             "secret": env("RECAPTCHA_SECRET"),
             "response": g_recaptcha_response,
         }
-        # Send request to Google
-        r = requests.post("https://www.google.com/recaptcha/api/siteverify", data=data)
+
+    def _send_contact_email(self, form_data):
+        # Get the form data
+        fname = form_data.get("first_name")
+        lname = form_data.get("last_name")
+        email = form_data.get("email")
+        message = form_data.get("message")
+
+        try:
+            logger.info("Recaptcha verified. Sending email...")
+            sendEmail(
+                env("OWNER_EMAIL"),
+                "Un nouveau message a été envoyé depuis le site web",
+                "contact_email.html",
+                {
+                    "fname": fname,
+                    "lname": lname,
+                    "email": email,
+                    "message": message,
+                },
+            )
+
+            return JsonResponse(
+                {
+                    "message": "Email sent successfully.",
+                },
+                status=200,
+            )
+
+        except Exception as error:
+            logger.error(f"An exception occurred: {error}")
+            return JsonResponse(
+                {
+                    "message": f"An error occurred: {error}",
+                },
+                status=500,
+            )
+
+    def _recaptcha_failed_response(self):
+        return JsonResponse(
+            {
+                "message": "reCAPTCHA verification failed.",
+            },
+            status=500,
+        )
+
+
+class AsyncEmailSender(EmailSender):
+    """
+    Async version of EmailSender (see PROXY_ASYNC_VIEWS in settings). reCAPTCHA is verified with the
+    shared async HTTP client and the email is sent over SMTP in a thread, outside of the event loop.
+    """
+
+    async def post(self, request):
+        try:
+            is_human = await self.averifyRecaptchaV2(request.POST.get("recaptcha_token"))
+        except CircuitOpenError as error:
+            return circuit_open_response(error)
+
+        if is_human:
+            return await sync_to_async(self._send_contact_email, thread_sensitive=False)(
+                request.POST
+            )
+        else:
+            return self._recaptcha_failed_response()
+
+    async def averifyRecaptchaV2(self, g_recaptcha_response):
+        async with CircuitBreaker("recaptcha"):
+            r = await get_async_http_client().post(
+                "https://www.google.com/recaptcha/api/siteverify",
+                data=self._recaptcha_data(g_recaptcha_response),
+            )
+            r.raise_for_status()
         result = r.json()
 
         return result["success"]
@@ -39,12 +39,32 @@ async function sendProxyRequest(path, data) {
     }
 }
 
+/**
+ * Send a GET request to proxy server, the response can be cached by the browser (see AushaProxy).
+ * 
+ * @param {string} path - The path of the proxy endpoint
+ * @param {object} params - The query string parameters
+ * @returns {Promise} - Promise object representing the result of the request
+ * @throws {Error} - Error object
+ */
+async function sendCacheableProxyRequest(path, params) {
+    const url = window.location.origin + '/' + path;
+
+    try {
+        const response = await axios.get(url, { params });
+        return response.data;
+    } catch (error) {
+        throw error;
+    }
+}
+
 // ======================== //
 // === Aush Podcast API === //
 // ======================== //
 
 /**
  * Get the last 'n' podcasts from the Ausha API.
+ * Only the attributes used by the podcast player are requested (see PODCAST_FIELDS in proxy/utils/ausha.py).
  * 
  * @param {number} numberOfPodcasts - Number of podcasts to retrieve (if left empty, all podcasts are retrieved)
  * @returns {Promise} - Promise object representing the last 'n' podcasts
@@ -64,17 +84,47 @@ async function sendProxyRequest(path, data) {
 export async function getAushaPodcasts(numberOfPodcasts = 0) {
     const data = {
         show_id: 44497,
+        fields: 'id,name,html_description,image_url,audio_url,created_at',
     };
 
+    if (numberOfPodcasts > 0) {
+        data.limit = numberOfPodcasts; // Only the requested podcasts are sent by the proxy
+    }
+
     try {
-        const allPodcasts = await sendProxyRequest('api/proxy/ausha/', data);
-        return (numberOfPodcasts > 0) ? allPodcasts.data.slice(0, numberOfPodcasts) : allPodcasts;
+        const podcasts = await sendCacheableProxyRequest('api/proxy/ausha/', data);
+        return (numberOfPodcasts > 0) ? podcasts.data : podcasts;
     } catch (error) {
         console.error('Error retrieving podcasts:', error);
         throw error;
     }
 }
 
+/**
+ * Get a page of podcasts from the Ausha proxy, with the total number of podcasts of the show.
+ * Only the attributes used by the podcast player are requested (see PODCAST_FIELDS in proxy/utils/ausha.py).
+ *
+ * @param {number} offset - Number of podcasts to skip (most recent first)
+ * @param {number} limit - Number of podcasts of the page
+ * @returns {Promise} - Promise object representing the page, like {data: [...], meta: {offset, limit, total}}
+ * @throws {Error} - Error object
+ */
+export async function getAushaPodcastsPage(offset, limit) {
+    const data = {
+        show_id: 44497,
+        fields: 'id,name,html_description,image_url,audio_url,created_at',
+        offset: offset,
+        limit: limit,
+    };
+
+    try {
+        return await sendCacheableProxyRequest('api/proxy/ausha/', data);
+    } catch (error) {
+        console.error('Error retrieving podcasts page:', error);
+        throw error;
+    }
+}
+
 // ===================== //
 // === Mailchimp API === //
 // ===================== //
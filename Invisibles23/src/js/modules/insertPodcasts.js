@@ -2,59 +2,86 @@
  * Instantiate the PodcastPlayer class and attach it to the container
  */
 import {PodcastPlayer} from './common/utils/PodcastPlayer.js';
-import {getAushaPodcasts} from './common/utils/api.js';
+import {getAushaPodcasts, getAushaPodcastsPage} from './common/utils/api.js';
 
 /**
- * Create the last podcasts for the homepage section
+ * Get the podcasts rendered by the server in the page (json_script "podcasts-data"),
+ * or from the API if the page has none (e.g. episodes not synchronised yet).
+ * @param {number} numberOfPodcasts - Number of podcasts to retrieve (if left empty, all podcasts are retrieved)
+ * @returns {Promise<Array>} - Promise object representing the podcasts array
+ */
+function getPodcasts(numberOfPodcasts = 0) {
+    const podcastsData = document.getElementById('podcasts-data');
+    const podcasts = podcastsData ? JSON.parse(podcastsData.textContent) : [];
+
+    if (podcasts && podcasts.length > 0) {
+        return Promise.resolve((numberOfPodcasts > 0) ? podcasts.slice(0, numberOfPodcasts) : podcasts);
+    }
+
+    return getAushaPodcasts(numberOfPodcasts)
+        .then(podcasts => (numberOfPodcasts > 0) ? podcasts : podcasts.data);
+}
+
+/**
+ * Check if the podcasts have been rendered by the server (no need to show the spinners)
+ * @returns {boolean}
+ */
+function hasServerRenderedPodcasts() {
+    const podcastsData = document.getElementById('podcasts-data');
+    return podcastsData !== null && JSON.parse(podcastsData.textContent).length > 0;
+}
+
+/**
+ * Create the last podcasts for the homepage section.
+ * The cards rendered by the server (.podcast-slot) are replaced by the players, the episodes missing
+ * from the page (.lastPodcastN containers, e.g. episodes not synchronised yet) are fetched from the API.
  * @returns {HTMLDivElement}
  */
 export function homepagePodcasts() {
     const spinners = document.querySelectorAll('.load-spinner');
     const noPodcastsError = document.querySelectorAll('.no-podcast-error');
 
-    // Show spinners while fetching the podcasts
-    spinners.forEach((spinner) => {
-        spinner.classList.remove('d-none');
-    });
+    // Get the containers where the podcast players will be attached
+    const podcastSlots = document.querySelectorAll('.podcast-slot');
+    const playerContainers = [1, 2, 3, 4].map(i => document.querySelectorAll(`.lastPodcast${i}`));
+    const missingPodcasts = playerContainers.some(containers => containers.length > 0);
 
-    // Get the last 4 podcasts from the API
+    // Show spinners while fetching the podcasts (if some are missing from the page)
+    if (missingPodcasts) {
+        spinners.forEach((spinner) => {
+            spinner.classList.remove('d-none');
+        });
+    }
+
+    // Get the last 4 podcasts (from the page, or from the API if some are missing)
     const n = 4; // Get the last 4 podcasts
-    getAushaPodcasts(4)
-        .then(podcasts => {
+    const podcastsRequest = missingPodcasts ? getAushaPodcasts(n) : getPodcasts(n);
+    podcastsRequest
+        .then(podcastArray => {
             // Hide the spinner
             spinners.forEach((spinner) => {
                 spinner.classList.add('d-none');
             });
 
-            //console.log('Last', n, 'podcasts:', podcasts);
-            
-            // Assign the podcasts to the podcastArray
-            const podcastArray = podcasts;
-
-            // Get the containers where the podcast players will be attached
-            const playerContainers1 = document.querySelectorAll('.lastPodcast1');
-            const playerContainers2 = document.querySelectorAll('.lastPodcast2');
-            const playerContainers3 = document.querySelectorAll('.lastPodcast3');
-            const playerContainers4 = document.querySelectorAll('.lastPodcast4');
-
-            playerContainers1.forEach((playerContainer) => {
-                let podcastPlayer = new PodcastPlayer(podcastArray[0]);
-                podcastPlayer.attachPodcastTo(playerContainer);
-            });
-            
-            playerContainers2.forEach((playerContainer) => {
-                let podcastPlayer = new PodcastPlayer(podcastArray[1]);
-                podcastPlayer.attachPodcastTo(playerContainer);
-            });
-            
-            playerContainers3.forEach((playerContainer) => {
-                let podcastPlayer = new PodcastPlayer(podcastArray[2]);
-                podcastPlayer.attachPodcastTo(playerContainer);
+            // Replace the server rendered cards
+            podcastSlots.forEach((podcastSlot) => {
+                const podcastData = podcastArray[parseInt(podcastSlot.dataset.podcastIndex, 10)];
+                if (podcastData) {
+                    podcastSlot.innerHTML = '';
+                    let podcastPlayer = new PodcastPlayer(podcastData);
+                    podcastPlayer.attachPodcastTo(podcastSlot);
+                }
             });
 
-            playerContainers4.forEach((playerContainer) => {
-                let podcastPlayer = new PodcastPlayer(podcastArray[3]);
-                podcastPlayer.attachPodcastTo(playerContainer);
+            // Attach the players of the podcasts missing from the page
+            playerContainers.forEach((containers, index) => {
+                if (!podcastArray[index]) {
+                    return;
+                }
+                containers.forEach((playerContainer) => {
+                    let podcastPlayer = new PodcastPlayer(podcastArray[index]);
+                    podcastPlayer.attachPodcastTo(playerContainer);
+                });
             });
         })
         .catch(error => {
@@ -62,59 +89,116 @@ export function homepagePodcasts() {
             spinners.forEach((spinner) => {
                 spinner.classList.add('d-none');
             });
-            // Show an error message
-            noPodcastsError.forEach((errorContainer) => {
-                errorContainer.classList.remove('d-none');
-            })
+            // Show an error message (the server rendered cards are kept otherwise)
+            if (missingPodcasts) {
+                noPodcastsError.forEach((errorContainer) => {
+                    errorContainer.classList.remove('d-none');
+                })
+            }
             // Handle the error
             console.error('Error retrieving podcasts:', error);
         });
 }
 
 /**
- * Create the podcasts for the podcasts page
+ * Get the first page of the podcasts page: rendered by the server with the total number of podcasts
+ * (data attributes of the container), or from the API if the page has none.
+ * @param {HTMLElement} container - The podcasts container
+ * @param {number} playersPerPage - Number of podcasts per page
+ * @returns {Promise<Object>} - Promise object representing the page, like {podcasts: [...], total: 42}
+ */
+function getFirstPodcastsPage(container, playersPerPage) {
+    if (hasServerRenderedPodcasts()) {
+        return getPodcasts().then(podcasts => ({
+            podcasts: podcasts,
+            total: parseInt(container.dataset.total, 10) || podcasts.length,
+        }));
+    }
+
+    return getAushaPodcastsPage(0, playersPerPage)
+        .then(page => ({podcasts: page.data, total: page.meta.total}));
+}
+
+/**
+ * Create the podcasts for the podcasts page.
+ * Only the first page is in the page, the other pages are fetched from the API when selected.
  * @returns {HTMLDivElement}
  */
 export function podcastsPage() {
     const spinner = document.getElementById('podcast-load-spin');
     const noPodcastsError = document.querySelectorAll('.no-podcast-error');
+    const container = document.getElementById('podcasts-section-container');
+    const playersPerPage = parseInt(container.dataset.perPage, 10) || 4;
+
+    /**
+     * Show the error message instead of the podcasts
+     * @param {Error} error
+     */
+    function showError(error) {
+        // Hide the spinner
+        spinner.classList.add('d-none');
+        // Show an error message
+        noPodcastsError.forEach((errorContainer) => {
+            errorContainer.classList.remove('d-none');
+        })
+        // Handle the error
+        console.error('Error retrieving podcasts:', error);
+    }
+
+    // Show the spinner while fetching the podcasts (if not rendered by the server)
+    if (!hasServerRenderedPodcasts()) {
+        spinner.classList.remove('d-none');
+    }
 
-    // Show the spinner while fetching the podcasts
-    spinner.classList.remove('d-none');
-    
-    // Get all the podcasts from the API
-    getAushaPodcasts()
-        .then(podcasts => {
+    // Get the first page (from the page or from the API)
+    getFirstPodcastsPage(container, playersPerPage)
+        .then(firstPage => {
             // Hide the spinner
             spinner.classList.add('d-none');
 
-            // Assign the podcasts to the podcastArray
-            const podcastArray = podcasts.data; 
-
-            const playersPerPage = 4;
+            // Podcasts of the pages already fetched, by page number
+            const pages = new Map([[1, firstPage.podcasts]]);
             let currentPage = 1;
-            const container = document.getElementById('podcasts-section-container');
-            
-            const totalPlayers = podcastArray.length;
-            const totalPages = Math.ceil(totalPlayers / playersPerPage);
+            const totalPages = Math.ceil(firstPage.total / playersPerPage);
 
             /**
-             * Instantiate the players to display
+             * Get the podcasts of a page, from the API if it was not fetched yet
+             * @param {number} pageNumber
+             * @returns {Promise<Array>}
+             */
+            function getPage(pageNumber) {
+                if (pages.has(pageNumber)) {
+                    return Promise.resolve(pages.get(pageNumber));
+                }
+                const offset = (pageNumber - 1) * playersPerPage;
+                return getAushaPodcastsPage(offset, playersPerPage)
+                    .then(page => {
+                        pages.set(pageNumber, page.data);
+                        return page.data;
+                    });
+            }
+
+            /**
+             * Instantiate the players of the current page
              */
             function instantiatePlayers() {
-                const startIndex = (currentPage - 1) * playersPerPage; // Determine the start index of the players to display
-                const endIndex = startIndex + playersPerPage; // Determine the end index of the players to display
-                const players = podcastArray.slice(startIndex, endIndex); // Get the players to display 
-    
-                // Clear container
-                container.innerHTML = '';
-
-                players.forEach(data => {
-                    const player = createPlayerRows(data);
-                    container.appendChild(player);
-                });
+                spinner.classList.remove('d-none');
+
+                getPage(currentPage)
+                    .then(players => {
+                        spinner.classList.add('d-none');
+
+                        // Clear container
+                        container.innerHTML = '';
+
+                        players.forEach(data => {
+                            const player = createPlayerRows(data);
+                            container.appendChild(player);
+                        });
 
-                createPagination();
+                        createPagination();
+                    })
+                    .catch(showError);
             }
 
             /**
@@ -178,14 +262,5 @@ export function podcastsPage() {
 
             instantiatePlayers();
         })
-        .catch(error => {
-            // Hide the spinner
-            spinner.classList.add('d-none');
-            // Show an error message
-            noPodcastsError.forEach((errorContainer) => {
-                errorContainer.classList.remove('d-none');
-            })
-            // Handle the error
-            console.error('Error retrieving podcasts:', error);
-        });   
+        .catch(showError);
 }
\ No newline at end of file
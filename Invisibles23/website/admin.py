@@ -21,6 +21,10 @@ from .models import (
     Members,
     MembershipPlans,
     Volunteers,
+    PodcastEpisode,
+    WebhookEvent,
+    StripePrice,
+    SeatHold,
 )
 from django.utils import timezone
 from django.contrib.auth.models import User, Permission
@@ -56,6 +60,10 @@ class CustomAdminSite(AdminSite):
             "Members": 20,
             "MembershipPlans": 121,
             "Volunteers": 22,
+            "PodcastEpisode": 23,
+            "WebhookEvent": 24,
+            "StripePrice": 25,
+            "SeatHold": 26,
         }
         
         # Get the original app list
@@ -110,6 +118,7 @@ class EventAdmin(admin.ModelAdmin):
         "date",
         "title",
         "is_talk_event",
+        "participant_count",
         "is_fully_booked",
     )
     
@@ -131,7 +140,7 @@ class EventAdmin(admin.ModelAdmin):
     )  # Add filters for date and location
     inlines = [ParticipantInline]
 
-    readonly_fields = ("is_fully_booked",)
+    readonly_fields = ("is_fully_booked", "participant_count")
 
     fieldsets = (
         (
@@ -166,6 +175,7 @@ class EventAdmin(admin.ModelAdmin):
             {
                 "fields": (
                     "is_fully_booked",
+                    "participant_count",
                     "short_description",
                     "full_description",
                     "address",
@@ -342,6 +352,140 @@ class VolunteersAdmin(admin.ModelAdmin):
     )
 
 
+class PodcastEpisodeAdmin(admin.ModelAdmin):
+    """
+    Customize the PodcastEpisode admin page (episodes are synchronised from Ausha, see sync_ausha_episodes).
+    """
+    # Order by
+    ordering = ["-created_at"]
+
+    # Customize fields displayed in list view
+    list_display = (
+        "name",
+        "created_at",
+        "duration",
+        "show_id",
+        "synced_at",
+    )
+
+    # Add search functionality
+    search_fields = [
+        "name",
+    ]
+
+    # Episodes are managed on Ausha
+    readonly_fields = ("synced_at",)
+
+
+class WebhookEventAdmin(admin.ModelAdmin):
+    """
+    Customize the WebhookEvent admin page (Stripe events processed by the process_webhook_events command).
+    """
+    # Order by
+    ordering = ["-received_at"]
+
+    # Customize fields displayed in list view
+    list_display = (
+        "event_type",
+        "stripe_event_id",
+        "status",
+        "attempts",
+        "received_at",
+        "processed_at",
+        "next_attempt_at",
+    )
+
+    # Add filter functionality
+    list_filter = ("status", "event_type")
+
+    # Add search functionality
+    search_fields = [
+        "stripe_event_id",
+    ]
+
+    # Events are received from Stripe
+    readonly_fields = (
+        "stripe_event_id",
+        "event_type",
+        "payload",
+        "attempts",
+        "error",
+        "received_at",
+        "processed_at",
+        "next_attempt_at",
+    )
+
+    actions = ["retry_events"]
+
+    @admin.action(description="Retraiter les événements sélectionnés")
+    def retry_events(self, request, queryset):
+        count = queryset.update(
+            status=WebhookEvent.PENDING, attempts=0, error="", next_attempt_at=timezone.now()
+        )
+        self.message_user(request, f"{count} événement(s) seront retraités par le worker.")
+
+
+class StripePriceAdmin(admin.ModelAdmin):
+    """
+    Customize the StripePrice admin page (prices are synchronised from Stripe, see sync_stripe_prices).
+    """
+    # Order by
+    ordering = ["lookup_key"]
+
+    # Customize fields displayed in list view
+    list_display = (
+        "lookup_key",
+        "product_name",
+        "unit_amount",
+        "currency",
+        "recurring_interval",
+        "active",
+        "synced_at",
+    )
+
+    # Add search functionality
+    search_fields = [
+        "lookup_key",
+        "product_name",
+    ]
+
+    # Prices are managed on Stripe
+    readonly_fields = (
+        "lookup_key",
+        "price_id",
+        "product_id",
+        "product_name",
+        "unit_amount",
+        "currency",
+        "recurring_interval",
+        "active",
+        "synced_at",
+    )
+
+
+class SeatHoldAdmin(admin.ModelAdmin):
+    """
+    Customize the SeatHold admin page (holds are created by the event registration checkout).
+    """
+    # Order by
+    ordering = ["expires_at"]
+
+    # Customize fields displayed in list view
+    list_display = (
+        "email",
+        "event",
+        "checkout_session_id",
+        "expires_at",
+        "created_at",
+    )
+
+    # Add search functionality
+    search_fields = [
+        "email",
+        "event__title",
+    ]
+
+
 # Create an instance of the custom admin site
 custom_admin_site = CustomAdminSite(name="custom_admin")
 
@@ -368,6 +512,10 @@ custom_admin_site.register(AssoStatus)
 custom_admin_site.register(Members, MembersAdmin)
 custom_admin_site.register(MembershipPlans, MembershipPlanAdmin)
 custom_admin_site.register(Volunteers, VolunteersAdmin)
+custom_admin_site.register(PodcastEpisode, PodcastEpisodeAdmin)
+custom_admin_site.register(WebhookEvent, WebhookEventAdmin)
+custom_admin_site.register(StripePrice, StripePriceAdmin)
+custom_admin_site.register(SeatHold, SeatHoldAdmin)
 
 custom_admin_site.site_header = "Les Invisibles Administration"
 custom_admin_site.site_title = "Les Invisibles Admin"
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class WebsiteConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "website"
+
+    def ready(self):
+        from . import checks  # noqa: F401 (registers the system checks)
+
+        # Cached pages are invalidated when the models they render change
+        from .utils.page_cache import connect_page_cache_signals
+
+        connect_page_cache_signals()
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.checks import Error, register
+from .utils.seat_holds import STRIPE_SESSION_MAX_LIFETIME, STRIPE_SESSION_MIN_LIFETIME
+
+
+@register()
+def check_seat_hold_ttl(app_configs, **kwargs):
+    """
+    SEAT_HOLD_TTL is the lifetime of the Stripe checkout sessions of the events, Stripe refuses to
+    create a session expiring in less than 30 minutes or more than 24 hours.
+    """
+    if STRIPE_SESSION_MIN_LIFETIME <= settings.SEAT_HOLD_TTL <= STRIPE_SESSION_MAX_LIFETIME:
+        return []
+    return [
+        Error(
+            f"SEAT_HOLD_TTL ({settings.SEAT_HOLD_TTL}s) is not a lifetime of checkout session accepted by Stripe.",
+            hint=f"Set SEAT_HOLD_TTL between {STRIPE_SESSION_MIN_LIFETIME} and {STRIPE_SESSION_MAX_LIFETIME} seconds",
+            id="website.E001",
+        )
+    ]
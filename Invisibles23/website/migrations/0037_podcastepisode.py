@@ -0,0 +1,35 @@
+# Generated by Django 5.0.7 on 2026-10-18 08:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0036_alter_volunteers_options'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PodcastEpisode',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ausha_id', models.PositiveBigIntegerField(unique=True, verbose_name='ID Ausha')),
+                ('show_id', models.PositiveIntegerField(verbose_name="ID de l'émission Ausha")),
+                ('name', models.CharField(max_length=255, verbose_name="Titre de l'épisode")),
+                ('html_description', models.TextField(blank=True, verbose_name="Description de l'épisode (HTML)")),
+                ('image_url', models.URLField(blank=True, max_length=500, verbose_name="Lien de l'image")),
+                ('audio_url', models.URLField(blank=True, max_length=500, verbose_name="Lien de l'audio")),
+                ('duration', models.PositiveIntegerField(blank=True, null=True, verbose_name='Durée (secondes)')),
+                ('created_at', models.DateTimeField(verbose_name='Date de création sur Ausha')),
+                ('payload', models.JSONField(default=dict, verbose_name='Données brutes Ausha')),
+                ('synced_at', models.DateTimeField(auto_now=True, verbose_name='Date de synchronisation')),
+            ],
+            options={
+                'verbose_name': 'BDD - Épisode podcast',
+                'verbose_name_plural': 'BDD - Épisodes podcast',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['show_id', '-created_at'], name='podcast_show_created_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.0.7 on 2026-10-18 08:26
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0037_podcastepisode'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WebhookEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stripe_event_id', models.CharField(db_index=True, max_length=255, verbose_name="ID de l'événement Stripe")),
+                ('event_type', models.CharField(max_length=100, verbose_name="Type d'événement")),
+                ('payload', models.JSONField(verbose_name='Événement Stripe')),
+                ('status', models.CharField(choices=[('pending', 'En attente'), ('processing', 'En cours de traitement'), ('processed', 'Traité'), ('failed', 'Échec')], default='pending', max_length=20, verbose_name='Statut')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Nombre de tentatives')),
+                ('error', models.TextField(blank=True, verbose_name='Dernière erreur')),
+                ('received_at', models.DateTimeField(auto_now_add=True, verbose_name='Date de réception')),
+                ('processed_at', models.DateTimeField(blank=True, null=True, verbose_name='Date de traitement')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Prochaine tentative')),
+            ],
+            options={
+                'verbose_name': 'BDD - Événement webhook Stripe',
+                'verbose_name_plural': 'BDD - Événements webhook Stripe',
+                'ordering': ['-received_at'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='webhook_status_next_idx')],
+            },
+        ),
+    ]
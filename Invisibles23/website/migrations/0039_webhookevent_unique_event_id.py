@@ -0,0 +1,18 @@
+# Generated by Django 5.0.7 on 2026-10-18 08:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0038_webhookevent'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='webhookevent',
+            name='stripe_event_id',
+            field=models.CharField(max_length=255, unique=True, verbose_name="ID de l'événement Stripe"),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.7 on 2026-10-18 08:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0039_webhookevent_unique_event_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StripePrice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('lookup_key', models.CharField(max_length=255, unique=True, verbose_name='Clé de recherche')),
+                ('price_id', models.CharField(max_length=255, unique=True, verbose_name='ID du prix Stripe')),
+                ('product_id', models.CharField(max_length=255, verbose_name='ID du produit Stripe')),
+                ('product_name', models.CharField(blank=True, max_length=255, verbose_name='Nom du produit')),
+                ('unit_amount', models.PositiveIntegerField(blank=True, null=True, verbose_name='Montant (centimes)')),
+                ('currency', models.CharField(max_length=3, verbose_name='Devise')),
+                ('recurring_interval', models.CharField(blank=True, max_length=10, verbose_name='Intervalle de paiement')),
+                ('active', models.BooleanField(default=True, verbose_name='Actif')),
+                ('synced_at', models.DateTimeField(auto_now=True, verbose_name='Date de synchronisation')),
+            ],
+            options={
+                'verbose_name': 'BDD - Prix Stripe',
+                'verbose_name_plural': 'BDD - Prix Stripe',
+                'ordering': ['lookup_key'],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.7 on 2026-10-18 08:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0040_stripeprice'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='members',
+            index=models.Index(fields=['email', 'is_subscription_active'], name='member_email_active_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.0.7 on 2026-10-18 08:39
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_participants(apps, schema_editor):
+    """
+    Initialise the participant counter of the existing events.
+    """
+    Event = apps.get_model("website", "Event")
+    EventParticipants = apps.get_model("website", "EventParticipants")
+    participants = (
+        EventParticipants.objects.filter(event=OuterRef("pk"))
+        .values("event")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    Event.objects.update(participant_count=Coalesce(Subquery(participants), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0041_members_email_active_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='participant_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Nombre de participants inscrits'),
+        ),
+        migrations.RunPython(count_participants, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.0.7 on 2026-10-18 08:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0042_event_participant_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeatHold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email', models.EmailField(max_length=254, verbose_name='Email')),
+                ('checkout_session_id', models.CharField(blank=True, max_length=255, null=True, unique=True, verbose_name='ID de la session de paiement Stripe')),
+                ('expires_at', models.DateTimeField(verbose_name="Date d'expiration")),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='seat_holds', to='website.event', verbose_name='Événement')),
+            ],
+            options={
+                'verbose_name': 'BDD - Réservation temporaire',
+                'verbose_name_plural': 'BDD - Réservations temporaires',
+                'ordering': ['expires_at'],
+                'indexes': [models.Index(fields=['event', 'expires_at'], name='seathold_event_expires_idx'), models.Index(fields=['expires_at'], name='seathold_expires_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.7 on 2026-10-18 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0043_seathold'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='members',
+            name='subscription_confirmed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name="Statut d'adhésion confirmé le"),
+        ),
+    ]
@@ -1,4 +1,8 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 from django.conf import settings
 from Invisibles23.logging_config import logger
 from Invisibles23.logging_utils import log_debug_info
@@ -6,6 +10,7 @@ from django.core.exceptions import ValidationError
 from ckeditor.fields import RichTextField
 from django.utils.safestring import mark_safe
 from datetime import date
+from django.utils import timezone
 from cloudinary.models import CloudinaryField
 
 
@@ -331,6 +336,9 @@ class Event(models.Model):
     is_fully_booked = models.BooleanField(
         default=False, verbose_name="Évènement complet"
     )
+    participant_count = models.PositiveIntegerField(
+        default=0, verbose_name="Nombre de participants inscrits"
+    )  # Updated with the EventParticipants rows (see EventParticipants.save), repaired by repair_participant_counts
     participants = models.ManyToManyField(
         "Participant",
         through="EventParticipants",
@@ -401,7 +409,10 @@ class Event(models.Model):
 
         # Check if the participants limit is not lower than the current number of participants
         if self.id:
-            participant_count = EventParticipants.objects.filter(event=self).count()
+            participant_count = (
+                Event.objects.filter(pk=self.id).values_list("participant_count", flat=True).first()
+                or 0
+            )
             if self.participants_limit < participant_count:
                 raise ValidationError(
                     "Le nombre maximum de participants ne peut pas être inférieur au nombre actuel de participants déjà inscrits !"
@@ -425,11 +436,12 @@ class Event(models.Model):
     def save(self, *args, **kwargs):
         log_debug_info("Saving event data:", self)
 
-        if self.pk:  # Only check for existing events
+        if self.pk and not self._state.adding:  # Only check for existing events
             current_event = Event.objects.get(pk=self.pk)
             current_participants_limit = current_event.participants_limit
+            self.participant_count = current_event.participant_count
             # Is there already participants for this event ?
-            if EventParticipants.objects.filter(event=self).exists():
+            if current_event.participant_count:
                 if self.is_fully_booked:
                     # In case event is already fully booked, check if the participants limit has been changed
                     if self.participants_limit != current_participants_limit:
@@ -447,6 +459,14 @@ class Event(models.Model):
                         new_limit = self.participants_limit
                         self._handle_limit_change(new_limit, current_participants_limit)
 
+            # The counter is only written by the participations (the instance may be outdated)
+            if kwargs.get("update_fields") is None:
+                kwargs["update_fields"] = [
+                    field.name
+                    for field in self._meta.concrete_fields
+                    if not field.primary_key and field.name != "participant_count"
+                ]
+
         super().save(*args, **kwargs)
 
     def _handle_limit_change(self, new_limit, current_limit):
@@ -465,8 +485,8 @@ class Event(models.Model):
                 f"New limit of {new_limit} is lower than the current limit of {current_limit}"
             )
             logger.info(f"Checking if the event is now fully booked with the new limit")
-            # Get the number of participants for this event
-            participant_count = EventParticipants.objects.filter(event=self).count()
+            # Number of participants for this event (counter read in save)
+            participant_count = self.participant_count
             if participant_count == new_limit:
                 logger.info(
                     f"Event with ID '{self.pk}' is now fully booked with the new limit of {new_limit}"
@@ -561,54 +581,71 @@ class EventParticipants(models.Model):
             "Saving EventParticipants object:", self, inspect_attributes=True
         )
 
-        # Number of participants for this event + 1 because the current participant is not yet counted
-        participant_count = (
-            EventParticipants.objects.filter(event=self.event).count() + 1
-        )
-        # Get the current limit of participants for this event
-        limit = self.event.participants_limit
-        logger.debug(
-            f"Set limit: {limit} - Total participants for event ID '{self.event.id}': {participant_count}"
-        )
-        if participant_count == limit:
-            logger.warning(
-                f"Event {self.event.title} is now fully booked, the limit is {limit} participants"
+        if not self._state.adding:  # Changing an existing participation does not change the count
+            return super().save(*args, **kwargs)
+
+        with transaction.atomic():
+            # Conditional update: the seat is only taken if the event is not full. The row stays locked
+            # until the end of the transaction, so concurrent registrations are serialised and the
+            # condition is evaluated again on the committed counter (no count then insert race)
+            seat_taken = Event.objects.filter(
+                pk=self.event.pk, participant_count__lt=F("participants_limit")
+            ).update(
+                # Both expressions read the values before the update
+                is_fully_booked=Case(
+                    When(participant_count__gte=F("participants_limit") - 1, then=Value(True)),
+                    default=F("is_fully_booked"),
+                ),
+                participant_count=F("participant_count") + 1,
             )
-            logger.info(f"Setting event with ID '{self.event.id}' as fully booked")
-            Event.objects.filter(pk=self.event.pk).update(is_fully_booked=True)
-        elif participant_count > limit:
-            logger.error(
-                f"Event with ID '{self.event.id}' is already fully booked ! Max participants: {limit}"
+            if not seat_taken:
+                logger.error(
+                    f"Event with ID '{self.event.id}' is already fully booked ! Max participants: {self.event.participants_limit}"
+                )
+                raise ValidationError("L'évènement est complet !")
+
+            participant_count, limit, is_fully_booked = Event.objects.values_list(
+                "participant_count", "participants_limit", "is_fully_booked"
+            ).get(pk=self.event.pk)
+            logger.debug(
+                f"Set limit: {limit} - Total participants for event ID '{self.event.id}': {participant_count}"
             )
-            raise ValidationError("L'évènement est complet !")
+            if participant_count == limit:
+                logger.warning(
+                    f"Event {self.event.title} is now fully booked, the limit is {limit} participants"
+                )
+                logger.info(f"Setting event with ID '{self.event.id}' as fully booked")
 
-        log_debug_info("EventParticipants object saved successfully !")
-        super().save(*args, **kwargs)
+            # Inserted in the same transaction: the seat is released if the insert fails
+            super().save(*args, **kwargs)
 
-    def delete(self, *args, **kwargs):
-        # Count the number of participants for this event minus the participant being deleted
-        participant_count = (
-            EventParticipants.objects.filter(event=self.event).count() - 1
-        )
-        # Get the limit of participants for this event
-        limit = self.event.participants_limit
-        logger.debug(
-            f"Set limit: {limit} - Total participants for event ID '{self.event.id}': {participant_count}"
-        )
-        if participant_count < limit:
-            logger.warning(
-                f"Event {self.event.title} is no longer fully booked, the limit is {limit} participants"
-            )
-            logger.info(f"Setting event with ID '{self.event.id}' as not fully booked")
-            Event.objects.filter(pk=self.event.pk).update(is_fully_booked=False)
-        # Delete the participant
-        super().delete(*args, **kwargs)
+        self.event.participant_count = participant_count
+        self.event.is_fully_booked = is_fully_booked
+        log_debug_info("EventParticipants object saved successfully !")
 
     def __str__(self):
         # Must check if it's a date obj to avoid err when __str__ is called (e.g : error when using log_debug_info)
         return f"{self.participant.email} - {self.event.title} - {self.event.date.strftime('%d/%m/%Y') if isinstance(self.event.date, date) else 'Évènement sans date'}"
 
 
+@receiver(post_delete, sender=EventParticipants)
+def release_participant_seat(sender, instance, **kwargs):
+    """
+    Decrement the participant counter of the event when a participation is deleted (also sent for
+    the queryset and cascade deletions, in the deletion transaction). The event is no longer fully
+    booked if the remaining participants are below the limit.
+    """
+    Event.objects.filter(pk=instance.event_id).update(
+        # Both expressions read the values before the update
+        is_fully_booked=Case(
+            When(participant_count__lte=F("participants_limit"), then=Value(False)),
+            default=F("is_fully_booked"),
+        ),
+        participant_count=Greatest(F("participant_count") - 1, Value(0)),
+    )
+    logger.info(f"Participation deleted, one seat released for event with ID '{instance.event_id}'")
+
+
 class TalkEventExplanationSection(BaseSections):
     """
     Talk event explanation section, to explain to visitors how the talk events registration works
@@ -726,6 +763,11 @@ class Members(models.Model):
     is_subscription_active = models.BooleanField(
         default=True, verbose_name="Adhésion active"
     )
+    # Last time is_subscription_active was set from Stripe (webhook or sync_member_subscriptions),
+    # an active status never confirmed is checked again with Stripe by MembershipView
+    subscription_confirmed_at = models.DateTimeField(
+        null=True, blank=True, verbose_name="Statut d'adhésion confirmé le"
+    )
     stripe_customer_id = models.CharField(
         max_length=250, verbose_name="ID client Stripe", blank=True
     )
@@ -742,6 +784,12 @@ class Members(models.Model):
     class Meta:
         verbose_name = "BDD - Membre"
         verbose_name_plural = "BDD - Membres"
+        indexes = [
+            # Active subscription check of MembershipView (index-only lookup)
+            models.Index(
+                fields=["email", "is_subscription_active"], name="member_email_active_idx"
+            ),
+        ]
 
     def __str__(self):
         return self.lname + " " + self.fname
@@ -822,3 +870,182 @@ class MembershipPlans(models.Model):
 
     def __str__(self):
         return self.name + " - " + self.frequency + " - " + str(self.price) + " CHF"
+
+
+class PodcastEpisode(models.Model):
+    """
+    Podcast episodes of the Ausha show, synchronised with the sync_ausha_episodes command
+    """
+
+    ausha_id = models.PositiveBigIntegerField(verbose_name="ID Ausha", unique=True)
+    show_id = models.PositiveIntegerField(verbose_name="ID de l'émission Ausha")
+    name = models.CharField(max_length=255, verbose_name="Titre de l'épisode")
+    html_description = models.TextField(
+        verbose_name="Description de l'épisode (HTML)", blank=True
+    )
+    image_url = models.URLField(
+        max_length=500, verbose_name="Lien de l'image", blank=True
+    )
+    audio_url = models.URLField(
+        max_length=500, verbose_name="Lien de l'audio", blank=True
+    )
+    duration = models.PositiveIntegerField(
+        verbose_name="Durée (secondes)", blank=True, null=True
+    )
+    created_at = models.DateTimeField(verbose_name="Date de création sur Ausha")
+    payload = models.JSONField(
+        verbose_name="Données brutes Ausha", default=dict
+    )  # Served as-is by the Ausha proxy (same format as the Ausha API)
+    synced_at = models.DateTimeField(
+        verbose_name="Date de synchronisation", auto_now=True
+    )
+
+    class Meta:
+        verbose_name = "BDD - Épisode podcast"
+        verbose_name_plural = "BDD - Épisodes podcast"
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["show_id", "-created_at"], name="podcast_show_created_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return self.name
+
+    def to_player_data(self) -> dict:
+        """
+        Return the fields used by the podcast player (see PodcastPlayer.js), in the Ausha API format.
+        """
+        return {
+            "id": self.ausha_id,
+            "name": self.name,
+            "html_description": self.html_description,
+            "image_url": self.image_url,
+            "audio_url": self.audio_url,
+            "created_at": self.created_at.isoformat(),
+        }
+
+
+class WebhookEvent(models.Model):
+    """
+    Inbox of the Stripe webhook events. The webhook only stores the verified event, it is then
+    processed by the process_webhook_events command (worker). Processed events are kept for
+    WEBHOOK_RETENTION_DAYS to ignore the retries of Stripe.
+    """
+
+    PENDING = "pending"
+    PROCESSING = "processing"
+    PROCESSED = "processed"
+    FAILED = "failed"
+
+    stripe_event_id = models.CharField(
+        max_length=255, verbose_name="ID de l'événement Stripe", unique=True
+    )  # Stripe retries the same event, it is stored and processed once
+    event_type = models.CharField(max_length=100, verbose_name="Type d'événement")
+    payload = models.JSONField(verbose_name="Événement Stripe")
+    status = models.CharField(
+        max_length=20,
+        verbose_name="Statut",
+        default=PENDING,
+        choices=[
+            (PENDING, "En attente"),
+            (PROCESSING, "En cours de traitement"),
+            (PROCESSED, "Traité"),
+            (FAILED, "Échec"),
+        ],
+    )
+    attempts = models.PositiveIntegerField(verbose_name="Nombre de tentatives", default=0)
+    error = models.TextField(verbose_name="Dernière erreur", blank=True)
+    received_at = models.DateTimeField(verbose_name="Date de réception", auto_now_add=True)
+    processed_at = models.DateTimeField(
+        verbose_name="Date de traitement", blank=True, null=True
+    )
+    next_attempt_at = models.DateTimeField(
+        verbose_name="Prochaine tentative", default=timezone.now
+    )  # Delays the retries of failed events and the recovery of events claimed by a stopped worker
+
+    class Meta:
+        verbose_name = "BDD - Événement webhook Stripe"
+        verbose_name_plural = "BDD - Événements webhook Stripe"
+        ordering = ["-received_at"]
+        indexes = [
+            models.Index(
+                fields=["status", "next_attempt_at"], name="webhook_status_next_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} ({self.stripe_event_id})"
+
+
+class StripePrice(models.Model):
+    """
+    Catalog of the Stripe prices by lookup key (e.g. reduced-yearly, talkGroup-registration-normal),
+    used to create the checkout sessions without calling Stripe. Synchronised with the
+    sync_stripe_prices command and updated by the price.* and product.* webhook events.
+    """
+
+    lookup_key = models.CharField(
+        max_length=255, verbose_name="Clé de recherche", unique=True
+    )
+    price_id = models.CharField(max_length=255, verbose_name="ID du prix Stripe", unique=True)
+    product_id = models.CharField(max_length=255, verbose_name="ID du produit Stripe")
+    product_name = models.CharField(
+        max_length=255, verbose_name="Nom du produit", blank=True
+    )
+    unit_amount = models.PositiveIntegerField(
+        verbose_name="Montant (centimes)", blank=True, null=True
+    )
+    currency = models.CharField(max_length=3, verbose_name="Devise")
+    recurring_interval = models.CharField(
+        max_length=10, verbose_name="Intervalle de paiement", blank=True
+    )  # Empty for one time payments
+    active = models.BooleanField(verbose_name="Actif", default=True)
+    synced_at = models.DateTimeField(
+        verbose_name="Date de synchronisation", auto_now=True
+    )
+
+    class Meta:
+        verbose_name = "BDD - Prix Stripe"
+        verbose_name_plural = "BDD - Prix Stripe"
+        ordering = ["lookup_key"]
+
+    def __str__(self):
+        return f"{self.lookup_key} ({self.price_id})"
+
+
+class SeatHold(models.Model):
+    """
+    Seat of an event held while a visitor pays on the Stripe checkout page, so the last seats are not
+    sold twice during a registration rush. The hold expires with the checkout session and is released
+    when the payment is confirmed (checkout.session.completed) or the session expires
+    (checkout.session.expired). See website/utils/seat_holds.py.
+    """
+
+    event = models.ForeignKey(
+        Event, on_delete=models.CASCADE, related_name="seat_holds", verbose_name="Événement"
+    )
+    email = models.EmailField(verbose_name="Email")
+    checkout_session_id = models.CharField(
+        max_length=255,
+        verbose_name="ID de la session de paiement Stripe",
+        unique=True,
+        blank=True,
+        null=True,
+    )  # Set once the checkout session is created
+    expires_at = models.DateTimeField(verbose_name="Date d'expiration")
+    created_at = models.DateTimeField(verbose_name="Date de création", auto_now_add=True)
+
+    class Meta:
+        verbose_name = "BDD - Réservation temporaire"
+        verbose_name_plural = "BDD - Réservations temporaires"
+        ordering = ["expires_at"]
+        indexes = [
+            # Active holds of an event (available seats) and expired holds (sweep)
+            models.Index(fields=["event", "expires_at"], name="seathold_event_expires_idx"),
+            models.Index(fields=["expires_at"], name="seathold_expires_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.email} - {self.event.title} (jusqu'au {self.expires_at:%d/%m/%Y %H:%M})"
@@ -1,12 +1,53 @@
-from django.test import TestCase, override_settings
+from django.test import (
+    AsyncRequestFactory,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+    skipUnlessDBFeature,
+)
 from django.contrib.auth.models import User
 from django.urls import reverse
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.utils import timezone
+from datetime import timedelta
 import unittest
-from .views import EventRegistrationView
+from .views import EventRegistrationView, AsyncEventRegistrationView, AsyncMembershipView
 from proxy.views import StripeWebhook
-from .models import Event, Participant, EventParticipants
+from django.conf import settings
+from django.core.cache import cache
+from .models import (
+    Event,
+    Participant,
+    EventParticipants,
+    PodcastEpisode,
+    StripePrice,
+    Members,
+    MembershipPlans,
+    SeatHold,
+    HomeSections,
+    ContactSection,
+)
+from .utils.stripe_prices import get_stripe_price, store_stripe_price, stripe_price_cache_key
+from .utils.seat_holds import (
+    attach_checkout_session,
+    available_seats,
+    hold_seat,
+    release_expired_seat_holds,
+    SESSION_EXPIRY_MARGIN,
+)
+from .checks import check_seat_hold_ttl
+from .utils.checkout_sessions import forget_checkout_session, get_open_checkout_session
+from .utils.page_cache import CSRF_PLACEHOLDER, invalidate_pages
 from Invisibles23.logging_config import logger
+import asyncio
 import random
+import threading
+import time
+import io
+from django.core.management import call_command
+from unittest.mock import patch, Mock
+from asgiref.sync import sync_to_async
 
 # ======================================= #
 # ====== MEMBER REGISTRATION TESTS ====== #
@@ -93,6 +134,117 @@ class MembershipViewTest(TestCase):
         )
         logger.debug(f"Error inputs: {error_inputs_list}")
 
+    @patch("website.views.stripe.Customer.search")
+    def test_active_member_checked_locally(self, mock_customer_search):
+        """
+        An active member should be rejected from the Members table, without querying Stripe.
+        """
+        plan = MembershipPlans.objects.create(
+            name="Reduced", price=25, frequency="yearly", lookup_key="reduced-yearly"
+        )
+        Members.objects.create(
+            fname="John",
+            lname="Doe",
+            email=self.member["email"],
+            birthdate="1990-01-01",
+            address="123 Test Street",
+            zip_code="1234",
+            city="Test City",
+            membership_plan=plan,
+            is_subscription_active=True,
+            subscription_confirmed_at=timezone.now(),
+        )
+
+        response = self.client.post("/membership/", self.member)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("adhésion active", response.context["error_messages"])
+        mock_customer_search.assert_not_called()
+
+    @patch("website.utils.stripe_prices.stripe.Price.list")
+    @patch("website.views.stripe.Customer.search")
+    def test_unconfirmed_active_member_checked_on_stripe(self, mock_customer_search, mock_price_list):
+        """
+        A member active by default (never confirmed by Stripe) should be checked with Stripe, and can
+        join again if their subscription was cancelled.
+        """
+        cache.clear()
+        plan = MembershipPlans.objects.create(
+            name="Reduced", price=25, frequency="yearly", lookup_key="reduced-yearly"
+        )
+        member = Members.objects.create(
+            fname="John",
+            lname="Doe",
+            email=self.member["email"],
+            birthdate="1990-01-01",
+            address="123 Test Street",
+            zip_code="1234",
+            city="Test City",
+            membership_plan=plan,
+        )
+        subscriptions = Mock(data=[Mock(status="canceled")])
+        mock_customer_search.return_value = Mock(data=[Mock(id="cus_123", subscriptions=subscriptions)])
+        mock_price_list.side_effect = Exception("Stripe unavailable")
+
+        response = self.client.post("/membership/", self.member)
+
+        self.assertNotIn("adhésion active", response.context["error_messages"])
+        mock_customer_search.assert_called_once()
+        member.refresh_from_db()
+        self.assertFalse(member.is_subscription_active)
+        self.assertIsNotNone(member.subscription_confirmed_at)
+
+    @patch("website.views.stripe.Customer.search")
+    def test_unknown_member_checked_on_stripe_customer(self, mock_customer_search):
+        """
+        An email unknown locally should only query its Stripe customer (with its subscriptions).
+        """
+        subscriptions = Mock(data=[Mock(status="canceled"), Mock(status="active")])
+        mock_customer_search.return_value = Mock(data=[Mock(id="cus_123", subscriptions=subscriptions)])
+
+        response = self.client.post("/membership/", self.member)
+
+        self.assertIn("adhésion active", response.context["error_messages"])
+        mock_customer_search.assert_called_once_with(
+            query=f"email:'{self.member['email']}'", expand=["data.subscriptions"]
+        )
+
+    @patch("website.views.stripe.checkout.Session.create")
+    @patch("website.utils.stripe_prices.stripe.Price.list")
+    @patch("website.views.stripe.Customer.search")
+    def test_stripe_lookups_sent_concurrently(
+        self, mock_customer_search, mock_price_list, mock_session_create
+    ):
+        """
+        The subscription check and the price lookup should wait for Stripe at the same time.
+        """
+        cache.clear()
+        delay = 0.3
+
+        def slow(result):
+            def call(*args, **kwargs):
+                time.sleep(delay)
+                return result
+            return call
+
+        mock_customer_search.side_effect = slow(Mock(data=[]))
+        mock_price_list.side_effect = slow(
+            Mock(data=[{"id": "price_123", "lookup_key": "reduced-yearly", "currency": "chf", "active": True, "product": "prod_123"}])
+        )
+        mock_session_create.return_value = {
+            "id": "cs_123",
+            "url": "https://checkout.stripe.com/c/pay/123",
+            "expires_at": int(time.time()) + 86400,
+        }
+
+        start = time.perf_counter()
+        response = self.client.post("/membership/", self.member)
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(response.status_code, 302)
+        self.assertLess(elapsed, delay * 1.8)
+        self.assertEqual(mock_session_create.call_args.kwargs["line_items"][0]["price"], "price_123")
+
 
 # ====================================== #
 # ====== EVENT REGISTRATION TESTS ====== #
@@ -1015,3 +1167,667 @@ class EventParticipantsModelTest(TestCase):
         logger.debug(
             f"Event {updated_event.title} is no longer fully booked, state: {updated_event.is_fully_booked}"
         )
+
+    def test_participant_counter(self):
+        """
+        The counter should follow the participations, including the cascade deletions.
+        """
+        for participant in self.participants[:3]:
+            EventParticipants.objects.create(event=self.event, participant=participant)
+        self.assertEqual(Event.objects.get(pk=self.event.id).participant_count, 3)
+
+        EventParticipants.objects.get(event=self.event, participant=self.participants[0]).delete()
+        self.participants[1].delete()  # Cascade deletion of the participation
+        self.assertEqual(Event.objects.get(pk=self.event.id).participant_count, 1)
+
+        # Saving an outdated instance of the event must not overwrite the counter
+        self.event.title = "Renamed event"
+        self.event.save()
+        self.assertEqual(Event.objects.get(pk=self.event.id).participant_count, 1)
+
+    def test_repair_participant_counts(self):
+        """
+        The repair command should recompute the counters and fully booked status in bulk.
+        """
+        for participant in self.participants[:10]:
+            EventParticipants.objects.create(event=self.event, participant=participant)
+        Event.objects.filter(pk=self.event.id).update(participant_count=2, is_fully_booked=False)
+
+        stdout = io.StringIO()
+        call_command("repair_participant_counts", stdout=stdout)
+
+        event = Event.objects.get(pk=self.event.id)
+        self.assertEqual(event.participant_count, 10)
+        self.assertTrue(event.is_fully_booked)
+        self.assertIn("1 event counter(s) repaired", stdout.getvalue())
+
+
+@skipUnlessDBFeature("test_db_allows_multiple_connections")  # Not with an in-memory SQLite database
+class EventParticipantsConcurrencyTest(TransactionTestCase):
+    """
+    This test case will test the registrations sent at the same time (e.g. simultaneous Stripe webhooks).
+    It will test if the participants limit holds when more participants than seats register in parallel.
+    Each thread uses its own database connection, so the transactions really run concurrently.
+    """
+
+    def setUp(self):
+        self.event = Event.objects.create(
+            is_talk_event=True,
+            title="Test Event",
+            short_description="This is a test event",
+            full_description="This is a test event, please ignore it.",
+            date="2022-12-12",
+            start_time="12:00",
+            end_time="14:00",
+            address="Chemin de la Mairie 1",
+            link="https://www.myevent.com",
+            participants_limit=3,
+        )
+        self.participants, _ = create_participants()
+
+    def test_parallel_registrations(self):
+        threads_count = 8
+        barrier = threading.Barrier(threads_count)
+        results = []
+
+        def register(participant):
+            try:
+                barrier.wait()
+                EventParticipants.objects.create(event=self.event, participant=participant)
+                results.append("registered")
+            except ValidationError:
+                results.append("fully booked")
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=register, args=(participant,))
+            for participant in self.participants[:threads_count]
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        event = Event.objects.get(pk=self.event.id)
+        self.assertEqual(results.count("registered"), 3)
+        self.assertEqual(results.count("fully booked"), threads_count - 3)
+        self.assertEqual(EventParticipants.objects.filter(event=event).count(), 3)
+        self.assertEqual(event.participant_count, 3)
+        self.assertTrue(event.is_fully_booked)
+
+
+class SeatHoldTest(TestCase):
+    """
+    This test case will test the seats held during the checkout of an event registration. It will test if:
+    - A seat is held with the checkout session and the last seat can not be held twice
+    - A participant submitting the form again keeps their hold
+    - The hold is converted when the payment is confirmed, and released when the session expires
+    - The expired holds are not counted and are swept
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.event = Event.objects.create(
+            is_talk_event=True,
+            title="Test Event",
+            short_description="This is a test event",
+            full_description="This is a test event, please ignore it.",
+            date="2022-12-12",
+            start_time="12:00",
+            end_time="14:00",
+            address="Chemin de la Mairie 1",
+            link="https://www.myevent.com",
+            talk_event_link="https://zoom.us/j/123",
+            participants_limit=1,
+        )
+        StripePrice.objects.create(
+            lookup_key="talkGroup-registration-normal",
+            price_id="price_normal",
+            product_id="prod_talk",
+            currency="chf",
+        )
+        self.form_data = {
+            "fname": "John",
+            "lname": "Doe",
+            "email": "test@gmail.com",
+            "phone": "+41 79 123 45 67",
+            "address": "Chemin du Pré-Fleuri 3",
+            "zip_code": "1228",
+            "city": "Plan-les-Ouates",
+            "country": "Suisse",
+            "membership_status": "isMember",
+            "plan": "normal",
+        }
+
+    def _checkout_session(self, session_id):
+        return {
+            "id": session_id,
+            "url": f"https://checkout.stripe.com/c/pay/{session_id}",
+            "expires_at": int(time.time()) + settings.SEAT_HOLD_TTL,
+        }
+
+    @patch("website.views.stripe.checkout.Session.create")
+    def test_last_seat_held(self, mock_session_create):
+        mock_session_create.side_effect = [
+            self._checkout_session("cs_1"),
+            self._checkout_session("cs_2"),
+        ]
+        url = f"/rendez-vous/{self.event.id}/inscription/"
+
+        response = self.client.post(url, self.form_data)
+        self.assertEqual(response.status_code, 302)
+        hold = SeatHold.objects.get(event=self.event)
+        self.assertEqual(hold.checkout_session_id, "cs_1")
+        self.assertIn("expires_at", mock_session_create.call_args.kwargs)
+        self.assertEqual(available_seats(self.event), 0)
+
+        # Another visitor can not reach the checkout
+        response = self.client.post(url, {**self.form_data, "email": "other@gmail.com"})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context.get("error_messages"))
+
+        # Same participant with another plan: the hold is kept for the new session
+        StripePrice.objects.create(
+            lookup_key="talkGroup-registration-reduced",
+            price_id="price_reduced",
+            product_id="prod_talk",
+            currency="chf",
+        )
+        response = self.client.post(url, {**self.form_data, "plan": "reduced"})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(SeatHold.objects.get(event=self.event).checkout_session_id, "cs_2")
+        self.assertEqual(mock_session_create.call_count, 2)
+
+    @patch("website.views.stripe.checkout.Session.create")
+    def test_open_checkout_session_reused(self, mock_session_create):
+        mock_session_create.return_value = self._checkout_session("cs_1")
+        url = f"/rendez-vous/{self.event.id}/inscription/"
+
+        responses = [self.client.post(url, self.form_data) for _ in range(3)]
+
+        self.assertEqual(mock_session_create.call_count, 1)
+        for response in responses:
+            self.assertEqual(response.status_code, 302)
+            self.assertEqual(response.url, "https://checkout.stripe.com/c/pay/cs_1")
+
+        # Once paid, the session is no longer reused
+        forget_checkout_session("test@gmail.com", f"event-{self.event.id}")
+        self.assertIsNone(
+            get_open_checkout_session("test@gmail.com", f"event-{self.event.id}", "talkGroup-registration-normal")
+        )
+
+    @override_settings(SEAT_HOLD_TTL=30 * 60)
+    @patch("website.views.stripe.checkout.Session.create")
+    def test_checkout_session_expiry_above_stripe_minimum(self, mock_session_create):
+        mock_session_create.return_value = self._checkout_session("cs_1")
+        start = int(time.time())
+
+        self.client.post(f"/rendez-vous/{self.event.id}/inscription/", self.form_data)
+
+        expires_at = mock_session_create.call_args.kwargs["expires_at"]
+        self.assertGreaterEqual(expires_at - start, 30 * 60 + SESSION_EXPIRY_MARGIN)
+        # The hold outlives the session, for the payments completed at the last moment
+        hold = SeatHold.objects.get(event=self.event)
+        self.assertGreater(hold.expires_at.timestamp(), expires_at)
+
+    def test_seat_hold_ttl_checked_at_startup(self):
+        with override_settings(SEAT_HOLD_TTL=10 * 60):
+            self.assertEqual([error.id for error in check_seat_hold_ttl(None)], ["website.E001"])
+        self.assertEqual(check_seat_hold_ttl(None), [])
+
+    def test_hold_released_by_webhook(self):
+        hold = hold_seat(self.event, "test@gmail.com")
+        attach_checkout_session(hold, self._checkout_session("cs_paid"))
+        metadata = {
+            "type": "talk-group",
+            "event_id": self.event.id,
+            "fname": "John",
+            "lname": "Doe",
+            "email": "test@gmail.com",
+            "phone": "+41 79 123 45 67",
+            "address": "Chemin du Pré-Fleuri 3",
+            "zip_code": "1228",
+            "city": "Plan-les-Ouates",
+            "country": "Suisse",
+        }
+        StripeWebhook(notify=False).process_event(
+            {
+                "id": "evt_paid",
+                "type": "checkout.session.completed",
+                "data": {"object": {"id": "cs_paid", "metadata": metadata}},
+            }
+        )
+        event = Event.objects.get(pk=self.event.id)
+        self.assertFalse(SeatHold.objects.exists())
+        self.assertEqual(event.participant_count, 1)
+        self.assertEqual(available_seats(event), 0)
+
+        hold = SeatHold.objects.create(
+            event=self.event, email="other@gmail.com", checkout_session_id="cs_unpaid",
+            expires_at=timezone.now() + timedelta(minutes=30),
+        )
+        StripeWebhook(notify=False).process_event(
+            {
+                "id": "evt_expired",
+                "type": "checkout.session.expired",
+                "data": {"object": {"id": "cs_unpaid", "metadata": {}}},
+            }
+        )
+        self.assertFalse(SeatHold.objects.exists())
+
+    def test_expired_holds_swept(self):
+        SeatHold.objects.create(
+            event=self.event, email="test@gmail.com", expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(available_seats(self.event), 1)
+        self.assertIsNotNone(hold_seat(self.event, "other@gmail.com"))
+        self.assertIsNone(hold_seat(self.event, "third@gmail.com"))
+
+        self.assertEqual(release_expired_seat_holds(), 1)
+        self.assertEqual(SeatHold.objects.get().email, "other@gmail.com")
+
+
+class AsyncCheckoutViewsTest(TestCase):
+    """
+    This test case will test the async versions of the checkout views (Stripe is mocked). It will test if:
+    - An event registration is redirected to the checkout with a seat held
+    - A participant already registered gets an error
+    - The error shown does not depend on which concurrent step fails first
+    - A burst of membership submissions waits for Stripe at the same time
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.factory = AsyncRequestFactory()
+        self.event = Event.objects.create(
+            is_talk_event=True,
+            title="Test Event",
+            short_description="This is a test event",
+            full_description="This is a test event, please ignore it.",
+            date="2022-12-12",
+            start_time="12:00",
+            end_time="14:00",
+            address="Chemin de la Mairie 1",
+            link="https://www.myevent.com",
+            participants_limit=2,
+        )
+        StripePrice.objects.create(
+            lookup_key="talkGroup-registration-normal",
+            price_id="price_normal",
+            product_id="prod_talk",
+            currency="chf",
+        )
+        self.registration = {
+            "fname": "John",
+            "lname": "Doe",
+            "email": "test@gmail.com",
+            "phone": "+41 79 123 45 67",
+            "address": "Chemin du Pré-Fleuri 3",
+            "zip_code": "1228",
+            "city": "Plan-les-Ouates",
+            "country": "Suisse",
+            "membership_status": "isMember",
+            "plan": "normal",
+        }
+
+    @staticmethod
+    def _checkout_session(session_id):
+        return {
+            "id": session_id,
+            "url": f"https://checkout.stripe.com/c/pay/{session_id}",
+            "expires_at": int(time.time()) + settings.SEAT_HOLD_TTL,
+        }
+
+    @patch("website.views.stripe.checkout.Session.create")
+    async def test_event_registration(self, mock_session_create):
+        mock_session_create.return_value = self._checkout_session("cs_1")
+        url = f"/rendez-vous/{self.event.id}/inscription/"
+
+        response = await AsyncEventRegistrationView.as_view()(
+            self.factory.post(url, self.registration), pk=self.event.id
+        )
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.url, "https://checkout.stripe.com/c/pay/cs_1")
+        hold = await SeatHold.objects.aget(event=self.event)
+        self.assertEqual(hold.checkout_session_id, "cs_1")
+        self.assertEqual(mock_session_create.call_args.kwargs["line_items"][0]["price"], "price_normal")
+
+    @patch("website.views.stripe.checkout.Session.create")
+    async def test_event_participant_already_registered(self, mock_session_create):
+        participant = await Participant.objects.acreate(
+            fname="John",
+            lname="Doe",
+            email="test@gmail.com",
+            phone="+41 79 123 45 67",
+            address="Chemin du Pré-Fleuri 3",
+            zip_code="1228",
+            city="Plan-les-Ouates",
+            country="Suisse",
+        )
+        await sync_to_async(EventParticipants.objects.create)(event=self.event, participant=participant)
+
+        response = await AsyncEventRegistrationView.as_view()(
+            self.factory.post(f"/rendez-vous/{self.event.id}/inscription/", self.registration),
+            pk=self.event.id,
+        )
+
+        self.assertEqual(response.status_code, 200)
+        mock_session_create.assert_not_called()
+        self.assertFalse(await SeatHold.objects.aexists())
+
+    @patch("website.views.stripe.checkout.Session.create")
+    @patch("website.utils.stripe_prices.stripe.Price.list")
+    async def test_registration_error_shown_before_price_error(self, mock_price_list, mock_session_create):
+        participant = await Participant.objects.acreate(
+            fname="John",
+            lname="Doe",
+            email="test@gmail.com",
+            phone="+41 79 123 45 67",
+            address="Chemin du Pré-Fleuri 3",
+            zip_code="1228",
+            city="Plan-les-Ouates",
+            country="Suisse",
+        )
+        await sync_to_async(EventParticipants.objects.create)(event=self.event, participant=participant)
+        await StripePrice.objects.all().adelete()
+        mock_price_list.side_effect = Exception("Stripe unavailable")
+
+        response = await AsyncEventRegistrationView.as_view()(
+            self.factory.post(f"/rendez-vous/{self.event.id}/inscription/", self.registration),
+            pk=self.event.id,
+        )
+
+        self.assertContains(response, "déjà inscrit")
+        mock_price_list.assert_called_once()  # Awaited, not left running
+        mock_session_create.assert_not_called()
+        self.assertFalse(await SeatHold.objects.aexists())
+
+    @patch("website.views.stripe.checkout.Session.create")
+    @patch("website.utils.stripe_prices.stripe.Price.list")
+    @patch("website.views.stripe.Customer.search")
+    async def test_membership_burst(self, mock_customer_search, mock_price_list, mock_session_create):
+        delay = 0.2
+        requests_count = 3
+
+        def slow(result):
+            def call(*args, **kwargs):
+                time.sleep(delay)
+                return result
+            return call
+
+        def create_session(**kwargs):
+            time.sleep(delay)
+            return {**self._checkout_session("cs_123"), "url": f"https://checkout.stripe.com/{kwargs['customer_email']}"}
+
+        mock_customer_search.side_effect = slow(Mock(data=[]))
+        mock_price_list.side_effect = slow(
+            Mock(data=[{"id": "price_123", "lookup_key": "reduced-yearly", "currency": "chf", "active": True, "product": "prod_123"}])
+        )
+        mock_session_create.side_effect = create_session
+        member = {
+            "subscription": "reduced",
+            "frequency": "yearly",
+            "fname": "John",
+            "lname": "Doe",
+            "phone": "+41 79 123 45 67",
+            "birthday": "1990-01-01",
+            "address": "123 Test Street",
+            "zip_code": "1234",
+            "city": "Test City",
+            "country": "Suisse",
+        }
+
+        start = time.perf_counter()
+        responses = await asyncio.gather(
+            *[
+                AsyncMembershipView.as_view()(
+                    self.factory.post("/membership/", {**member, "email": f"member{i}@test.com"})
+                )
+                for i in range(requests_count)
+            ]
+        )
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual([response.status_code for response in responses], [302] * requests_count)
+        self.assertEqual(responses[0].url, "https://checkout.stripe.com/member0@test.com")
+        # Sequential calls would take 3 delays per request
+        self.assertLess(elapsed, delay * 3 * 1.5)
+
+
+# ============================ #
+# ====== PODCASTS TESTS ====== #
+# ============================ #
+
+
+class PodcastsViewTest(TestCase):
+    """
+    Test case for the podcasts rendered server side (HomeView and PodcastsView).
+    """
+
+    def setUp(self):
+        cache.clear()
+        for i in range(1, 7):
+            PodcastEpisode.objects.create(
+                ausha_id=i,
+                show_id=settings.AUSHA_SHOW_ID,
+                name=f"Episode {i}",
+                audio_url=f"https://audio.ausha.co/{i}.mp3",
+                created_at=f"2024-01-0{i}T10:00:00Z",
+            )
+
+    def test_home_renders_last_podcasts(self):
+        """
+        The home page should render the 4 most recent episodes.
+        """
+        response = self.client.get(reverse("home"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [podcast.name for podcast in response.context["podcasts"]],
+            ["Episode 6", "Episode 5", "Episode 4", "Episode 3"],
+        )
+        self.assertContains(response, "https://audio.ausha.co/6.mp3")
+        self.assertContains(response, 'id="podcasts-data"')
+        # The containers filled by the JS players are only rendered for the missing episodes
+        self.assertContains(response, 'data-podcast-index="3"', count=2)
+        self.assertNotContains(response, 'class="lastPodcast')
+
+    def test_home_leaves_missing_podcasts_to_the_js_players(self):
+        """
+        The episodes missing from the database should be left to the JS players (.lastPodcastN).
+        """
+        PodcastEpisode.objects.filter(ausha_id__lte=4).delete()
+
+        response = self.client.get(reverse("home"))
+
+        self.assertContains(response, 'data-podcast-index="1"', count=2)
+        self.assertNotContains(response, 'class="lastPodcast1 ')
+        self.assertContains(response, 'class="lastPodcast3 ', count=2)
+        self.assertContains(response, 'class="lastPodcast4 ', count=2)
+
+    def test_podcasts_page_uses_cached_episodes(self):
+        """
+        The episodes list should be cached, the second request must not query the episodes table.
+        """
+        self.client.get(reverse("podcasts"))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("podcasts"))
+
+        self.assertEqual(len(response.context["podcasts"]), 4)
+        # Only the rendered page is inlined, the other pages are fetched from the Ausha proxy
+        self.assertEqual(len(response.context["podcasts_data"]), 4)
+        self.assertContains(response, 'data-total="6"')
+
+
+# ============================== #
+# ====== PAGE CACHE TESTS ====== #
+# ============================== #
+
+
+class PageCacheTest(TestCase):
+    """
+    Test case for the cached content pages (CachedPageMixin).
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.contact = ContactSection.objects.create(
+            title="Contactez-nous",
+            text="Une question ?",
+            name="Contact",
+            email="contact@example.com",
+            phone="0123456789",
+            address="Genève",
+        )
+
+    def test_page_served_from_cache(self):
+        """
+        The second request of a page should not query the database.
+        """
+        self.client.get(reverse("contact"))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("contact"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "contact@example.com")
+
+    def test_save_invalidates_dependent_pages(self):
+        """
+        Saving a model should only invalidate the pages rendering it, once committed.
+        """
+        self.client.get(reverse("home"))
+        self.client.get(reverse("contact"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            HomeSections.objects.create(name_ID="About", title="Nouvelle section")
+
+        response = self.client.get(reverse("home"))
+        self.assertContains(response, "Nouvelle section")
+        with self.assertNumQueries(0):
+            self.client.get(reverse("contact"))
+
+        # The contact section is rendered by both pages
+        with self.captureOnCommitCallbacks(execute=True):
+            self.contact.delete()
+        self.assertNotContains(self.client.get(reverse("home")), "contact@example.com")
+        self.assertNotContains(self.client.get(reverse("contact")), "contact@example.com")
+        self.assertEqual(invalidate_pages(PodcastEpisode), ["home"])
+
+    def test_csrf_token_of_each_visitor(self):
+        """
+        A cached page should contain the CSRF token of the visitor and set their CSRF cookie.
+        """
+        self.client.get(reverse("contact"))
+        client = self.client_class(enforce_csrf_checks=True)
+        response = client.get(reverse("contact"))
+
+        self.assertIn(settings.CSRF_COOKIE_NAME, response.cookies)
+        self.assertNotContains(response, CSRF_PLACEHOLDER)
+        self.assertContains(response, 'name="csrfmiddlewaretoken"')
+
+
+# ================================= #
+# ====== STRIPE PRICES TESTS ====== #
+# ================================= #
+
+
+class StripePriceCatalogTest(TestCase):
+    """
+    Test case for the catalog of the Stripe prices by lookup key.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.stripe_price = {
+            "id": "price_reduced_yearly",
+            "object": "price",
+            "active": True,
+            "currency": "chf",
+            "lookup_key": "reduced-yearly",
+            "recurring": {"interval": "year"},
+            "unit_amount": 2500,
+            "product": {"id": "prod_membership", "name": "Adhésion", "active": True},
+        }
+
+    @patch("website.utils.stripe_prices.stripe.Price.list")
+    def test_price_served_from_catalog(self, mock_price_list):
+        """
+        A price of the catalog should be served without calling Stripe, then from the cache.
+        """
+        store_stripe_price(self.stripe_price)
+
+        self.assertEqual(get_stripe_price("reduced-yearly").price_id, "price_reduced_yearly")
+        with self.assertNumQueries(0):
+            price = get_stripe_price("reduced-yearly")
+        self.assertEqual(price.product_name, "Adhésion")
+        mock_price_list.assert_not_called()
+
+    @patch("website.utils.stripe_prices.stripe.Price.list")
+    def test_missing_price_fetched_from_stripe(self, mock_price_list):
+        """
+        A price missing from the catalog should be fetched from Stripe and added to the catalog.
+        """
+        mock_price_list.return_value = Mock(data=[self.stripe_price])
+
+        self.assertEqual(get_stripe_price("reduced-yearly").price_id, "price_reduced_yearly")
+        self.assertTrue(StripePrice.objects.filter(lookup_key="reduced-yearly").exists())
+
+        mock_price_list.return_value = Mock(data=[])
+        with self.assertRaises(StripePrice.DoesNotExist):
+            get_stripe_price("unknown-key")
+
+    @patch("website.utils.stripe_prices.stripe.Price.list")
+    def test_archived_price_not_served(self, mock_price_list):
+        """
+        A price fetched from Stripe should not be cached or served if it or its product is archived.
+        """
+        archived_product = {**self.stripe_price["product"], "active": False}
+        for stripe_price in [
+            {**self.stripe_price, "active": False},
+            {**self.stripe_price, "product": archived_product},
+        ]:
+            mock_price_list.return_value = Mock(data=[stripe_price])
+            with self.assertRaises(StripePrice.DoesNotExist):
+                get_stripe_price("reduced-yearly")
+            self.assertIsNone(cache.get(stripe_price_cache_key("reduced-yearly")))
+        self.assertEqual(mock_price_list.call_count, 2)
+
+    def test_price_and_product_webhooks_update_catalog(self):
+        """
+        The price.* and product.* events should update the catalog and invalidate the cache.
+        """
+        store_stripe_price(self.stripe_price)
+        get_stripe_price("reduced-yearly")  # Cached
+
+        # Lookup key transferred to a new price (product not expanded in webhooks)
+        new_price = {**self.stripe_price, "id": "price_new", "product": "prod_membership"}
+        StripeWebhook().process_event({"type": "price.created", "data": {"object": new_price}})
+        price = get_stripe_price("reduced-yearly")
+        self.assertEqual(price.price_id, "price_new")
+        self.assertEqual(price.product_name, "Adhésion")
+
+        product = {"id": "prod_membership", "name": "Adhésion 2025", "active": True}
+        StripeWebhook().process_event({"type": "product.updated", "data": {"object": product}})
+        self.assertEqual(get_stripe_price("reduced-yearly").product_name, "Adhésion 2025")
+
+        StripeWebhook().process_event({"type": "price.deleted", "data": {"object": new_price}})
+        self.assertFalse(StripePrice.objects.exists())
+
+    @patch("website.utils.stripe_prices.stripe.Price.list")
+    def test_sync_removes_stale_prices(self, mock_price_list):
+        """
+        The sync command should store the prices with a lookup key and remove the others.
+        """
+        StripePrice.objects.create(
+            lookup_key="old-key", price_id="price_old", product_id="prod_old", currency="chf"
+        )
+        without_key = {**self.stripe_price, "id": "price_without_key", "lookup_key": None}
+        mock_price_list.return_value.auto_paging_iter.return_value = [self.stripe_price, without_key]
+
+        with patch.dict("os.environ", {"STRIPE_API_TOKEN": "sk_test"}):
+            call_command("sync_stripe_prices", stdout=io.StringIO())
+
+        self.assertEqual(
+            list(StripePrice.objects.values_list("lookup_key", flat=True)), ["reduced-yearly"]
+        )
@@ -1,6 +1,15 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+# Async checkout views are used when the project is served by an ASGI server (see CHECKOUT_ASYNC_VIEWS in settings)
+if settings.CHECKOUT_ASYNC_VIEWS:
+    EventRegistrationView = views.AsyncEventRegistrationView
+    MembershipView = views.AsyncMembershipView
+else:
+    EventRegistrationView = views.EventRegistrationView
+    MembershipView = views.MembershipView
+
 urlpatterns = [
     path("", views.HomeView.as_view(), name="home"),
     path("a-propos/", views.AboutView.as_view(), name="about"),
@@ -28,10 +37,10 @@ urlpatterns = [
     path("rendez-vous/<int:pk>/", views.EventDetailView.as_view(), name="event-detail"),
     path(
         "rendez-vous/<int:pk>/inscription/",
-        views.EventRegistrationView.as_view(),
+        EventRegistrationView.as_view(),
         name="event-registration",
     ),
-    path("membership/", views.MembershipView.as_view(), name="membership"),
+    path("membership/", MembershipView.as_view(), name="membership"),
     path("dons/", views.DonationView.as_view(), name="donation"),
     path("status/", views.StatusView.as_view(), name="status"),
     path("contact/", views.ContactView.as_view(), name="contact"),
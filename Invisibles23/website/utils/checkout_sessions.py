@@ -0,0 +1,85 @@
+import hashlib
+import time
+from django.core.cache import cache
+from Invisibles23.logging_config import logger
+
+# Seconds before the expiration of a checkout session from which it is no longer reused
+# (the visitor needs some time to pay)
+REUSE_MARGIN = 300
+
+
+def checkout_session_cache_key(email, scope) -> str:
+    """
+    Cache key of the open checkout session of a visitor. The email is hashed to get a valid key
+    for every cache backend.
+
+    Parameters
+    ----------
+    email: str
+        The email of the visitor
+    scope: str
+        What is paid, e.g. "event-12" for an event registration or the lookup key of a membership
+    """
+    digest = hashlib.sha256(f"{email.strip().lower()}:{scope}".encode()).hexdigest()
+    return f"stripe:checkout:{digest}"
+
+
+def get_open_checkout_session(email, scope, lookup_key):
+    """
+    Get the checkout session already created for the visitor (e.g. double submit of a form), so they
+    are redirected to it instead of creating a new one.
+
+    Parameters
+    ----------
+    email: str
+        The email of the visitor
+    scope: str
+        What is paid (see checkout_session_cache_key)
+    lookup_key: str
+        The lookup key of the price, a session created for another price is not reused
+
+    Returns
+    -------
+    dict or None
+        The session ({"id", "url", "expires_at", "lookup_key"}), None if there is no open session
+    """
+    session = cache.get(checkout_session_cache_key(email, scope))
+    if session is None or session["lookup_key"] != lookup_key:
+        return None
+    if session["expires_at"] - time.time() < REUSE_MARGIN:
+        return None
+    return session
+
+
+def cache_checkout_session(email, scope, lookup_key, checkout_session) -> None:
+    """
+    Cache a new checkout session until it can no longer be reused (see REUSE_MARGIN).
+    """
+    timeout = int(checkout_session["expires_at"] - time.time()) - REUSE_MARGIN
+    if timeout <= 0:
+        return
+    cache.set(
+        checkout_session_cache_key(email, scope),
+        {
+            "id": checkout_session["id"],
+            "url": checkout_session["url"],
+            "expires_at": checkout_session["expires_at"],
+            "lookup_key": lookup_key,
+        },
+        timeout=timeout,
+    )
+
+
+def forget_checkout_session(email, scope, checkout_session_id=None) -> None:
+    """
+    Remove the cached session of a visitor once it is paid or expired (webhook). If the ID of the
+    session is given, the cached session is only removed if it is this one (the visitor may have
+    created a new session since).
+    """
+    cache_key = checkout_session_cache_key(email, scope)
+    if checkout_session_id is not None:
+        session = cache.get(cache_key)
+        if session is None or session["id"] != checkout_session_id:
+            return
+    cache.delete(cache_key)
+    logger.info(f"Checkout session of {email} for {scope} removed from the cache")
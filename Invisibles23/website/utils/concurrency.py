@@ -0,0 +1,44 @@
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from django.conf import settings
+
+# Thread pool of the Stripe calls sent concurrently by the checkout views (one per process)
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def submit_stripe_call(function, *args, **kwargs) -> Future:
+    """
+    Send a Stripe call in the shared thread pool (STRIPE_CONCURRENT_CALLS threads), so the independent
+    calls of a request run at the same time. The result (or exception) is read with future.result().
+
+    Note: the submitted function must not use the database, a thread of the pool would open its own
+    connection (and would not see the uncommitted data of the request).
+
+    Usage
+    -----
+        `future = submit_stripe_call(stripe.Price.list, lookup_keys=[lookup_key])`
+        `prices = future.result()`
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.STRIPE_CONCURRENT_CALLS,
+                    thread_name_prefix="stripe",
+                )
+    return _executor.submit(function, *args, **kwargs)
+
+
+async def astripe_call(function, *args, **kwargs):
+    """
+    Async version of submit_stripe_call for the async checkout views. The Stripe SDK is synchronous,
+    so the call runs in the shared thread pool and is awaited without blocking the event loop.
+
+    Usage
+    -----
+        `prices = await astripe_call(stripe.Price.list, lookup_keys=[lookup_key])`
+    """
+    return await asyncio.wrap_future(submit_stripe_call(function, *args, **kwargs))
@@ -0,0 +1,146 @@
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.template.loader import render_to_string
+from Invisibles23.logging_config import logger
+from website.models import (
+    HomeSections,
+    AboutSections,
+    AssoSections,
+    ChronicTabSections,
+    InvsibleTabSections,
+    MiscarriageTabSections,
+    YoutubeVideos,
+    ContactSection,
+    AssoStatus,
+    DonationSection,
+    PodcastEpisode,
+)
+
+# Models rendered by each cached page (by URL name), a page is invalidated when one of them changes
+PAGE_DEPENDENCIES = {
+    "home": (HomeSections, ContactSection, PodcastEpisode),
+    "about": (AboutSections, YoutubeVideos),
+    "chronic": (ChronicTabSections,),
+    "invisible": (InvsibleTabSections,),
+    "miscarriage": (MiscarriageTabSections,),
+    "association": (AssoSections,),
+    "donation": (DonationSection,),
+    "status": (AssoStatus,),
+    "contact": (ContactSection,),
+}
+
+# Rendered in place of the CSRF token of the forms, replaced by the token of each visitor when served
+CSRF_PLACEHOLDER = "__page_cache_csrf_token__"
+
+
+def page_cache_key(page, version) -> str:
+    """
+    Cache key of the rendered content of a page, for a version of its dependencies.
+    """
+    return f"pages:content:{page}:{version}"
+
+
+def page_version_key(page) -> str:
+    """
+    Cache key of the last change time of the models of a page (changed by invalidate_pages).
+    A content rendered before a change is stored under the previous version and never served again.
+    """
+    return f"pages:version:{page}"
+
+
+def get_page_version(page):
+    """
+    Return the current version of a page (see page_version_key).
+    """
+    version = cache.get(page_version_key(page))
+    if version is None:
+        # add() keeps the version set meanwhile by another worker
+        cache.add(page_version_key(page), time.time(), timeout=None)
+        version = cache.get(page_version_key(page))
+    return version
+
+
+def render_cached_page(request, page, template_name, get_context) -> HttpResponse:
+    """
+    Render a page from the cache, or from the database on a miss (used by CachedPageMixin).
+    The page is rendered without the context processors, only the request and a placeholder of the
+    CSRF token are added to the context, so the content is the same for every visitor.
+
+    Parameters
+    ----------
+    request: HttpRequest
+        The request of the visitor
+    page: str
+        The name of the page in PAGE_DEPENDENCIES
+    template_name: str
+        The template of the page
+    get_context: callable
+        Return the context of the template, only called on a miss
+
+    Returns
+    -------
+    HttpResponse
+        The page, with the CSRF token of the visitor (the CSRF cookie is set by the middleware)
+    """
+    version = get_page_version(page)
+    cache_key = page_cache_key(page, version)
+    content = cache.get(cache_key)
+
+    if content is None:
+        logger.info(f"Page '{page}' not in the cache, rendering it ...")
+        context = {**get_context(), "request": request, "csrf_token": CSRF_PLACEHOLDER}
+        content = render_to_string(template_name, context)
+        cache.set(cache_key, content, timeout=settings.PAGE_CACHE_TTL)
+
+    return HttpResponse(content.replace(CSRF_PLACEHOLDER, get_token(request)))
+
+
+def pages_depending_on(model) -> list:
+    """
+    Return the names of the pages rendering the given model.
+    """
+    return [page for page, models in PAGE_DEPENDENCIES.items() if model in models]
+
+
+def invalidate_pages(model) -> list:
+    """
+    Invalidate the cached pages rendering the given model (their version changes).
+    Called by the signals of the models of PAGE_DEPENDENCIES, and by the bulk updates that send no
+    signal (e.g. sync_ausha_episodes).
+
+    Returns
+    -------
+    list
+        The names of the invalidated pages
+    """
+    pages = pages_depending_on(model)
+    if pages:
+        now = time.time()
+        cache.set_many({page_version_key(page): now for page in pages}, timeout=None)
+        logger.info(f"{model.__name__} changed, cached page(s) invalidated: {', '.join(pages)}")
+    return pages
+
+
+def _invalidate_on_commit(sender, **kwargs) -> None:
+    # Invalidated after the commit, otherwise a page rendered before the commit would be cached
+    # with the previous content under the new version
+    transaction.on_commit(lambda: invalidate_pages(sender))
+
+
+def connect_page_cache_signals() -> None:
+    """
+    Invalidate the pages when a model they render is saved or deleted (see WebsiteConfig.ready).
+    """
+    models = {model for dependencies in PAGE_DEPENDENCIES.values() for model in dependencies}
+    for model in models:
+        post_save.connect(
+            _invalidate_on_commit, sender=model, dispatch_uid=f"page_cache_save_{model.__name__}"
+        )
+        post_delete.connect(
+            _invalidate_on_commit, sender=model, dispatch_uid=f"page_cache_delete_{model.__name__}"
+        )
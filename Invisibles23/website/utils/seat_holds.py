@@ -0,0 +1,129 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from Invisibles23.logging_config import logger
+from website.models import Event, SeatHold
+
+# Margin kept after the expiration of the checkout session, for the payments completed at the last
+# moment (the checkout.session.completed event is processed by the webhook worker)
+CONFIRMATION_MARGIN = timedelta(minutes=5)
+
+# Lifetimes of a checkout session accepted by Stripe (expires_at), in seconds
+STRIPE_SESSION_MIN_LIFETIME = 30 * 60
+STRIPE_SESSION_MAX_LIFETIME = 24 * 60 * 60
+# Added to the minimum lifetime, for the latency of the session creation and the clock skew
+SESSION_EXPIRY_MARGIN = 60
+
+
+def checkout_session_lifetime() -> int:
+    """
+    Seconds before the expiration of a new checkout session (SEAT_HOLD_TTL), at least the minimum
+    of Stripe plus SESSION_EXPIRY_MARGIN : expires_at is computed before the call to Stripe.
+    """
+    return max(settings.SEAT_HOLD_TTL, STRIPE_SESSION_MIN_LIFETIME + SESSION_EXPIRY_MARGIN)
+
+
+def available_seats(event, now=None) -> int:
+    """
+    Number of seats of the event that can still be booked : the limit minus the confirmed participants
+    (Event.participant_count) and the seats held by the checkout sessions not expired yet.
+
+    Parameters
+    ----------
+    event: Event
+        The event, its participant_count must be up to date (e.g. locked row, see hold_seat)
+    now: datetime
+        The current time, to share it with the caller
+
+    Returns
+    -------
+    int
+        The number of available seats (0 if the event is full)
+    """
+    now = now or timezone.now()
+    active_holds = SeatHold.objects.filter(event=event, expires_at__gt=now).count()
+    return max(event.participants_limit - event.participant_count - active_holds, 0)
+
+
+def hold_seat(event, email):
+    """
+    Hold a seat of the event for a visitor going to the Stripe checkout. The event row is locked,
+    so two visitors can not hold the last seat at the same time. The active hold of the visitor is
+    reused if they submit the registration form again.
+
+    Parameters
+    ----------
+    event: Event
+        The event
+    email: str
+        The email of the visitor
+
+    Returns
+    -------
+    SeatHold or None
+        The hold, None if no seat is available
+    """
+    with transaction.atomic():
+        event = Event.objects.select_for_update().get(pk=event.pk)
+        now = timezone.now()
+
+        hold = SeatHold.objects.filter(event=event, email=email, expires_at__gt=now).first()
+        if hold is not None:
+            logger.info(f"Seat already held for {email}: {hold}")
+            return hold
+
+        if not available_seats(event, now):
+            logger.warning(f"No seat available for event with ID '{event.id}'")
+            return None
+
+        hold = SeatHold.objects.create(
+            event=event,
+            email=email,
+            expires_at=now + timedelta(seconds=checkout_session_lifetime()) + CONFIRMATION_MARGIN,
+        )
+    logger.info(f"Seat held: {hold}")
+    return hold
+
+
+def attach_checkout_session(hold, checkout_session) -> None:
+    """
+    Link the hold to its Stripe checkout session, it then expires with the session.
+    """
+    hold.checkout_session_id = checkout_session["id"]
+    hold.expires_at = (
+        datetime.fromtimestamp(checkout_session["expires_at"], tz=dt_timezone.utc)
+        + CONFIRMATION_MARGIN
+    )
+    hold.save(update_fields=["checkout_session_id", "expires_at"])
+
+
+def release_seat_hold(checkout_session_id) -> int:
+    """
+    Release the seat held by a checkout session (payment confirmed or session expired).
+
+    Returns
+    -------
+    int
+        The number of released holds (0 if it had already expired and was swept)
+    """
+    count, _ = SeatHold.objects.filter(checkout_session_id=checkout_session_id).delete()
+    if count:
+        logger.info(f"Seat hold of the checkout session {checkout_session_id} released")
+    return count
+
+
+def release_expired_seat_holds() -> int:
+    """
+    Delete the expired holds (a single indexed delete, run periodically by the webhook worker).
+    Expired holds are already ignored by available_seats, this only keeps the table small.
+
+    Returns
+    -------
+    int
+        The number of deleted holds
+    """
+    count, _ = SeatHold.objects.filter(expires_at__lte=timezone.now()).delete()
+    if count:
+        logger.info(f"{count} expired seat hold(s) released")
+    return count
@@ -0,0 +1,205 @@
+import stripe
+from django.conf import settings
+from django.core.cache import cache
+from Invisibles23.logging_config import logger
+from website.models import StripePrice
+
+
+def stripe_price_cache_key(lookup_key) -> str:
+    """
+    Cache key of a price of the catalog (deleted when the price or its product changes).
+    """
+    return f"stripe:price:{lookup_key}"
+
+
+def get_stripe_price(lookup_key) -> StripePrice:
+    """
+    Get the Stripe price of a lookup key from the catalog (cache, then StripePrice table).
+    On a miss, the price is fetched from Stripe and added to the catalog.
+
+    Parameters
+    ----------
+    lookup_key: str
+        The lookup key of the price (e.g. reduced-yearly)
+
+    Returns
+    -------
+    StripePrice
+        The price, with its Stripe ID (price_id) to create the checkout session
+
+    Raises
+    ------
+    StripePrice.DoesNotExist
+        If no active price of Stripe has this lookup key
+    """
+    price = get_catalog_price(lookup_key)
+    if price is None:
+        price = add_to_catalog(lookup_key, fetch_stripe_price(lookup_key))
+    return price
+
+
+def get_catalog_price(lookup_key):
+    """
+    Get the Stripe price of a lookup key from the catalog only (cache, then StripePrice table).
+
+    Returns
+    -------
+    StripePrice or None
+        The price, None if it is not in the catalog
+    """
+    cache_key = stripe_price_cache_key(lookup_key)
+    price = cache.get(cache_key)
+    if price is None:
+        price = StripePrice.objects.filter(lookup_key=lookup_key, active=True).first()
+        if price is not None:
+            cache.set(cache_key, price, timeout=settings.STRIPE_PRICE_CACHE_TTL)
+    return price
+
+
+def fetch_stripe_price(lookup_key):
+    """
+    Fetch the price of a lookup key from Stripe (no database access, so it can run in the pool of
+    Stripe calls, see submit_stripe_call).
+
+    Raises
+    ------
+    StripePrice.DoesNotExist
+        If no price of Stripe has this lookup key
+    """
+    logger.warning(f"Price '{lookup_key}' not in the catalog, getting it from Stripe ...")
+    prices = stripe.Price.list(lookup_keys=[lookup_key], expand=["data.product"])
+    if not prices.data:
+        raise StripePrice.DoesNotExist(f"No Stripe price with lookup key '{lookup_key}'")
+    return prices.data[0]
+
+
+def add_to_catalog(lookup_key, stripe_price) -> StripePrice:
+    """
+    Store a price fetched from Stripe in the catalog and cache it, if it can be sold.
+
+    Raises
+    ------
+    StripePrice.DoesNotExist
+        If the price or its product is archived, or the price has no lookup key anymore
+    """
+    price = store_stripe_price(stripe_price)
+    if price is None or not price.active:
+        raise StripePrice.DoesNotExist(f"No active Stripe price with lookup key '{lookup_key}'")
+    cache.set(stripe_price_cache_key(lookup_key), price, timeout=settings.STRIPE_PRICE_CACHE_TTL)
+    return price
+
+
+def store_stripe_price(price):
+    """
+    Add or update a Stripe price in the catalog, by lookup key. A price without lookup key is
+    removed from the catalog (its lookup key was removed or transferred to another price).
+
+    Parameters
+    ----------
+    price: stripe.Price or dict
+        The Stripe price, its product can be expanded or an ID
+
+    Returns
+    -------
+    StripePrice or None
+        The price of the catalog, None if it has no lookup key
+    """
+    lookup_key = price.get("lookup_key")
+    if not lookup_key:
+        delete_stripe_price(price["id"])
+        return None
+
+    product = price.get("product")
+    product_id = product["id"] if isinstance(product, dict) else product
+    defaults = {
+        "price_id": price["id"],
+        "product_id": product_id,
+        "unit_amount": price.get("unit_amount"),
+        "currency": price.get("currency", ""),
+        "recurring_interval": (price.get("recurring") or {}).get("interval", ""),
+        "active": bool(price.get("active")),
+    }
+    if isinstance(product, dict):  # The name is kept if the product is not expanded (webhooks)
+        defaults["product_name"] = product.get("name", "")
+        defaults["active"] = defaults["active"] and bool(product.get("active", True))
+
+    # The previous price of this lookup key is replaced, and this price loses its previous key
+    previous_keys = list(
+        StripePrice.objects.filter(price_id=price["id"])
+        .exclude(lookup_key=lookup_key)
+        .values_list("lookup_key", flat=True)
+    )
+    StripePrice.objects.filter(lookup_key__in=previous_keys).delete()
+    stored, _ = StripePrice.objects.update_or_create(lookup_key=lookup_key, defaults=defaults)
+
+    cache.delete_many([stripe_price_cache_key(key) for key in [lookup_key, *previous_keys]])
+    logger.info(f"Stripe price stored in the catalog: {stored}")
+    return stored
+
+
+def delete_stripe_price(price_id) -> None:
+    """
+    Remove a Stripe price from the catalog.
+    """
+    lookup_keys = list(
+        StripePrice.objects.filter(price_id=price_id).values_list("lookup_key", flat=True)
+    )
+    if lookup_keys:
+        StripePrice.objects.filter(price_id=price_id).delete()
+        cache.delete_many([stripe_price_cache_key(key) for key in lookup_keys])
+        logger.info(f"Stripe price {price_id} removed from the catalog")
+
+
+def update_stripe_product(product, deleted=False) -> int:
+    """
+    Update the name and status of the prices of a Stripe product in the catalog, or remove them
+    if the product was deleted.
+
+    Returns
+    -------
+    int
+        The number of prices updated or removed
+    """
+    prices = StripePrice.objects.filter(product_id=product["id"])
+    lookup_keys = list(prices.values_list("lookup_key", flat=True))
+
+    if deleted:
+        count, _ = prices.delete()
+    elif product.get("active"):
+        count = prices.update(product_name=product.get("name", ""))
+    else:
+        # Prices of an archived product can not be used to create a checkout session
+        # (enabled again by the next sync or Stripe fallback once the product is restored)
+        count = prices.update(product_name=product.get("name", ""), active=False)
+        logger.warning(f"Stripe product {product['id']} archived, its prices are disabled")
+
+    cache.delete_many([stripe_price_cache_key(key) for key in lookup_keys])
+    return count
+
+
+def sync_stripe_prices() -> int:
+    """
+    Synchronise the catalog with the active prices of Stripe that have a lookup key.
+    The prices no longer returned by Stripe are removed.
+
+    Returns
+    -------
+    int
+        The number of prices in the catalog
+    """
+    synced_keys = []
+    prices = stripe.Price.list(active=True, expand=["data.product"], limit=100)
+    for price in prices.auto_paging_iter():
+        stored = store_stripe_price(price)
+        if stored is not None:
+            synced_keys.append(stored.lookup_key)
+
+    removed = StripePrice.objects.exclude(lookup_key__in=synced_keys)
+    removed_keys = list(removed.values_list("lookup_key", flat=True))
+    removed.delete()
+    cache.delete_many([stripe_price_cache_key(key) for key in removed_keys])
+
+    logger.info(
+        f"{len(synced_keys)} Stripe price(s) synchronised, {len(removed_keys)} removed from the catalog"
+    )
+    return len(synced_keys)
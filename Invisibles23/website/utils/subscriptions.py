@@ -0,0 +1,34 @@
+import stripe
+from django.utils import timezone
+from Invisibles23.logging_config import logger
+from website.models import Members
+
+
+def sync_member_subscriptions() -> int:
+    """
+    Set the subscription status of the members from the active subscriptions of Stripe, e.g. for the
+    members stored before the customer.subscription.* events were handled (active by default).
+    The status is then kept up to date by these events. Members without Stripe customer are left
+    unconfirmed, MembershipView checks them with Stripe.
+
+    Returns
+    -------
+    int
+        The number of members with an active subscription
+    """
+    active_customers = set()
+    subscriptions = stripe.Subscription.list(status="active", limit=100)
+    for subscription in subscriptions.auto_paging_iter():
+        active_customers.add(subscription["customer"])
+
+    now = timezone.now()
+    members = Members.objects.exclude(stripe_customer_id="")
+    active = members.filter(stripe_customer_id__in=active_customers).update(
+        is_subscription_active=True, subscription_confirmed_at=now
+    )
+    inactive = members.exclude(stripe_customer_id__in=active_customers).update(
+        is_subscription_active=False, subscription_confirmed_at=now
+    )
+
+    logger.info(f"Subscriptions of the members synchronised: {active} active, {inactive} inactive")
+    return active
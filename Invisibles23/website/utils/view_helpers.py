@@ -1,4 +1,7 @@
+from django.conf import settings
+from django.core.cache import cache
 from Invisibles23.logging_config import logger
+from website.models import PodcastEpisode
 
 
 def createFormErrorContext(form) -> dict:
@@ -35,3 +38,45 @@ def createFormErrorContext(form) -> dict:
     }
 
     return error_context
+
+
+def podcast_episodes_cache_key(show_id) -> str:
+    """
+    Cache key of the episodes list of an Ausha show (deleted by sync_ausha_episodes).
+    """
+    return f"podcasts:episodes:{show_id}"
+
+
+def podcast_episodes_version_key(show_id) -> str:
+    """
+    Cache key of the last synchronisation time of an Ausha show, part of the keys of the
+    trimmed podcast variants served by the Ausha proxy (changed by sync_ausha_episodes).
+    """
+    return f"podcasts:version:{show_id}"
+
+
+def get_cached_podcast_episodes(limit=None) -> list:
+    """
+    Get the most recent podcast episodes of the Ausha show (AUSHA_SHOW_ID) from the cache,
+    or from the database on a miss (used to render the podcasts server side in HomeView and PodcastsView)
+
+    Parameters
+    ----------
+    limit: int
+        Number of episodes to return (all episodes if None)
+
+    Returns
+    -------
+    list
+        A list of PodcastEpisode, most recent first
+    """
+    cache_key = podcast_episodes_cache_key(settings.AUSHA_SHOW_ID)
+    episodes = cache.get(cache_key)
+
+    if episodes is None:
+        episodes = list(
+            PodcastEpisode.objects.filter(show_id=settings.AUSHA_SHOW_ID).defer("payload")
+        )
+        cache.set(cache_key, episodes, timeout=settings.PODCAST_EPISODES_CACHE_TTL)
+
+    return episodes[:limit] if limit else episodes
@@ -1,11 +1,18 @@
+import asyncio
 from typing import Any
 from django.shortcuts import render
 from django.views import View
 from Invisibles23.logging_config import logger
 from Invisibles23.logging_utils import log_debug_info
 from .forms import MembershipForm, EventRegistrationForm
-from .utils.view_helpers import createFormErrorContext
+from .utils.view_helpers import createFormErrorContext, get_cached_podcast_episodes
+from .utils.stripe_prices import get_catalog_price, fetch_stripe_price, add_to_catalog
+from .utils.concurrency import submit_stripe_call, astripe_call
+from .utils.seat_holds import hold_seat, attach_checkout_session, checkout_session_lifetime
+from .utils.checkout_sessions import cache_checkout_session, get_open_checkout_session
+from .utils.page_cache import render_cached_page
 from datetime import date
+from django.utils import timezone
 from .models import (
     HomeSections,
     AboutSections,
@@ -25,6 +32,7 @@ from .models import (
     AssoStatus,
     MembershipSection,
     DonationSection,
+    Members,
 )
 from .filters import (
     AdminRessourcesFilter,
@@ -37,6 +45,8 @@ from django.middleware.csrf import get_token
 from django.conf import settings
 from django.shortcuts import redirect
 import stripe
+import time
+from asgiref.sync import sync_to_async
 
 
 # Initialise env vars
@@ -45,7 +55,24 @@ env.read_env("../.env")
 
 
 # == Base view classes to stay DRY == #
-class BaseThematicView(View):
+class CachedPageMixin:
+    """
+    Serve the page from the cache, it is invalidated when the models it renders change
+    (see PAGE_DEPENDENCIES in website/utils/page_cache.py)
+    """
+
+    page_name = None  # URL name of the page in PAGE_DEPENDENCIES
+
+    def get_page_context(self) -> dict:
+        return self.get_queryset()
+
+    def get(self, request):
+        return render_cached_page(
+            request, self.page_name, self.template_name, self.get_page_context
+        )
+
+
+class BaseThematicView(CachedPageMixin, View):
     """
     Base class for the thematic views
     """
@@ -60,10 +87,6 @@ class BaseThematicView(View):
             )  # Get section from the given model
         }
 
-    def get(self, request):
-        context = self.get_queryset()
-        return render(request, self.template_name, context)
-
 
 class BaseRessourcesView(View):
     """
@@ -89,25 +112,103 @@ class BaseRessourcesView(View):
         return render(request, self.template_name, context)
 
 
+class AsyncCheckoutMixin:
+    """
+    Shared steps of the async checkout views (AsyncEventRegistrationView, AsyncMembershipView).
+    """
+
+    async def _arender(self, request, context):
+        # Templates can query the database (lazy querysets), they are rendered outside of the event loop
+        return await sync_to_async(render)(request, self.template_name, context)
+
+    async def _arun_concurrently(self, *steps) -> None:
+        """
+        Run steps of the checkout concurrently and wait for all of them, so none is left running
+        when another one fails.
+        If several steps fail, the error of the first one in the given order is raised with its
+        custom error message, whatever the order in which they finish.
+
+        Parameters
+        ----------
+        steps: coroutines
+            The steps, by order of priority of their errors
+        """
+        error_messages = [None] * len(steps)
+
+        async def run(index, step):
+            try:
+                await step
+            except Exception:
+                # Set by the step just before raising, before another step can run
+                error_messages[index] = self.custom_error_message
+                raise
+
+        results = await asyncio.gather(
+            *(run(index, step) for index, step in enumerate(steps)), return_exceptions=True
+        )
+        for index, result in enumerate(results):
+            if isinstance(result, BaseException):
+                self.custom_error_message = error_messages[index]
+                raise result
+
+    async def _aget_stripe_price(self) -> None:
+        """
+        Async version of _start_price_lookup and _get_stripe_price: the price is read from the catalog,
+        or fetched from Stripe and added to the catalog on a miss.
+        """
+        try:
+            logger.info("Getting price from the catalog ...")
+            self.price = await sync_to_async(get_catalog_price)(self.lookup_key)
+            if self.price is None:
+                logger.info("Waiting for the price from Stripe ...")
+                stripe_price = await astripe_call(fetch_stripe_price, self.lookup_key)
+                self.price = await sync_to_async(add_to_catalog)(self.lookup_key, stripe_price)
+            log_debug_info("Price", self.price)
+        except Exception as error:
+            logger.error(f"An exception occurred while getting the price {self.lookup_key}: {error}")
+            self.custom_error_message = f"Une erreur interne s'est produite lors de la demande. Veuillez réessayer plus tard ou nous contacter à l'adresse suivante : {settings.DEV_EMAIL}"
+            raise error
+        else:
+            logger.info("Price retrieved successfully !")
+
+    async def _acreate_checkout_session(self) -> None:
+        """
+        Async version of the creation of the checkout session (see _checkout_session_params).
+        """
+        logger.info("Creating checkout session ...")
+        try:
+            self.checkout_session_object = await astripe_call(
+                stripe.checkout.Session.create, **self._checkout_session_params()
+            )
+            await sync_to_async(self._store_checkout_session)()
+        except Exception as error:
+            await sync_to_async(self._checkout_session_failed)(error)
+        else:
+            logger.info("Checkout session created successfully ! Redirecting to checkout ...")
+            log_debug_info("Session url", self.checkout_session_object["url"])
+
+
 # == Views == #
-class HomeView(View):
+class HomeView(CachedPageMixin, View):
+    page_name = "home"
     template_name = "pages/home.html"
+    podcasts_count = 4  # Number of podcasts in the podcast section
     # queryset = HomeSections.objects.all()
     # contact_query = ContactSection.objects.first() # For the contact form
 
     def get_queryset(self):
-        # return Home section and contact section queryset
+        # return Home section, contact section queryset and last podcasts (rendered server side)
+        podcasts = get_cached_podcast_episodes(self.podcasts_count)
         return {
             "sections_content": HomeSections.objects.all(),
             "contact_content": ContactSection.objects.first(),
+            "podcasts": podcasts,
+            "podcasts_data": [podcast.to_player_data() for podcast in podcasts],
         }
 
-    def get(self, request):
-        context = self.get_queryset()
-        return render(request, self.template_name, context)
-
 
-class AboutView(View):
+class AboutView(CachedPageMixin, View):
+    page_name = "about"
     template_name = "pages/about.html"
 
     def get_queryset(self):
@@ -117,31 +218,42 @@ class AboutView(View):
             "videos": YoutubeVideos.objects.all(),
         }
 
-    def get(self, request):
-        context = self.get_queryset()
-        return render(request, self.template_name, context)
-
 
 class ChronicTabView(BaseThematicView):
+    page_name = "chronic"
     template_name = "pages/chronic.html"
     model = ChronicTabSections  # Model to query
 
 
 class InvisibleTabView(BaseThematicView):
+    page_name = "invisible"
     template_name = "pages/invisible.html"
     model = InvsibleTabSections  # Model to query
 
 
 class MiscarriageTabView(BaseThematicView):
+    page_name = "miscarriage"
     template_name = "pages/miscarriage.html"
     model = MiscarriageTabSections  # Model to query
 
 
 class PodcastsView(View):
     template_name = "pages/podcasts.html"
+    podcasts_per_page = 4  # Podcasts rendered server side, JS gets the other pages from the Ausha proxy
+
+    def get_queryset(self):
+        podcasts = get_cached_podcast_episodes()
+        first_page = podcasts[: self.podcasts_per_page]
+        return {
+            "podcasts": first_page,
+            "podcasts_data": [podcast.to_player_data() for podcast in first_page],
+            "podcasts_total": len(podcasts),
+            "podcasts_per_page": self.podcasts_per_page,
+        }
 
     def get(self, request):
-        return render(request, self.template_name, {})
+        context = self.get_queryset()
+        return render(request, self.template_name, context)
 
 
 class AdminRessourcesView(BaseRessourcesView):
@@ -159,7 +271,8 @@ class LibraryRessourcesView(BaseRessourcesView):
     filter_class = LibraryRessourcesFilter
 
 
-class AssociationView(View):
+class AssociationView(CachedPageMixin, View):
+    page_name = "association"
     template_name = "pages/association.html"
 
     def get_queryset(self):
@@ -167,10 +280,6 @@ class AssociationView(View):
             "sections_content": AssoSections.objects.all(),
         }
 
-    def get(self, request):
-        context = self.get_queryset()
-        return render(request, self.template_name, context)
-
 
 class EventListView(View):
     template_name = "pages/events-list.html"
@@ -203,7 +312,7 @@ class EventDetailView(View):
 class EventRegistrationView(View):
     """
     View to handle the event (talk group) registration form and the Stripe checkout session.
-    Lookup keys are used to get the prices from Stripe :
+    Lookup keys are used to get the prices from the Stripe price catalog (StripePrice) :
     - talkGroup-registration-reduced
     - talkGroup-registration-normal
     - talkGroup-registration-support
@@ -228,7 +337,9 @@ class EventRegistrationView(View):
             self.country = None
             self.lookup_key = None
             self.event = None
-            self.prices = None
+            self.price = None
+            self.price_future = None
+            self.seat_hold = None
             self.checkout_session_object = None
             self.metadata = None
             self.custom_error_message = None
@@ -250,17 +361,20 @@ class EventRegistrationView(View):
         log_debug_info("Request data", request.POST)
         
         form = EventRegistrationForm(request.POST)
-        stripe.api_key = env("STRIPE_API_TOKEN")
 
         if form.is_valid():
             logger.info("Event registration form is valid")
             try:
                 self._extract_form_data(form)
+                self._create_lookup_key()
+                self._start_price_lookup()  # Sent to Stripe on a catalog miss, awaited below
                 self._get_event(pk)
                 self._check_participant_already_registered()
+                if self._get_open_checkout_session():  # Form submitted again
+                    return redirect(self.checkout_session_object["url"], code=303)
                 self._create_metadata()
-                self._create_lookup_key()
-                self._get_stripe_price_list()
+                self._get_stripe_price()
+                self._hold_seat()
                 self._create_event_stripe_checkout_session()
                 return redirect(self.checkout_session_object["url"], code=303)
             except Exception as error:
@@ -368,66 +482,188 @@ class EventRegistrationView(View):
         self.lookup_key = f"talkGroup-registration-{self.plan}"
         log_debug_info("Lookup key", self.lookup_key)
     
-    def _get_stripe_price_list(self) -> None:
+    def _start_price_lookup(self) -> None:
         """
-        This function gets the prices from Stripe based on the lookup key.
+        This function gets the Stripe price of the lookup key from the price catalog. If the price
+        is not in the catalog, it is fetched from Stripe in the background while the registration
+        is checked (see _get_stripe_price).
         """
         try:
-            # Get prices from Stripe
-            logger.info("Getting prices from Stripe ...")
-            self.prices = stripe.Price.list(
-                lookup_keys=[self.lookup_key], expand=["data.product"]
-            )
-            log_debug_info("Prices list", self.prices)
+            logger.info("Getting price from the catalog ...")
+            self.price = get_catalog_price(self.lookup_key)
+            if self.price is None:
+                self.price_future = submit_stripe_call(fetch_stripe_price, self.lookup_key)
+        except Exception as error:
+            logger.error(f"An exception occurred while getting the price {self.lookup_key}: {error}")
+            self.custom_error_message = f"Une erreur interne s'est produite lors de la demande. Veuillez réessayer plus tard ou nous contacter à l'adresse suivante : {settings.DEV_EMAIL}"
+            raise error
+
+    def _get_stripe_price(self) -> None:
+        """
+        This function waits for the price fetched from Stripe (if it was not in the catalog)
+        and adds it to the catalog.
+        """
+        try:
+            if self.price is None:
+                logger.info("Waiting for the price from Stripe ...")
+                self.price = add_to_catalog(self.lookup_key, self.price_future.result())
+            log_debug_info("Price", self.price)
         except Exception as error:
-            logger.error(f"An exception occurred while getting the prices from Stripe: {error}")
+            logger.error(f"An exception occurred while getting the price {self.lookup_key}: {error}")
             self.custom_error_message = f"Une erreur interne s'est produite lors de la demande. Veuillez réessayer plus tard ou nous contacter à l'adresse suivante : {settings.DEV_EMAIL}"
             raise error
         else:
-            logger.info("Prices retrieved successfully !")
+            logger.info("Price retrieved successfully !")
         
+    def _get_open_checkout_session(self) -> bool:
+        """
+        Get the checkout session already created for this participant and event (e.g. double click
+        on the submit button), so they are redirected to it instead of creating a new one.
+        """
+        self.checkout_session_object = get_open_checkout_session(
+            self.email, f"event-{self.event.id}", self.lookup_key
+        )
+        if self.checkout_session_object is not None:
+            logger.info(f"Open checkout session reused: {self.checkout_session_object['id']}")
+            return True
+        return False
+
+    def _hold_seat(self) -> None:
+        """
+        Hold a seat of the event during the checkout, so the seat can not be sold twice while the
+        participant pays (released by the webhook once paid, or when the checkout session expires).
+        """
+        self.seat_hold = hold_seat(self.event, self.email)
+        if self.seat_hold is None:
+            self.custom_error_message = "L'évènement est complet, il n'y a plus de place disponible. Si vous avez des questions, veuillez nous contacter à l'adresse suivante : " + env("OWNER_EMAIL")
+            raise ValueError(f"No seat available for event: {self.event}")
+
     def _create_event_stripe_checkout_session(self) -> None:
         """
-        Create a checkout session for the event registration.
+        Create a checkout session for the event registration. The session expires with the seat hold.
         """
         logger.info("Creating checkout session for event registration ...")
         try:
             self.checkout_session_object = stripe.checkout.Session.create(
-                line_items=[
-                    {
-                        "price": self.prices.data[0].id,
-                        "quantity": 1,
-                    },
-                ],
-                currency="chf",
-                allow_promotion_codes=True,
-                customer_email=self.email,
-                metadata=self.metadata,
-                payment_intent_data={
-                    "metadata": self.metadata,
-                },
-                custom_text={
-                    "submit": {
-                        "message": "Si vous êtes membres de l'association, n'oubliez pas d'appliquer votre code promo lors du paiement (colonne de gauche).",
-                    },
-                    "after_submit": {
-                        "message": "Vous serrez redirigé vers le site de l'association après le paiement sécurisé.",
-                    },
-                },
-                mode="payment",
-                success_url=self.domain + "/success/",
-                cancel_url=self.domain + "/rendez-vous/",
+                **self._checkout_session_params()
             )
+            self._store_checkout_session()
         except Exception as error:
-            logger.error(f"An exception occurred while creating the checkout session for the event registration: {error}")
-            self.custom_error_message = f"Une erreur interne s'est produite lors de la demande. Veuillez réessayer plus tard ou nous contacter à l'adresse suivante : {settings.DEV_EMAIL}"
-            raise error
+            self._checkout_session_failed(error)
         else:
             logger.info("Checkout session created successfully ! Redirecting to checkout ...")
             log_debug_info("Session url", self.checkout_session_object["url"])
 
+    def _checkout_session_params(self) -> dict:
+        """
+        Parameters of the checkout session of the event registration.
+        """
+        return {
+            "line_items": [
+                {
+                    "price": self.price.price_id,
+                    "quantity": 1,
+                },
+            ],
+            "currency": "chf",
+            "allow_promotion_codes": True,
+            "customer_email": self.email,
+            "metadata": self.metadata,
+            "payment_intent_data": {
+                "metadata": self.metadata,
+            },
+            "custom_text": {
+                "submit": {
+                    "message": "Si vous êtes membres de l'association, n'oubliez pas d'appliquer votre code promo lors du paiement (colonne de gauche).",
+                },
+                "after_submit": {
+                    "message": "Vous serrez redirigé vers le site de l'association après le paiement sécurisé.",
+                },
+            },
+            "mode": "payment",
+            "expires_at": int(time.time()) + checkout_session_lifetime(),
+            "success_url": self.domain + "/success/",
+            "cancel_url": self.domain + "/rendez-vous/",
+        }
+
+    def _store_checkout_session(self) -> None:
+        """
+        Link the new checkout session to the seat hold and cache it for the repeated submits.
+        """
+        attach_checkout_session(self.seat_hold, self.checkout_session_object)
+        cache_checkout_session(
+            self.email, f"event-{self.event.id}", self.lookup_key, self.checkout_session_object
+        )
+
+    def _checkout_session_failed(self, error) -> None:
+        """
+        Release the new seat hold and raise the error of the checkout session creation.
+        """
+        logger.error(f"An exception occurred while creating the checkout session for the event registration: {error}")
+        if self.seat_hold.checkout_session_id is None:  # New hold without checkout session
+            self.seat_hold.delete()
+        self.custom_error_message = f"Une erreur interne s'est produite lors de la demande. Veuillez réessayer plus tard ou nous contacter à l'adresse suivante : {settings.DEV_EMAIL}"
+        raise error
+
+
+class AsyncEventRegistrationView(AsyncCheckoutMixin, EventRegistrationView):
+    """
+    Async version of EventRegistrationView for ASGI deployments (see CHECKOUT_ASYNC_VIEWS in settings).
+    Stripe calls are awaited (see astripe_call) and the database is read with the async ORM, so the
+    requests waiting for Stripe during a registration rush do not occupy a worker.
+    """
+
+    async def get(self, request, pk):
+        return await sync_to_async(super().get)(request, pk)
+
+    async def post(self, request, pk):
+        log_debug_info("Request data", request.POST)
+        form = EventRegistrationForm(request.POST)
+
+        if not form.is_valid():
+            return await self._arender(request, createFormErrorContext(form))
+
+        logger.info("Event registration form is valid")
+        try:
+            self._extract_form_data(form)
+            self._create_lookup_key()
+            # The price is fetched while the registration is checked (whose errors are shown first)
+            await self._arun_concurrently(self._acheck_registration(pk), self._aget_stripe_price())
+            if await sync_to_async(self._get_open_checkout_session)():  # Form submitted again
+                return redirect(self.checkout_session_object["url"], code=303)
+            self._create_metadata()
+            await sync_to_async(self._hold_seat)()
+            await self._acreate_checkout_session()
+            return redirect(self.checkout_session_object["url"], code=303)
+        except Exception as error:
+            logger.error(f"(AsyncEventRegistrationView) -> An exception occurred: {error}")
+            logger.error(f"Custom error message: {self.custom_error_message}")
+            return await self._arender(
+                request, {"form": form, "error_messages": self.custom_error_message}
+            )
 
-class ContactView(View):
+    async def _acheck_registration(self, pk) -> None:
+        """
+        Async version of _get_event and _check_participant_already_registered.
+        """
+        try:
+            self.event = await Event.objects.aget(pk=pk)
+        except Event.DoesNotExist:
+            logger.error(f"Event with ID {pk} does not exist")
+            self.custom_error_message = f"L'événement avec l'ID {pk} n'existe pas."
+            raise Event.DoesNotExist(f"L'événement avec l'ID {pk} n'existe pas.")
+        logger.info(f"Event found: {self.event}")
+
+        if await EventParticipants.objects.filter(
+            event=self.event, participant__email=self.email
+        ).aexists():
+            logger.warning(f"Participant already registered for this event: {self.event}")
+            self.custom_error_message = f"Il semblerait que vous soyez déjà inscrit à cet événement. Si vous avez des questions, veuillez nous contacter à l'adresse suivante : {env('OWNER_EMAIL')}"
+            raise ValueError(f"Participant already registered for this event: {self.event}")
+
+
+class ContactView(CachedPageMixin, View):
+    page_name = "contact"
     template_name = "pages/contact.html"
 
     def get_queryset(self):
@@ -436,10 +672,6 @@ class ContactView(View):
             "contact_content": ContactSection.objects.first(),
         }
 
-    def get(self, request):
-        context = self.get_queryset()
-        return render(request, self.template_name, context)
-
 
 class MembershipView(View):
     template_name = "pages/membership.html"
@@ -466,7 +698,8 @@ class MembershipView(View):
         self.city = None
         self.country = None
         self.lookup_key = None
-        self.prices = None
+        self.price = None
+        self.price_future = None
         self.checkout_session_object = None
         self.custom_error_message = None
 
@@ -487,16 +720,18 @@ class MembershipView(View):
 
     def post(self, request):
         form = MembershipForm(request.POST)
-        stripe.api_key = env("STRIPE_API_TOKEN")
         log_debug_info("Request data", request.POST)
 
         if form.is_valid():
             logger.info("Membership form is valid")
             try:
                 self._extract_form_data(form)
-                self._check_already_has_active_subscription()
                 self._create_lookup_key()
-                self._get_stripe_price_list()
+                self._start_price_lookup()  # Sent to Stripe on a catalog miss, awaited below
+                self._check_already_has_active_subscription()
+                if self._get_open_checkout_session():  # Form submitted again
+                    return redirect(self.checkout_session_object["url"], code=303)
+                self._get_stripe_price()
                 self._create_stripe_checkout_session()
                 return redirect(self.checkout_session_object["url"], code=303)
             except Exception as error:
@@ -540,32 +775,54 @@ class MembershipView(View):
 
     def _check_already_has_active_subscription(self) -> None:
         """
-        This function checks if a customer already exists in the Stripe database and
-        if the customer exists, it will check if they have an active subscription.
+        This function checks if the email already has an active membership, from the Members table
+        (kept up to date by the Stripe webhook). Stripe is only queried if the email is not
+        a member yet (e.g. subscription paid before the webhook was processed), or if its active
+        status was never confirmed by Stripe (members stored before the subscription events were
+        handled, active by default). The confirmed status is then stored.
+        """
+        logger.info("Checking if the member already has an active subscription ...")
+        is_active, confirmed_at = (
+            Members.objects.filter(email=self.email)
+            .values_list("is_subscription_active", "subscription_confirmed_at")
+            .first()
+        ) or (None, None)
+
+        if is_active is None or (is_active and confirmed_at is None):
+            logger.info("Unknown member or unconfirmed status, checking the subscriptions of the Stripe customer ...")
+            try:
+                is_active = self._has_active_stripe_subscription()
+            except Exception as error:
+                logger.error(f"An exception occurred while checking the Stripe subscriptions: {error}")
+                self.custom_error_message = f"Une erreur interne s'est produite lors de la demande. Veuillez réessayer plus tard ou nous contacter à l'adresse suivante : {settings.DEV_EMAIL}"
+                raise error
+            Members.objects.filter(email=self.email).update(
+                is_subscription_active=is_active, subscription_confirmed_at=timezone.now()
+            )
+
+        if is_active:
+            logger.warning(f"Customer already has an active subscription: {self.email}")
+            self.custom_error_message = f"Il semblerait que vous ayez déjà une adhésion active. Si vous avez des questions, veuillez nous contacter à l'adresse suivante : {env('OWNER_EMAIL')}"
+            raise ValueError("Customer already has an active subscription")
+
+    def _has_active_stripe_subscription(self) -> bool:
+        """
+        This function checks if a Stripe customer with this email has an active subscription.
+        The subscriptions are expanded in the customer search (a single Stripe call).
         """
-        logger.info("Checking if customer already exists ...")  
-        # Search for customer
         customer_search = stripe.Customer.search(
             query=f"email:'{self.email}'",
+            expand=["data.subscriptions"],
         )
 
-        if customer_search:
-            logger.warning(f"Customer already exists: {customer_search.data[0]}")
-            existing_customer_id = customer_search.data[0].id
-            # Get all active subscriptions
-            subscription_search = stripe.Subscription.search(
-                query=f"status:'active'",
-            )
-            # Loop through subscriptions and find the one with the customer ID
-            for subscription in subscription_search.data:
-                if subscription.customer == existing_customer_id:
-                    logger.warning(
-                        f"Customer already has an active subscription: {subscription}"
-                    )
-                    self.custom_error_message = f"Il semblerait que vous ayez déjà une adhésion active. Si vous avez des questions, veuillez nous contacter à l'adresse suivante : {env('OWNER_EMAIL')}"
-                    raise ValueError(
-                        "Customer already has an active subscription"
-                    )
+        for customer in customer_search.data:
+            logger.warning(f"Customer already exists: {customer.id}")
+            if any(
+                subscription.status == "active"
+                for subscription in customer.subscriptions.data
+            ):
+                return True
+        return False
     
     def _create_lookup_key(self) -> None:
         """
@@ -598,23 +855,51 @@ class MembershipView(View):
             self.custom_error_message = f"Une erreur interne s'est produite lors de la demande. Veuillez réessayer plus tard ou nous contacter à l'adresse suivante : {settings.DEV_EMAIL}"
             raise ValueError("Invalid subscription or frequency")
 
-    def _get_stripe_price_list(self) -> None:
+    def _start_price_lookup(self) -> None:
         """
-        This function gets the prices from Stripe based on the lookup key.
+        This function gets the Stripe price of the lookup key from the price catalog. If the price
+        is not in the catalog, it is fetched from Stripe in the background while the active
+        subscription is checked (see _get_stripe_price).
         """
         try:
-            # Get prices from Stripe
-            logger.info("Getting prices from Stripe ...")
-            self.prices = stripe.Price.list(
-                lookup_keys=[self.lookup_key], expand=["data.product"]
-            )
-            log_debug_info("Prices list", self.prices)
+            logger.info("Getting price from the catalog ...")
+            self.price = get_catalog_price(self.lookup_key)
+            if self.price is None:
+                self.price_future = submit_stripe_call(fetch_stripe_price, self.lookup_key)
+        except Exception as error:
+            logger.error(f"An exception occurred while getting the price {self.lookup_key}: {error}")
+            self.custom_error_message = f"Une erreur interne s'est produite lors de la demande. Veuillez réessayer plus tard ou nous contacter à l'adresse suivante : {settings.DEV_EMAIL}"
+            raise error
+
+    def _get_stripe_price(self) -> None:
+        """
+        This function waits for the price fetched from Stripe (if it was not in the catalog)
+        and adds it to the catalog.
+        """
+        try:
+            if self.price is None:
+                logger.info("Waiting for the price from Stripe ...")
+                self.price = add_to_catalog(self.lookup_key, self.price_future.result())
+            log_debug_info("Price", self.price)
         except Exception as error:
-            logger.error(f"An exception occurred while getting the prices from Stripe: {error}")
+            logger.error(f"An exception occurred while getting the price {self.lookup_key}: {error}")
             self.custom_error_message = f"Une erreur interne s'est produite lors de la demande. Veuillez réessayer plus tard ou nous contacter à l'adresse suivante : {settings.DEV_EMAIL}"
             raise error
         else:
-            logger.info("Prices retrieved successfully from Stripe !")
+            logger.info("Price retrieved successfully !")
+
+    def _get_open_checkout_session(self) -> bool:
+        """
+        Get the checkout session already created for this email and plan (e.g. double click on the
+        submit button), so the member is redirected to it instead of creating a new one.
+        """
+        self.checkout_session_object = get_open_checkout_session(
+            self.email, self.lookup_key, self.lookup_key
+        )
+        if self.checkout_session_object is not None:
+            logger.info(f"Open checkout session reused: {self.checkout_session_object['id']}")
+            return True
+        return False
 
     def _create_stripe_checkout_session(self) -> None:
         """
@@ -624,54 +909,132 @@ class MembershipView(View):
         logger.info("Creating checkout session ...")
         try:
             self.checkout_session_object = stripe.checkout.Session.create(
-                line_items=[
-                    {
-                        "price": self.prices.data[0].id,
-                        "quantity": 1,
-                    },
-                ],
-                currency="chf",
-                customer_email=self.email,
-                subscription_data={
-                    "metadata": {
-                        "fname": self.first_name,
-                        "lname": self.last_name,
-                        "email": self.email,
-                        "phone": self.phone,
-                        "birthday": self.birthday,
-                        "address": self.address,
-                        "zip_code": self.zip_code,
-                        "city": self.city,
-                        "country": self.country,
-                        "type": "membership",
-                    },
-                },
-                metadata={
-                    "fname": self.first_name,
-                    "lname": self.last_name,
-                    "email": self.email,
-                    "phone": self.phone,
-                    "birthday": self.birthday,
-                    "address": self.address,
-                    "zip_code": self.zip_code,
-                    "city": self.city,
-                    "country": self.country,
-                    "type": "membership",
-                },
-                mode="subscription",
-                success_url=self.domain + "/success/",
-                cancel_url=self.domain + "/membership/",
+                **self._checkout_session_params()
             )
+            self._store_checkout_session()
         except Exception as error:
-            logger.error(f"An exception occurred while creating the checkout session for the membership: {error}")
-            self.custom_error_message = f"Une erreur interne s'est produite lors de la demande. Veuillez réessayer plus tard ou nous contacter à l'adresse suivante : {settings.DEV_EMAIL}"
-            raise error
+            self._checkout_session_failed(error)
         else:
             logger.info("Checkout session created successfully ! Redirecting to checkout ...")
             log_debug_info("Session url", self.checkout_session_object["url"])
 
+    def _checkout_session_params(self) -> dict:
+        """
+        Parameters of the checkout session of the membership subscription.
+        """
+        metadata = {
+            "fname": self.first_name,
+            "lname": self.last_name,
+            "email": self.email,
+            "phone": self.phone,
+            "birthday": self.birthday,
+            "address": self.address,
+            "zip_code": self.zip_code,
+            "city": self.city,
+            "country": self.country,
+            "type": "membership",
+        }
+        return {
+            "line_items": [
+                {
+                    "price": self.price.price_id,
+                    "quantity": 1,
+                },
+            ],
+            "currency": "chf",
+            "customer_email": self.email,
+            "subscription_data": {
+                "metadata": metadata,
+            },
+            "metadata": metadata,
+            "mode": "subscription",
+            "success_url": self.domain + "/success/",
+            "cancel_url": self.domain + "/membership/",
+        }
+
+    def _store_checkout_session(self) -> None:
+        """
+        Cache the new checkout session for the repeated submits.
+        """
+        cache_checkout_session(
+            self.email, self.lookup_key, self.lookup_key, self.checkout_session_object
+        )
+
+    def _checkout_session_failed(self, error) -> None:
+        """
+        Raise the error of the checkout session creation.
+        """
+        logger.error(f"An exception occurred while creating the checkout session for the membership: {error}")
+        self.custom_error_message = f"Une erreur interne s'est produite lors de la demande. Veuillez réessayer plus tard ou nous contacter à l'adresse suivante : {settings.DEV_EMAIL}"
+        raise error
+
+
+class AsyncMembershipView(AsyncCheckoutMixin, MembershipView):
+    """
+    Async version of MembershipView for ASGI deployments (see CHECKOUT_ASYNC_VIEWS in settings).
+    Stripe calls are awaited (see astripe_call) and the database is read with the async ORM.
+    """
+
+    async def get(self, request):
+        return await sync_to_async(super().get)(request)
 
-class DonationView(View):
+    async def post(self, request):
+        log_debug_info("Request data", request.POST)
+        form = MembershipForm(request.POST)
+
+        if not form.is_valid():
+            return await self._arender(request, createFormErrorContext(form))
+
+        logger.info("Membership form is valid")
+        try:
+            self._extract_form_data(form)
+            self._create_lookup_key()
+            # The price is fetched while the active subscription is checked (whose errors are shown first)
+            await self._arun_concurrently(
+                self._acheck_already_has_active_subscription(), self._aget_stripe_price()
+            )
+            if await sync_to_async(self._get_open_checkout_session)():  # Form submitted again
+                return redirect(self.checkout_session_object["url"], code=303)
+            await self._acreate_checkout_session()
+            return redirect(self.checkout_session_object["url"], code=303)
+        except Exception as error:
+            logger.error(f"(AsyncMembershipView) -> An exception occurred: {error}")
+            logger.error(f"Custom error message: {self.custom_error_message}")
+            return await self._arender(
+                request, {"form": form, "error_messages": self.custom_error_message}
+            )
+
+    async def _acheck_already_has_active_subscription(self) -> None:
+        """
+        Async version of _check_already_has_active_subscription.
+        """
+        logger.info("Checking if the member already has an active subscription ...")
+        is_active, confirmed_at = await (
+            Members.objects.filter(email=self.email)
+            .values_list("is_subscription_active", "subscription_confirmed_at")
+            .afirst()
+        ) or (None, None)
+
+        if is_active is None or (is_active and confirmed_at is None):
+            logger.info("Unknown member or unconfirmed status, checking the subscriptions of the Stripe customer ...")
+            try:
+                is_active = await astripe_call(self._has_active_stripe_subscription)
+            except Exception as error:
+                logger.error(f"An exception occurred while checking the Stripe subscriptions: {error}")
+                self.custom_error_message = f"Une erreur interne s'est produite lors de la demande. Veuillez réessayer plus tard ou nous contacter à l'adresse suivante : {settings.DEV_EMAIL}"
+                raise error
+            await Members.objects.filter(email=self.email).aupdate(
+                is_subscription_active=is_active, subscription_confirmed_at=timezone.now()
+            )
+
+        if is_active:
+            logger.warning(f"Customer already has an active subscription: {self.email}")
+            self.custom_error_message = f"Il semblerait que vous ayez déjà une adhésion active. Si vous avez des questions, veuillez nous contacter à l'adresse suivante : {env('OWNER_EMAIL')}"
+            raise ValueError("Customer already has an active subscription")
+
+
+class DonationView(CachedPageMixin, View):
+    page_name = "donation"
     template_name = "pages/donation.html"
 
     def get_queryset(self):
@@ -680,23 +1043,19 @@ class DonationView(View):
             "sections_content": DonationSection.objects.all(),
         }
 
-    def get(self, request):
-        context = self.get_queryset()
-        return render(request, self.template_name, context)
-
 
-class StatusView(View):
+class StatusView(CachedPageMixin, View):
+    page_name = "status"
     template_name = "pages/status.html"
 
     def get_queryset(self):
         # return Home section and contact section queryset
         return AssoStatus.objects.first()
 
-    def get(self, request):
-        context = {
+    def get_page_context(self):
+        return {
             "status_content": self.get_queryset(),
         }
-        return render(request, self.template_name, context)
 
 
 class SuccessView(View):